@@ -1,24 +1,157 @@
-from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
-from typing import List, Optional
+from typing import Dict, List, Optional
 import logging
-import torch
+import os
+import threading
+import time
+from app import config, metrics
+from app.embeddings import LabelShortlister, TextEmbedder
+from app.lexicon import LEXICON_VERSION, LexiconSentimentScorer
+from app.token_batching import (
+    TokenChunks, aggregate_labels, aggregate_sentiment, run_bucketed, token_spans
+)
 
 logger = logging.getLogger(__name__)
 
+SENTIMENT_MODEL = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+LABELING_MODEL = "facebook/bart-large-mnli"
+
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx", "stub")
+
+WARMUP_TEXT = "O produto chegou no prazo e funciona muito bem."
+
+# Template padrão do pipeline zero-shot; entra no comprimento de cada par texto/rótulo
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+# Nível que decidiu o sentimento de cada feedback (coluna feedbacks.sentiment_tier)
+TIER_LEXICON = "lexicon"
+TIER_TRANSFORMER = "transformer"
+
+def map_sentiment_label(label: str) -> str:
+    """Converte o rótulo do modelo para o rótulo exibido (Positivo/Negativo/Neutro)"""
+    if label in ["positive", "pos"]:
+        return "Positivo"
+    elif label in ["negative", "neg"]:
+        return "Negativo"
+    return "Neutro"
+
+def compute_polarity(texts: List[str]) -> List[float]:
+    """Polaridade secundária (TextBlob, -1 a 1) calculada na ingestão e exibida no painel"""
+    from textblob import TextBlob
+
+    return [TextBlob(text or "").sentiment.polarity for text in texts]
+
 class FeedbackAnalyzer:
-    def __init__(self):
+    def __init__(self, load: bool = True, backend: Optional[str] = None):
         self.device = 'cpu'
-        
-        self._load_sentiment_model()
-        self._load_labeling_model()
-        
+        self.backend = backend or config.INFERENCE_BACKEND
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Backend de inferência inválido: {self.backend} (opções: {', '.join(INFERENCE_BACKENDS)})")
+        self.shortlister = None
+        self.embedder = None
+        # Primeiro nível da cascata de sentimento (sem modelo, não depende de load())
+        self.lexicon = LexiconSentimentScorer() if config.SENTIMENT_CASCADE else None
+        self.cascade_threshold = config.SENTIMENT_CASCADE_THRESHOLD
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.model_status: Dict[str, dict] = {
+            name: {"status": "not_loaded", "load_seconds": None, "warmup_seconds": None, "error": None}
+            for name in ("sentiment", "labeling", "embedding")
+        }
+        # O encoder serve ao pré-filtro de rótulos e aos embeddings dos feedbacks
+        if not (self._shortlisting or config.FEEDBACK_EMBEDDINGS):
+            self.model_status["embedding"]["status"] = "disabled"
+
+        # Com load=False os modelos são carregados no primeiro uso (ou via load())
+        if load:
+            self.load()
+
+    def load(self):
+        """Carrega todos os modelos uma única vez, registrando o tempo de cada um"""
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._timed_load("sentiment", self._load_sentiment_model)
+            self._timed_load("labeling", self._load_labeling_model)
+            if self.model_status["embedding"]["status"] != "disabled":
+                self._timed_load("embedding", self._load_embedding_model)
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _timed_load(self, name: str, loader):
+        status = self.model_status[name]
+        status.update(status="loading", error=None)
+        start = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            status.update(status="failed", error=str(e))
+            raise
+        if status["status"] == "loading":
+            status.update(status="ready", load_seconds=round(time.perf_counter() - start, 3))
+
+    def warmup(self):
+        """Executa uma inferência curta em cada modelo para aquecer caches e alocações"""
+        self._ensure_loaded()
+        start = time.perf_counter()
+        self._transformer_sentiment([WARMUP_TEXT])
+        self.model_status["sentiment"]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        self.generate_labels_batch([WARMUP_TEXT], ["entrega", "qualidade"])
+        self.model_status["labeling"]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+        if self.embedder:
+            start = time.perf_counter()
+            self.embedder.encode([WARMUP_TEXT])
+            self.model_status["embedding"]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+    def is_ready(self) -> bool:
+        """Pronto quando os modelos obrigatórios carregaram (o encoder é opcional)"""
+        return all(self.model_status[name]["status"] == "ready" for name in ("sentiment", "labeling"))
+
+    def _build_pipeline(self, task: str, model_name: str):
+        """Cria o pipeline no backend configurado mantendo o mesmo id2label do modelo original"""
+        if self.backend == "stub":
+            from app.stub_models import StubSentimentPipeline, StubZeroShotPipeline
+
+            return StubSentimentPipeline() if task == "text-classification" else StubZeroShotPipeline()
+
+        from transformers import AutoTokenizer, pipeline
+
+        if self.backend == "torch":
+            return pipeline(task, model=model_name, device=self.device)
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        if self.backend == "torch-int8":
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            return pipeline(task, model=model, tokenizer=tokenizer, device=self.device)
+
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND=onnx requer as dependências de requirements-onnx.txt") from e
+
+        # Exporta o grafo ONNX apenas na primeira vez e reaproveita o diretório depois
+        export_dir = os.path.join(config.ONNX_CACHE_DIR, model_name.replace("/", "__"))
+        if os.path.isdir(export_dir):
+            model = ORTModelForSequenceClassification.from_pretrained(export_dir)
+        else:
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
     def _load_sentiment_model(self):
         try:
-            self.sentiment_model = pipeline(
-                "text-classification",
-                model="lxyuan/distilbert-base-multilingual-cased-sentiments-student",
-                device=self.device
-            )
+            self.sentiment_model = self._build_pipeline("text-classification", SENTIMENT_MODEL)
         except Exception as e:
             logger.error(f"Erro ao carregar modelo de sentimentos: {e}")
             raise
@@ -26,51 +159,188 @@ class FeedbackAnalyzer:
     def _load_labeling_model(self):
         """Carrega modelo para rotulagem (zero-shot classification)"""
         try:
-            self.labeling_model = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=self.device
-            )
+            self.labeling_model = self._build_pipeline("zero-shot-classification", LABELING_MODEL)
         except Exception as e:
             logger.error(f"Erro ao carregar modelo de rotulagem: {e}")
             raise
 
-    def analyze_sentiment(self, text: str) -> dict:
+    def _load_embedding_model(self):
+        """Carrega o encoder usado para pré-selecionar rótulos e gerar os embeddings dos feedbacks"""
+        try:
+            if self.backend == "stub":
+                from app.stub_models import StubTextEmbedder
+
+                self.embedder = StubTextEmbedder()
+            else:
+                self.embedder = TextEmbedder(device=self.device)
+            if self._shortlisting:
+                self.shortlister = LabelShortlister(self.embedder, config.LABEL_SHORTLIST_K)
+        except Exception as e:
+            # Sem o encoder, todos os rótulos seguem como candidatos e não há embeddings
+            logger.error(f"Erro ao carregar modelo de embeddings, pré-filtro e similares desativados: {e}")
+            self.model_status["embedding"].update(status="failed", error=str(e))
+
+    @property
+    def _shortlisting(self) -> bool:
+        # No backend stub os rótulos não passam pelo pré-filtro
+        return config.LABEL_SHORTLIST_K > 0 and self.backend != "stub"
+
+    @property
+    def sentiment_model_id(self) -> str:
+        """Identifica a configuração que produz os sentimentos (usado em chaves de cache)"""
+        if self.lexicon is not None:
+            return f"{SENTIMENT_MODEL}|{self.backend}|lexicon-v{LEXICON_VERSION}>={self.cascade_threshold}"
+        return f"{SENTIMENT_MODEL}|{self.backend}"
+
+    @property
+    def labeling_model_id(self) -> str:
+        """Identifica a configuração que produz os rótulos (usado em chaves de cache)"""
+        if self._shortlisting and self.model_status["embedding"]["status"] != "failed":
+            return f"{LABELING_MODEL}|{self.backend}|{config.EMBEDDING_MODEL}|k={config.LABEL_SHORTLIST_K}"
+        return f"{LABELING_MODEL}|{self.backend}"
+
+    def analyze_sentiment(self, text: str, raise_errors: bool = False) -> dict:
         """Analisa o sentimento do texto"""
+        return self.analyze_sentiment_batch([text], raise_errors)[0]
+
+    def analyze_sentiment_batch(self, texts: List[str], raise_errors: bool = False) -> List[dict]:
+        """Analisa o sentimento de vários textos: léxico primeiro, transformer só nos incertos
+
+        Se o modelo falhar, retorna sentiment_fallback() para cada texto ou, com
+        raise_errors=True, propaga a exceção (quem cacheia ou grava checkpoints
+        precisa distinguir a falha de um resultado real).
+        """
+        if not texts:
+            return []
+        results: List[Optional[dict]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+
+        if self.lexicon is not None:
+            with metrics.model_call("lexicon", len(texts)):
+                scored = self.lexicon.score_batch(texts)
+            pending = []
+            for index, result in enumerate(scored):
+                if result["score"] >= self.cascade_threshold:
+                    results[index] = {**result, "tier": TIER_LEXICON}
+                else:
+                    pending.append(index)
+            metrics.SENTIMENT_TIER_TOTAL.inc(len(texts) - len(pending), tier=TIER_LEXICON)
+
+        if pending:
+            metrics.SENTIMENT_TIER_TOTAL.inc(len(pending), tier=TIER_TRANSFORMER)
+            transformer = self._transformer_sentiment([texts[index] for index in pending], raise_errors)
+            for index, result in zip(pending, transformer):
+                results[index] = result
+        return results
+
+    def _transformer_sentiment(self, texts: List[str], raise_errors: bool = False) -> List[dict]:
+        """Sentimento pelo transformer, em lotes por comprimento dentro do orçamento de tokens"""
+        self._ensure_loaded()
         try:
-            result = self.sentiment_model(text)[0]
-            return {
-                "score": result["score"],
-                "label": result["label"].lower()
-            }
+            chunks = TokenChunks(texts, getattr(self.sentiment_model, "tokenizer", None))
+            results = run_bucketed(
+                self.sentiment_model, "sentiment", chunks, truncation=True, max_length=config.INFERENCE_MAX_TOKENS
+            )
+            return [
+                {
+                    "score": result["score"],
+                    "label": result["label"].lower(),
+                    "tier": TIER_TRANSFORMER
+                }
+                for result in aggregate_sentiment(chunks.grouped(results))
+            ]
         except Exception as e:
             logger.error(f"Erro analisando sentimento: {e}")
-            return {"score": 0.0, "label": "neutral"}
+            if raise_errors:
+                raise
+            return [self.sentiment_fallback() for _ in texts]
+
+    @staticmethod
+    def sentiment_fallback() -> dict:
+        """Sentimento devolvido quando o modelo falha (não é um resultado: não deve ser cacheado)"""
+        return {"score": 0.0, "label": "neutral", "tier": TIER_TRANSFORMER}
 
-    def generate_labels(self, text: str, existing_labels: List[str]) -> List[str]:
+    def embed_batch(self, texts: List[str]):
+        """Matriz (len(texts), dimensão) de vetores de norma 1, ou None sem o encoder"""
+        if not texts or not config.FEEDBACK_EMBEDDINGS:
+            return None
+        self._ensure_loaded()
+        if self.embedder is None:
+            return None
+        try:
+            with metrics.model_call("embedding", len(texts)):
+                return self.embedder.encode(texts)
+        except Exception as e:
+            logger.error(f"Erro gerando embeddings: {e}")
+            return None
+
+    def generate_labels(self, text: str, existing_labels: List[str], raise_errors: bool = False) -> List[str]:
         """Gera ou associa rótulos ao texto"""
+        return self.generate_labels_batch([text], existing_labels, raise_errors)[0]
+
+    def generate_labels_batch(self, texts: List[str], existing_labels: List[str],
+                              raise_errors: bool = False) -> List[List[str]]:
+        """Gera rótulos para vários textos que compartilham os mesmos rótulos candidatos
+
+        Se o modelo falhar, retorna [] para cada texto ou, com raise_errors=True, propaga a exceção.
+        """
+        if not texts:
+            return []
+        self._ensure_loaded()
         try:
             if not existing_labels:
-                return []
+                return [[] for _ in texts]
+
+            if self.shortlister and len(existing_labels) > self.shortlister.top_k:
+                return self._generate_labels_shortlisted(texts, existing_labels)
 
             # Usa classificação zero-shot para encontrar os rótulos mais relevantes
-            result = self.labeling_model(
-                text,
-                candidate_labels=existing_labels,
-                multi_label=True
-            )
-            
-            # Filtra rótulos com score > 0.5
-            matched_labels = [
-                label for label, score in zip(result['labels'], result['scores'])
-                if score > 0.5
-            ]
-            
-            return matched_labels[:3]  # Retorna no máximo 3 rótulos
-            
+            results = self._zero_shot(texts, existing_labels)
+            return [self._select_labels(result) for result in results]
+
         except Exception as e:
             logger.error(f"Erro gerando rótulos: {e}")
-            return []
+            if raise_errors:
+                raise
+            return [[] for _ in texts]
+
+    def _generate_labels_shortlisted(self, texts: List[str], existing_labels: List[str]) -> List[List[str]]:
+        """Envia ao zero-shot apenas os k rótulos mais similares de cada texto"""
+        with metrics.model_call("embedding", len(texts)):
+            candidates = self.shortlister.shortlist(texts, existing_labels)
+
+        # Textos com o mesmo conjunto de candidatos compartilham a chamada ao pipeline;
+        # com multi_label cada rótulo é avaliado isoladamente, então a ordem não importa
+        groups = {}
+        for index, labels in enumerate(candidates):
+            groups.setdefault(tuple(sorted(labels)), []).append(index)
+
+        generated: List[List[str]] = [[] for _ in texts]
+        for labels, indexes in groups.items():
+            results = self._zero_shot([texts[index] for index in indexes], list(labels))
+            for index, result in zip(indexes, results):
+                generated[index] = self._select_labels(result)
+        return generated
+
+    def _zero_shot(self, texts: List[str], candidate_labels: List[str]) -> List[dict]:
+        """Zero-shot em lotes por comprimento; textos longos viram trechos e cada rótulo fica com o maior score"""
+        tokenizer = getattr(self.labeling_model, "tokenizer", None)
+        hypotheses = token_spans(tokenizer, [HYPOTHESIS_TEMPLATE.format(label) for label in candidate_labels])
+        chunks = TokenChunks(texts, tokenizer, extra_tokens=max(len(spans) for spans in hypotheses))
+        results = run_bucketed(
+            self.labeling_model, "labeling", chunks, candidate_labels=candidate_labels, multi_label=True
+        )
+        return aggregate_labels(chunks.grouped(results))
+
+    @staticmethod
+    def _select_labels(result: dict) -> List[str]:
+        # Filtra rótulos com score > 0.5
+        matched_labels = [
+            label for label, score in zip(result['labels'], result['scores'])
+            if score > 0.5
+        ]
+
+        return matched_labels[:3]  # Retorna no máximo 3 rótulos
 
     def shutdown(self):
         """Libera memória dos modelos"""
@@ -78,4 +348,14 @@ class FeedbackAnalyzer:
             del self.sentiment_model
         if hasattr(self, 'labeling_model'):
             del self.labeling_model
-        torch.cuda.empty_cache()
\ No newline at end of file
+        self.shortlister = None
+        self.embedder = None
+        self._loaded = False
+        for status in self.model_status.values():
+            if status["status"] == "ready":
+                status["status"] = "not_loaded"
+
+        # O backend stub roda sem torch instalado
+        if self.backend != "stub":
+            import torch
+            torch.cuda.empty_cache()
\ No newline at end of file
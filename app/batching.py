@@ -0,0 +1,161 @@
+from concurrent.futures import Future
+from typing import Any, Callable, List, Tuple
+import logging
+import queue
+import threading
+import time
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Agrupa requisições que chegam dentro de uma janela e as processa em lote"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int,
+                 max_wait_ms: float, name: str = "batcher", concurrency: int = 1):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._stopped = threading.Event()
+        # Mais de uma thread permite manter vários lotes em voo (ex.: pool de processos)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{index}", daemon=True)
+            for index in range(max(1, concurrency))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Enfileira um item e retorna um Future com o seu resultado"""
+        if self._stopped.is_set():
+            raise RuntimeError(f"{self.name} foi encerrado")
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        return self.submit(item).result()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self) -> List[Tuple[Any, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = self._collect()
+            stops = sum(1 for item, _ in batch if item is _STOP)
+            if stops:
+                stop = True
+                self._stopped.set()
+                # Devolve os sinais de parada excedentes para as demais threads
+                for _ in range(stops - 1):
+                    self._queue.put((_STOP, Future()))
+                batch = [(item, future) for item, future in batch if item is not _STOP]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: lote com {len(items)} itens retornou {len(results)} resultados"
+                    )
+            except Exception as e:
+                logger.error(f"Erro processando lote em {self.name}: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def shutdown(self):
+        """Encerra a thread de processamento após esvaziar a fila"""
+        if self._stopped.is_set():
+            return
+        for _ in self._threads:
+            self._queue.put((_STOP, Future()))
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+_STOP = object()
+
+
+class BatchedAnalyzer:
+    """Envolve um FeedbackAnalyzer agrupando chamadas concorrentes em lotes"""
+
+    def __init__(self, analyzer, max_batch_size: int = config.BATCH_MAX_SIZE,
+                 max_wait_ms: float = config.BATCH_MAX_WAIT_MS, concurrency: int = 1):
+        self.analyzer = analyzer
+        self.sentiment_batcher = MicroBatcher(
+            self._sentiment_batch, max_batch_size, max_wait_ms, name="sentiment-batcher", concurrency=concurrency
+        )
+        self.labeling_batcher = MicroBatcher(
+            self._labeling_batch, max_batch_size, max_wait_ms, name="labeling-batcher", concurrency=concurrency
+        )
+
+    def __getattr__(self, name):
+        # Demais métodos (ex.: *_batch) vão direto para o analisador
+        if name == "analyzer":
+            raise AttributeError(name)
+        return getattr(self.analyzer, name)
+
+    def analyze_sentiment(self, text: str, raise_errors: bool = False) -> dict:
+        try:
+            return self.sentiment_batcher(text)
+        except Exception:
+            # O lote falhou (já registrado no log): mesmo fallback do analisador
+            if raise_errors:
+                raise
+            return self.analyzer.sentiment_fallback()
+
+    def generate_labels(self, text: str, existing_labels: List[str], raise_errors: bool = False) -> List[str]:
+        try:
+            return self.labeling_batcher((text, tuple(existing_labels)))
+        except Exception:
+            if raise_errors:
+                raise
+            return []
+
+    def _sentiment_batch(self, texts: List[str]) -> List[dict]:
+        # Falhas chegam como exceção nos futures; cada chamador decide o fallback
+        return self.analyzer.analyze_sentiment_batch(texts, raise_errors=True)
+
+    def _labeling_batch(self, items: List[Tuple[str, Tuple[str, ...]]]) -> List[List[str]]:
+        # O pipeline zero-shot recebe uma única lista de candidatos por chamada,
+        # então agrupamos os textos pelo conjunto de rótulos
+        groups = {}
+        for index, (text, labels) in enumerate(items):
+            groups.setdefault(labels, []).append((index, text))
+
+        results: List[List[str]] = [[] for _ in items]
+        for labels, entries in groups.items():
+            texts = [text for _, text in entries]
+            generated_batch = self.analyzer.generate_labels_batch(texts, list(labels), raise_errors=True)
+            for (index, _), generated in zip(entries, generated_batch):
+                results[index] = generated
+        return results
+
+    def shutdown(self):
+        self.sentiment_batcher.shutdown()
+        self.labeling_batcher.shutdown()
+        self.analyzer.shutdown()
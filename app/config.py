@@ -0,0 +1,92 @@
+import os
+
+# Aplica as migrações pendentes (alembic upgrade head) ao iniciar a API
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "true").lower() in ("1", "true", "yes")
+
+# Micro-batching das chamadas de inferência
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
+# Ingestão em lote (POST /feedbacks/bulk)
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "64"))
+
+# Enriquecimento assíncrono: "sync" processa na requisição, "async" enfileira e responde 202
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "sync")
+# Workers iniciados junto com a API; no modo sync só atendem ?background=true, então ficam desligados por padrão
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "1" if ENRICHMENT_MODE == "async" else "0"))
+ENRICHMENT_BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", "16"))
+ENRICHMENT_POLL_INTERVAL = float(os.getenv("ENRICHMENT_POLL_INTERVAL", "1.0"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", "3"))
+ENRICHMENT_LOCK_TIMEOUT = float(os.getenv("ENRICHMENT_LOCK_TIMEOUT", "300"))
+
+# Backfill de rótulos novos nos feedbacks antigos: feedbacks por lote, limite de
+# feedbacks/s (0 = sem limite) para não disputar os modelos com a ingestão
+LABEL_BACKFILL_WORKER = os.getenv("LABEL_BACKFILL_WORKER", "true").lower() in ("1", "true", "yes")
+LABEL_BACKFILL_BATCH_SIZE = int(os.getenv("LABEL_BACKFILL_BATCH_SIZE", "64"))
+LABEL_BACKFILL_RATE = float(os.getenv("LABEL_BACKFILL_RATE", "50"))
+LABEL_BACKFILL_POLL_INTERVAL = float(os.getenv("LABEL_BACKFILL_POLL_INTERVAL", "5.0"))
+LABEL_BACKFILL_LOCK_TIMEOUT = float(os.getenv("LABEL_BACKFILL_LOCK_TIMEOUT", "300"))
+LABEL_BACKFILL_MAX_ATTEMPTS = int(os.getenv("LABEL_BACKFILL_MAX_ATTEMPTS", "3"))
+
+# Pré-filtro de rótulos por similaridade de embeddings (0 desativa)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+LABEL_SHORTLIST_K = int(os.getenv("LABEL_SHORTLIST_K", "8"))
+
+# Embedding de cada feedback (busca por similares): calculado na ingestão com EMBEDDING_MODEL
+# e gravado compacto como "float16" ou "int8"; o índice fica em VECTOR_INDEX_DIR (memory-mapped)
+FEEDBACK_EMBEDDINGS = os.getenv("FEEDBACK_EMBEDDINGS", "true").lower() in ("1", "true", "yes")
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float16")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+# Acima deste número de vetores o índice é particionado (IVF) e a busca é aproximada
+VECTOR_INDEX_ANN_THRESHOLD = int(os.getenv("VECTOR_INDEX_ANN_THRESHOLD", "100000"))
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+# Intervalo (s) para buscar no banco os vetores gravados por outros processos
+VECTOR_INDEX_REFRESH_INTERVAL = float(os.getenv("VECTOR_INDEX_REFRESH_INTERVAL", "30"))
+
+# Cache de resultados de inferência (0 desativa o tier em memória)
+INFERENCE_CACHE_SIZE = int(os.getenv("INFERENCE_CACHE_SIZE", "10000"))
+INFERENCE_CACHE_TTL = float(os.getenv("INFERENCE_CACHE_TTL", "86400"))
+INFERENCE_CACHE_PERSISTENT = os.getenv("INFERENCE_CACHE_PERSISTENT", "false").lower() in ("1", "true", "yes")
+
+# Carregamento dos modelos: "background" (thread no startup), "eager" (bloqueia o startup) ou "lazy" (primeiro uso)
+LOAD_MODELS = os.getenv("LOAD_MODELS", "true").lower() in ("1", "true", "yes")
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background")
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Backend de inferência: "torch" (fp32), "torch-int8" (quantização dinâmica), "onnx" (ONNX Runtime)
+# ou "stub" (resultados determinísticos sem modelos, para benchmarks e testes de carga)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+STUB_MODEL_LATENCY_MS = float(os.getenv("STUB_MODEL_LATENCY_MS", "0"))
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx_models")
+
+# Lotes por comprimento: tokens preenchidos (itens x maior item) por chamada ao modelo,
+# tokens por trecho (textos maiores são divididos) e trechos por texto (o excedente é truncado)
+INFERENCE_TOKEN_BUDGET = int(os.getenv("INFERENCE_TOKEN_BUDGET", "4096"))
+INFERENCE_MAX_TOKENS = int(os.getenv("INFERENCE_MAX_TOKENS", "256"))
+INFERENCE_MAX_CHUNKS = int(os.getenv("INFERENCE_MAX_CHUNKS", "4"))
+
+# Cascata de sentimento: o léxico em português decide os casos com confiança >= limiar
+# e só o restante vai ao transformer (SENTIMENT_CASCADE=false envia tudo ao transformer)
+SENTIMENT_CASCADE = os.getenv("SENTIMENT_CASCADE", "true").lower() in ("1", "true", "yes")
+SENTIMENT_CASCADE_THRESHOLD = float(os.getenv("SENTIMENT_CASCADE_THRESHOLD", "0.9"))
+SENTIMENT_LEXICON_MAX_TOKENS = int(os.getenv("SENTIMENT_LEXICON_MAX_TOKENS", "30"))
+
+# Pool de processos de inferência (0 = inferência no próprio processo da API)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_THREADS_PER_WORKER = int(os.getenv(
+    "INFERENCE_THREADS_PER_WORKER",
+    str(max(1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS)))
+))
+
+# Executor dedicado às inferências das rotas async: limita quantas chamadas aos modelos
+# ocupam threads ao mesmo tempo, sem disputar o threadpool do Starlette com leituras simples
+INFERENCE_EXECUTOR_THREADS = int(os.getenv("INFERENCE_EXECUTOR_THREADS", "4"))
+
+# Registro de rótulos em memória: intervalo (s) para reler a tabela e captar mudanças de outros processos
+LABEL_REGISTRY_TTL = float(os.getenv("LABEL_REGISTRY_TTL", "30"))
+
+# Cabeçalho Server-Timing com a duração de cada etapa da requisição (as métricas em /metrics são sempre coletadas)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Exportação em streaming (GET /feedbacks/export): linhas lidas do cursor por vez
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
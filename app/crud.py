@@ -0,0 +1,170 @@
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import base64
+import json
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.ai_processing import compute_polarity, map_sentiment_label
+from app.label_registry import label_registry
+import app.models as models
+import app.schemas as schemas
+
+
+def get_purchase_products(db: Session, purchase_ids: Iterable[int]) -> Dict[int, str]:
+    """Retorna, com uma única consulta, o product_id de cada compra existente"""
+    purchase_ids = set(purchase_ids)
+    if not purchase_ids:
+        return {}
+    rows = db.execute(
+        select(models.Purchase.id, models.Purchase.product_id).where(models.Purchase.id.in_(purchase_ids))
+    )
+    return {purchase_id: product_id for purchase_id, product_id in rows}
+
+
+def bulk_insert_feedbacks(db: Session, rows: List[dict]) -> List[int]:
+    """Insere feedbacks com um único INSERT multi-valores e retorna os ids na ordem de entrada"""
+    if not rows:
+        return []
+    result = db.execute(
+        insert(models.Feedback).returning(models.Feedback.id, sort_by_parameter_order=True),
+        rows
+    )
+    return list(result.scalars())
+
+
+def bulk_insert_feedback_labels(db: Session, rows: List[dict]):
+    if rows:
+        db.execute(insert(models.FeedbackLabel), rows)
+
+
+
+def save_analysis(db: Session, feedback: models.Feedback, sentiment: dict, label_names: List[str],
+                  embedding: Optional[bytes] = None):
+    """Grava sentimento, rótulos e embedding de um feedback já persistido (sem commit)"""
+    feedback.sentiment_score = sentiment["score"]
+    feedback.sentiment_label = map_sentiment_label(sentiment["label"])
+    feedback.sentiment_tier = sentiment.get("tier")
+    feedback.secondary_polarity = compute_polarity([feedback.comment])[0]
+    feedback.enrichment_status = models.ENRICHMENT_DONE
+    if embedding is not None:
+        feedback.embedding = embedding
+        feedback.embedded_at = datetime.now(timezone.utc)
+
+    label_ids = label_registry.get_or_create(db, label_names, feedback.comment or "")
+    for name in label_names:
+        db.add(models.FeedbackLabel(feedback_id=feedback.id, label_id=label_ids[name]))
+
+
+def enqueue_enrichment(db: Session, feedback: models.Feedback) -> models.EnrichmentJob:
+    """Marca o feedback como pendente e cria o job na fila (sem commit)"""
+    feedback.enrichment_status = models.ENRICHMENT_PENDING
+    job = models.EnrichmentJob(feedback_id=feedback.id, status=models.ENRICHMENT_PENDING, attempts=0)
+    db.add(job)
+    return job
+
+
+def claim_enrichment_jobs(db: Session, limit: int, lock_timeout: float) -> List[models.EnrichmentJob]:
+    """Reserva até `limit` jobs pendentes (ou travados há mais de `lock_timeout` segundos)"""
+    now = datetime.now(timezone.utc)
+    claimable = or_(
+        models.EnrichmentJob.status == models.ENRICHMENT_PENDING,
+        and_(
+            models.EnrichmentJob.status == models.ENRICHMENT_PROCESSING,
+            models.EnrichmentJob.locked_at < now - timedelta(seconds=lock_timeout)
+        )
+    )
+    query = select(models.EnrichmentJob).where(claimable).order_by(models.EnrichmentJob.id).limit(limit)
+
+    if db.bind.dialect.name == "postgresql":
+        # Workers concorrentes pulam as linhas já travadas por outra transação
+        jobs = db.scalars(query.with_for_update(skip_locked=True)).all()
+        for job in jobs:
+            job.status = models.ENRICHMENT_PROCESSING
+            job.locked_at = now
+            job.attempts = (job.attempts or 0) + 1
+        claimed_ids = [job.id for job in jobs]
+    else:
+        # Fallback (SQLite): reserva otimista, só vence quem atualizar a linha primeiro
+        claimed_ids = []
+        for job_id in db.scalars(select(models.EnrichmentJob.id).where(claimable).order_by(models.EnrichmentJob.id).limit(limit)):
+            result = db.execute(
+                update(models.EnrichmentJob)
+                .where(models.EnrichmentJob.id == job_id, claimable)
+                .values(
+                    status=models.ENRICHMENT_PROCESSING,
+                    locked_at=now,
+                    attempts=func.coalesce(models.EnrichmentJob.attempts, 0) + 1
+                )
+            )
+            if result.rowcount:
+                claimed_ids.append(job_id)
+
+    if claimed_ids:
+        db.execute(
+            update(models.Feedback)
+            .where(models.Feedback.id.in_(
+                select(models.EnrichmentJob.feedback_id).where(models.EnrichmentJob.id.in_(claimed_ids))
+            ))
+            .values(enrichment_status=models.ENRICHMENT_PROCESSING)
+        )
+    db.commit()
+
+    if not claimed_ids:
+        return []
+    return db.scalars(select(models.EnrichmentJob).where(models.EnrichmentJob.id.in_(claimed_ids))).all()
+
+
+def enrichment_status_counts(db: Session) -> Dict[str, int]:
+    rows = db.execute(
+        select(models.Feedback.enrichment_status, func.count())
+        .group_by(models.Feedback.enrichment_status)
+    )
+    return {status: count for status, count in rows}
+
+
+
+def feedback_filter_clauses(filters: schemas.FeedbackFilters) -> list:
+    """Converte os filtros da listagem em cláusulas WHERE sobre feedbacks"""
+    clauses = []
+    if filters.start_date:
+        clauses.append(models.Feedback.created_at >= datetime.combine(filters.start_date, time.min))
+    if filters.end_date:
+        # Data final inclusiva
+        clauses.append(models.Feedback.created_at < datetime.combine(filters.end_date + timedelta(days=1), time.min))
+    if filters.sentiment_label:
+        clauses.append(models.Feedback.sentiment_label == filters.sentiment_label)
+    if filters.enrichment_status:
+        clauses.append(models.Feedback.enrichment_status == filters.enrichment_status)
+    if filters.purchase_id is not None:
+        clauses.append(models.Feedback.purchase_id == filters.purchase_id)
+    if filters.product_id:
+        clauses.append(models.Feedback.purchase_id.in_(
+            select(models.Purchase.id).where(models.Purchase.product_id == filters.product_id)
+        ))
+    if filters.labels:
+        clauses.append(models.Feedback.id.in_(
+            select(models.FeedbackLabel.feedback_id)
+            .join(models.Label, models.Label.id == models.FeedbackLabel.label_id)
+            .where(models.Label.name.in_(filters.labels))
+        ))
+    return clauses
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lança ValueError para cursores malformados"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_clause(sort_column, id_column, cursor: str):
+    """Linhas estritamente depois do cursor na ordem (sort_column, id)"""
+    sort_value, row_id = decode_cursor(cursor)
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+class TextEmbedder:
+    """Gera embeddings normalizados com um encoder de sentenças pequeno"""
+
+    def __init__(self, model_name: str = config.EMBEDDING_MODEL, device: str = 'cpu'):
+        self.model_name = model_name
+        self.device = device
+        self._load_model()
+
+    def _load_model(self):
+        try:
+            from transformers import AutoModel, AutoTokenizer
+
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self.model = AutoModel.from_pretrained(self.model_name).to(self.device)
+            self.model.eval()
+        except Exception as e:
+            logger.error(f"Erro ao carregar modelo de embeddings: {e}")
+            raise
+
+    @property
+    def dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Retorna uma matriz (len(texts), dimension) float32 com vetores de norma 1"""
+        import torch
+
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        vectors = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                encoded = self.tokenizer(
+                    texts[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    return_tensors="pt"
+                ).to(self.device)
+                hidden = self.model(**encoded).last_hidden_state
+                # Mean pooling considerando apenas os tokens reais
+                mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(pooled.cpu().numpy())
+
+        matrix = np.vstack(vectors).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+class LabelShortlister:
+    """Seleciona os k rótulos mais próximos de cada texto antes do zero-shot"""
+
+    def __init__(self, embedder: TextEmbedder, top_k: int = config.LABEL_SHORTLIST_K):
+        self.embedder = embedder
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._label_vectors: Dict[str, np.ndarray] = {}
+        self._matrix_key: Optional[Tuple[str, ...]] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def label_matrix(self, labels: List[str]) -> np.ndarray:
+        """Matriz de embeddings dos rótulos, recalculada apenas quando o catálogo muda"""
+        key = tuple(labels)
+        with self._lock:
+            if key == self._matrix_key:
+                return self._matrix
+
+            missing = [label for label in labels if label not in self._label_vectors]
+            if missing:
+                # O nome vira frase para aproximar do texto dos comentários
+                vectors = self.embedder.encode([label.replace("_", " ") for label in missing])
+                self._label_vectors.update(zip(missing, vectors))
+
+            self._matrix = np.vstack([self._label_vectors[label] for label in labels])
+            self._matrix_key = key
+            return self._matrix
+
+    def shortlist(self, texts: List[str], labels: List[str]) -> List[List[str]]:
+        if len(labels) <= self.top_k:
+            return [list(labels) for _ in texts]
+
+        matrix = self.label_matrix(labels)
+        similarities = self.embedder.encode(texts) @ matrix.T
+
+        k = self.top_k
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        # argpartition não ordena: reordena o top-k pela similaridade
+        rows = np.arange(len(texts))[:, None]
+        order = np.argsort(-similarities[rows, top], axis=1)
+        top = top[rows, order]
+        return [[labels[index] for index in row] for row in top]
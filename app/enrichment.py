@@ -0,0 +1,138 @@
+from typing import List
+import logging
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import config, crud, metrics, rollups
+from app.database import SessionLocal
+from app.label_registry import label_registry
+from app.vector_index import embedding_blobs, vector_index
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+
+def process_jobs(db: Session, analyzer, jobs: List[models.EnrichmentJob]):
+    """Calcula sentimento e rótulos dos feedbacks de um lote de jobs"""
+    feedback_ids = [job.feedback_id for job in jobs]
+    feedbacks = {
+        feedback.id: feedback
+        for feedback in db.scalars(select(models.Feedback).where(models.Feedback.id.in_(feedback_ids)))
+    }
+    # Feedback removido depois de enfileirado: encerra o job para não ser reservado de novo
+    for job in jobs:
+        if job.feedback_id not in feedbacks:
+            job.status = models.ENRICHMENT_FAILED
+            job.last_error = "Feedback não encontrado"
+    jobs = [job for job in jobs if job.feedback_id in feedbacks]
+    comments = [feedbacks[job.feedback_id].comment or "" for job in jobs]
+
+    # Falha do modelo sobe como exceção: o lote volta para a fila (_mark_failed) em vez
+    # de gravar o fallback neutro e sem rótulos como resultado
+    with metrics.stage("enrichment", "sentiment"):
+        sentiments = analyzer.analyze_sentiment_batch(comments, raise_errors=True)
+    with metrics.stage("enrichment", "labeling"):
+        generated = analyzer.generate_labels_batch(comments, label_registry.candidates(db), raise_errors=True)
+    with metrics.stage("enrichment", "embedding"):
+        embeddings = analyzer.embed_batch(comments)
+    blobs = embedding_blobs(embeddings, len(comments))
+
+    products = crud.get_purchase_products(db, [feedback.purchase_id for feedback in feedbacks.values()])
+
+    entries = []
+    with metrics.stage("enrichment", "label_lookup"):
+        for job, sentiment, label_names, blob in zip(jobs, sentiments, generated, blobs):
+            feedback = feedbacks[job.feedback_id]
+            crud.save_analysis(db, feedback, sentiment, label_names, blob)
+            entries.append(rollups.RollupEntry(
+                feedback.created_at, feedback.sentiment_label, feedback.sentiment_score,
+                products.get(feedback.purchase_id), tuple(label_names)
+            ))
+            job.status = models.ENRICHMENT_DONE
+            job.last_error = None
+    with metrics.stage("enrichment", "rollups"):
+        rollups.record(db, entries)
+    with metrics.stage("enrichment", "commit"):
+        db.commit()
+    vector_index.add([job.feedback_id for job in jobs], embeddings)
+
+
+def _mark_failed(db: Session, jobs: List[models.EnrichmentJob], error: Exception):
+    db.rollback()
+    for job in jobs:
+        exhausted = (job.attempts or 0) >= config.ENRICHMENT_MAX_ATTEMPTS
+        job.status = models.ENRICHMENT_FAILED if exhausted else models.ENRICHMENT_PENDING
+        job.last_error = str(error)[:1000]
+        feedback = db.get(models.Feedback, job.feedback_id)
+        if feedback:
+            feedback.enrichment_status = job.status
+    db.commit()
+
+
+class EnrichmentWorkerPool:
+    """Threads que drenam a fila `enrichment_jobs` e preenchem sentimento e rótulos"""
+
+    def __init__(self, analyzer, num_workers: int = config.ENRICHMENT_WORKERS,
+                 batch_size: int = config.ENRICHMENT_BATCH_SIZE,
+                 poll_interval: float = config.ENRICHMENT_POLL_INTERVAL):
+        self.analyzer = analyzer
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for index in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"enrichment-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"{self.num_workers} worker(s) de enriquecimento iniciados")
+
+    def stop(self):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+
+    def process_once(self) -> int:
+        """Processa um lote de jobs e retorna quantos foram reservados"""
+        db = SessionLocal()
+        try:
+            jobs = crud.claim_enrichment_jobs(db, self.batch_size, config.ENRICHMENT_LOCK_TIMEOUT)
+            if not jobs:
+                return 0
+            try:
+                process_jobs(db, self.analyzer, jobs)
+            except Exception as e:
+                logger.error(f"Erro enriquecendo feedbacks: {e}")
+                _mark_failed(db, jobs, e)
+            return len(jobs)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                processed = self.process_once()
+            except Exception as e:
+                logger.error(f"Erro no worker de enriquecimento: {e}")
+                processed = 0
+            # Sem SKIP LOCKED/notificações no SQLite: aguarda e consulta de novo
+            if not processed:
+                self._stopped.wait(self.poll_interval)
+
+
+if __name__ == "__main__":
+    # Executa apenas os workers, permitindo escalá-los separadamente da API
+    from app.ai_processing import FeedbackAnalyzer
+
+    logging.basicConfig(level=logging.INFO)
+    pool = EnrichmentWorkerPool(FeedbackAnalyzer(), num_workers=max(1, config.ENRICHMENT_WORKERS))
+    pool.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pool.stop()
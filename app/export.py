@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Dict, Iterator, List
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from app import config, crud
+from app.database import SessionLocal
+import app.models as models
+import app.schemas as schemas
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+EXPORT_COLUMNS = [
+    "id", "purchase_id", "comment", "sentiment_score", "sentiment_label",
+    "sentiment_tier", "secondary_polarity", "enrichment_status", "created_at", "updated_at", "labels"
+]
+
+
+def iter_feedback_chunks(filters: schemas.FeedbackFilters, chunk_size: int = config.EXPORT_CHUNK_SIZE) -> Iterator[List[dict]]:
+    """Lê os feedbacks de um cursor no servidor, um bloco por vez, com os nomes dos rótulos
+
+    Usa uma sessão própria: o gerador continua rodando depois que as
+    dependências da requisição já foram finalizadas.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(
+                models.Feedback.id, models.Feedback.purchase_id, models.Feedback.comment,
+                models.Feedback.sentiment_score, models.Feedback.sentiment_label,
+                models.Feedback.sentiment_tier, models.Feedback.secondary_polarity, models.Feedback.enrichment_status,
+                models.Feedback.created_at, models.Feedback.updated_at
+            )
+            .where(*crud.feedback_filter_clauses(filters))
+            .order_by(models.Feedback.id)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        for partition in result.partitions():
+            rows = [dict(row._mapping) for row in partition]
+            labels = _labels_for(db, [row["id"] for row in rows])
+            for row in rows:
+                row["labels"] = labels.get(row["id"], [])
+            yield rows
+    finally:
+        db.close()
+
+
+def _labels_for(db, feedback_ids: List[int]) -> Dict[int, List[str]]:
+    labels: Dict[int, List[str]] = {}
+    rows = db.execute(
+        select(models.FeedbackLabel.feedback_id, models.Label.name)
+        .join(models.Label, models.Label.id == models.FeedbackLabel.label_id)
+        .where(models.FeedbackLabel.feedback_id.in_(feedback_ids))
+    )
+    for feedback_id, name in rows:
+        labels.setdefault(feedback_id, []).append(name)
+    return labels
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value)}")
+
+
+def stream_ndjson(chunks: Iterator[List[dict]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+def stream_csv(chunks: Iterator[List[dict]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for rows in chunks:
+        for row in rows:
+            writer.writerow({**row, "labels": "|".join(row["labels"])})
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_arrow(chunks: Iterator[List[dict]]) -> Iterator[bytes]:
+    """Formato Arrow IPC stream: um RecordBatch por bloco lido do banco"""
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("purchase_id", pa.int64()),
+        ("comment", pa.string()),
+        ("sentiment_score", pa.float64()),
+        ("sentiment_label", pa.string()),
+        ("sentiment_tier", pa.string()),
+        ("secondary_polarity", pa.float64()),
+        ("enrichment_status", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+        ("labels", pa.list_(pa.string()))
+    ])
+
+    sink = io.BytesIO()
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    writer = pa.ipc.new_stream(sink, schema)
+    yield drain()
+    for rows in chunks:
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def stream_export(export_format: str, filters: schemas.FeedbackFilters) -> Iterator[bytes]:
+    chunks = iter_feedback_chunks(filters)
+    if export_format == "csv":
+        return stream_csv(chunks)
+    if export_format == "arrow":
+        return stream_arrow(chunks)
+    return stream_ndjson(chunks)
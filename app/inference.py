@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+
+from fastapi import HTTPException
+
+from app import config, metrics
+from app.ai_processing import FeedbackAnalyzer
+from app.batching import BatchedAnalyzer
+from app.inference_cache import CachedAnalyzer
+from app.worker_pool import ProcessPoolAnalyzer
+
+logger = logging.getLogger(__name__)
+
+_analyzer: Optional[CachedAnalyzer] = None
+_lock = threading.Lock()
+
+# Inferências das rotas async rodam aqui, fora do threadpool padrão do Starlette: com os
+# modelos saturados, as requisições extras esperam na fila deste executor e não bloqueiam
+# leituras baratas como GET /labels/
+_executor = ThreadPoolExecutor(max_workers=config.INFERENCE_EXECUTOR_THREADS, thread_name_prefix="inference")
+
+
+def get_analyzer() -> CachedAnalyzer:
+    """Analisador compartilhado pelo processo (cache -> micro-batching -> [pool de processos] -> modelos)
+
+    A construção não carrega os modelos; eles são carregados por start_model_loading()
+    ou, no modo lazy, na primeira inferência.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _lock:
+            if _analyzer is None:
+                analyzer = FeedbackAnalyzer(load=False)
+                concurrency = 1
+                if config.INFERENCE_WORKERS > 0:
+                    analyzer = ProcessPoolAnalyzer(analyzer)
+                    concurrency = config.INFERENCE_WORKERS
+                _analyzer = CachedAnalyzer(BatchedAnalyzer(analyzer, concurrency=concurrency))
+    return _analyzer
+
+
+def require_analyzer() -> CachedAnalyzer:
+    """Dependência FastAPI para rotas que executam inferência"""
+    if not config.LOAD_MODELS:
+        raise HTTPException(status_code=503, detail="Model inference is disabled on this replica")
+    return get_analyzer()
+
+
+async def run_inference(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa uma chamada bloqueante aos modelos no executor de inferência"""
+    loop = asyncio.get_running_loop()
+    # Propaga o contexto (etapas do Server-Timing) para a thread do executor
+    context = contextvars.copy_context()
+    metrics.INFERENCE_EXECUTOR_INFLIGHT.inc()
+    try:
+        return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+    finally:
+        metrics.INFERENCE_EXECUTOR_INFLIGHT.dec()
+
+
+def _load_and_warmup():
+    analyzer = get_analyzer()
+    try:
+        analyzer.load()
+        if config.MODEL_WARMUP:
+            analyzer.warmup()
+        logger.info("Modelos carregados e aquecidos")
+    except Exception as e:
+        logger.error(f"Erro carregando modelos: {e}")
+
+
+def start_model_loading():
+    """Dispara o carregamento conforme MODEL_LOADING; não faz nada se LOAD_MODELS=false"""
+    if not config.LOAD_MODELS:
+        logger.info("LOAD_MODELS=false: réplica somente leitura, modelos não serão carregados")
+        return
+    if config.MODEL_LOADING == "eager":
+        _load_and_warmup()
+    elif config.MODEL_LOADING == "background":
+        threading.Thread(target=_load_and_warmup, name="model-loader", daemon=True).start()
+
+
+def readiness() -> dict:
+    if not config.LOAD_MODELS:
+        return {"ready": True, "models": {}}
+    analyzer = get_analyzer()
+    ready = analyzer.is_ready()
+    if config.MODEL_LOADING == "lazy":
+        # Os modelos carregam sob demanda: a réplica atende enquanto nenhum falhou ao carregar
+        ready = all(analyzer.model_status[name]["status"] != "failed" for name in ("sentiment", "labeling"))
+    return {"ready": ready, "models": analyzer.model_status}
+
+
+def _analyzer_metrics():
+    """Profundidade das filas de micro-batching e estatísticas do cache (sem criar o analisador)"""
+    if _analyzer is None:
+        return []
+    batched = _analyzer.analyzer
+    queue_depth = [
+        ({"batcher": batcher.name}, batcher.qsize())
+        for batcher in (batched.sentiment_batcher, batched.labeling_batcher)
+    ]
+    stats = _analyzer.cache.stats()
+    return [
+        ("feedback_batcher_queue_depth", "gauge", "Itens aguardando lote no micro-batcher", queue_depth),
+        ("feedback_inference_cache_hits_total", "counter", "Acertos do cache de inferência em memória", [({}, stats["hits"])]),
+        ("feedback_inference_cache_misses_total", "counter", "Erros do cache de inferência", [({}, stats["misses"])]),
+        ("feedback_inference_cache_persistent_hits_total", "counter", "Acertos no tier persistente", [({}, stats["persistent_hits"])]),
+        ("feedback_inference_cache_coalesced_total", "counter", "Chamadas deduplicadas em voo", [({}, stats["coalesced"])]),
+        ("feedback_inference_cache_evictions_total", "counter", "Entradas removidas do cache", [({}, stats["evictions"])]),
+        ("feedback_inference_cache_size", "gauge", "Entradas no cache em memória", [({}, stats["size"])]),
+        ("feedback_inference_cache_hit_ratio", "gauge", "Taxa de acerto do cache de inferência", [({}, stats["hit_rate"])]),
+    ]
+
+
+metrics.registry.register_collector(_analyzer_metrics)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
+    if _analyzer is not None:
+        _analyzer.shutdown()
@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app import config
+from app.database import SessionLocal
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o comentário para que variações triviais compartilhem a mesma entrada"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def label_set_version(labels: Iterable[str]) -> str:
+    """Versão estável do conjunto de rótulos (independe da ordem e do processo)"""
+    digest = hashlib.sha1("\n".join(sorted(set(labels))).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def cache_key(kind: str, text: str, model_id: str, labels_version: str = "") -> str:
+    raw = "|".join([kind, model_id, labels_version, normalize_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class InferenceCache:
+    """Cache LRU com TTL em memória, tier persistente opcional e deduplicação de chamadas"""
+
+    def __init__(self, max_size: int = config.INFERENCE_CACHE_SIZE, ttl: float = config.INFERENCE_CACHE_TTL,
+                 persistent: bool = config.INFERENCE_CACHE_PERSISTENT, session_factory=SessionLocal):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persistent = persistent
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _get_local(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_persistent(self, keys: List[str]) -> Dict[str, Any]:
+        if not self.persistent or not keys:
+            return {}
+        db = self.session_factory()
+        try:
+            query = select(models.InferenceCacheEntry).where(models.InferenceCacheEntry.key.in_(keys))
+            if self.ttl > 0:
+                oldest = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+                query = query.where(models.InferenceCacheEntry.created_at >= oldest)
+            return {entry.key: json.loads(entry.value) for entry in db.scalars(query)}
+        except Exception as e:
+            logger.error(f"Erro lendo cache persistente: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def _store_persistent(self, kind: str, values: Dict[str, Any]):
+        if not self.persistent or not values:
+            return
+        db = self.session_factory()
+        try:
+            rows = [{"key": key, "kind": kind, "value": json.dumps(value)} for key, value in values.items()]
+            try:
+                db.execute(insert(models.InferenceCacheEntry), rows)
+                db.commit()
+            except IntegrityError:
+                # Outro worker gravou parte das chaves: insere uma a uma ignorando duplicadas
+                db.rollback()
+                for row in rows:
+                    try:
+                        db.execute(insert(models.InferenceCacheEntry), [row])
+                        db.commit()
+                    except IntegrityError:
+                        db.rollback()
+        except Exception as e:
+            logger.error(f"Erro gravando cache persistente: {e}")
+        finally:
+            db.close()
+
+    def get_or_compute_many(self, kind: str, keys: List[str],
+                            compute: Callable[[List[int]], List[Any]]) -> List[Any]:
+        """Resolve cada chave pelo cache; `compute` recebe os índices que faltam e calcula em lote"""
+        results: List[Any] = [_MISSING] * len(keys)
+        leaders: Dict[str, int] = {}
+        followers: List[tuple] = []
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                value = self._get_local(key)
+                if value is not _MISSING:
+                    self.hits += 1
+                    results[index] = value
+                elif key in leaders:
+                    followers.append((index, key, None))
+                elif key in self._inflight:
+                    # Requisição idêntica já em andamento: espera o resultado dela
+                    self.coalesced += 1
+                    followers.append((index, key, self._inflight[key]))
+                else:
+                    self.misses += 1
+                    leaders[key] = index
+                    self._inflight[key] = Future()
+
+        if leaders:
+            try:
+                persisted = self._load_persistent(list(leaders))
+                missing = [index for key, index in leaders.items() if key not in persisted]
+                computed = dict(zip(missing, compute(missing))) if missing else {}
+
+                fresh = {}
+                with self._lock:
+                    self.persistent_hits += len(persisted)
+                    for key, index in leaders.items():
+                        if key in persisted:
+                            value = persisted[key]
+                        else:
+                            value = computed[index]
+                            fresh[key] = value
+                        self._set_local(key, value)
+                        results[index] = value
+                        self._inflight.pop(key).set_result(value)
+                self._store_persistent(kind, fresh)
+            except Exception as e:
+                with self._lock:
+                    for key in leaders:
+                        future = self._inflight.pop(key, None)
+                        if future is not None and not future.done():
+                            future.set_exception(e)
+                raise
+
+        for index, key, future in followers:
+            results[index] = future.result() if future is not None else results[leaders[key]]
+
+        return [copy.deepcopy(value) for value in results]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced + self.persistent_hits) / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_MISSING = object()
+
+
+class CachedAnalyzer:
+    """Envolve um analisador consultando o InferenceCache antes de chamar os modelos"""
+
+    def __init__(self, analyzer, cache: Optional[InferenceCache] = None):
+        self.analyzer = analyzer
+        self.cache = cache or InferenceCache()
+
+    def __getattr__(self, name):
+        if name in ("analyzer", "cache"):
+            raise AttributeError(name)
+        return getattr(self.analyzer, name)
+
+    def analyze_sentiment(self, text: str, raise_errors: bool = False) -> dict:
+        key = cache_key("sentiment", text, self.analyzer.sentiment_model_id)
+        try:
+            return self.cache.get_or_compute_many(
+                "sentiment", [key], lambda missing: [self.analyzer.analyze_sentiment(text, raise_errors=True)]
+            )[0]
+        except Exception:
+            # Falha do modelo: o fallback é devolvido sem entrar no cache
+            if raise_errors:
+                raise
+            return self.analyzer.sentiment_fallback()
+
+    def analyze_sentiment_batch(self, texts: List[str], raise_errors: bool = False) -> List[dict]:
+        model_id = self.analyzer.sentiment_model_id
+        keys = [cache_key("sentiment", text, model_id) for text in texts]
+        try:
+            return self.cache.get_or_compute_many(
+                "sentiment", keys,
+                lambda missing: self.analyzer.analyze_sentiment_batch(
+                    [texts[index] for index in missing], raise_errors=True
+                )
+            )
+        except Exception:
+            if raise_errors:
+                raise
+            return [self.analyzer.sentiment_fallback() for _ in texts]
+
+    def generate_labels(self, text: str, existing_labels: List[str], raise_errors: bool = False) -> List[str]:
+        key = cache_key("labels", text, self.analyzer.labeling_model_id, label_set_version(existing_labels))
+        try:
+            return self.cache.get_or_compute_many(
+                "labels", [key],
+                lambda missing: [self.analyzer.generate_labels(text, existing_labels, raise_errors=True)]
+            )[0]
+        except Exception:
+            if raise_errors:
+                raise
+            return []
+
+    def generate_labels_batch(self, texts: List[str], existing_labels: List[str],
+                              raise_errors: bool = False) -> List[List[str]]:
+        model_id = self.analyzer.labeling_model_id
+        version = label_set_version(existing_labels)
+        keys = [cache_key("labels", text, model_id, version) for text in texts]
+        try:
+            return self.cache.get_or_compute_many(
+                "labels", keys,
+                lambda missing: self.analyzer.generate_labels_batch(
+                    [texts[index] for index in missing], existing_labels, raise_errors=True
+                )
+            )
+        except Exception:
+            if raise_errors:
+                raise
+            return [[] for _ in texts]
@@ -0,0 +1,290 @@
+"""Backfill incremental de rótulos criados depois da ingestão
+
+Um job guarda os rótulos novos e um cursor por Feedback.id: cada lote passa pelo
+zero-shot apenas com esses rótulos (um par NLI por comentário e rótulo), grava os
+vínculos, os rollups e o checkpoint na mesma transação. Se o processo cair, o job
+é retomado do último lote confirmado quando o lock expira.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import logging
+import threading
+import time
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import config, metrics, rollups
+from app.database import SessionLocal
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (models.BACKFILL_PENDING, models.BACKFILL_RUNNING)
+
+
+def create_job(db: Session, label_ids: List[int]) -> models.LabelBackfillJob:
+    """Cria o job (sem commit) ou devolve o job ativo para o mesmo conjunto de rótulos"""
+    label_ids = sorted(set(label_ids))
+    for job in db.scalars(select(models.LabelBackfillJob).where(models.LabelBackfillJob.status.in_(ACTIVE_STATUSES))):
+        if sorted(job.label_ids) == label_ids:
+            return job
+
+    # Feedbacks ainda pendentes serão enriquecidos já com os rótulos novos entre os candidatos
+    done = models.Feedback.enrichment_status == models.ENRICHMENT_DONE
+    max_feedback_id = db.scalar(select(func.max(models.Feedback.id))) or 0
+    total = db.scalar(
+        select(func.count()).select_from(models.Feedback).where(done, models.Feedback.id <= max_feedback_id)
+    )
+    job = models.LabelBackfillJob(
+        label_ids=label_ids, status=models.BACKFILL_PENDING, last_feedback_id=0,
+        max_feedback_id=max_feedback_id, total=total or 0, processed=0, matched=0, attempts=0
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def describe(job: models.LabelBackfillJob) -> dict:
+    """Estado do job para a API, com o progresso e a vazão desde o início"""
+    elapsed = None
+    if job.started_at:
+        end = job.finished_at or datetime.now(timezone.utc)
+        started_at = job.started_at if job.started_at.tzinfo else job.started_at.replace(tzinfo=timezone.utc)
+        end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+        elapsed = max((end - started_at).total_seconds(), 0.0)
+    return {
+        "id": job.id,
+        "label_ids": job.label_ids,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "matched": job.matched,
+        "progress": 1.0 if job.status == models.BACKFILL_DONE else (job.processed / job.total if job.total else 0.0),
+        "rate": job.processed / elapsed if elapsed else None,
+        "last_feedback_id": job.last_feedback_id,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+
+def claim_job(db: Session, lock_timeout: float, job_id: Optional[int] = None) -> Optional[models.LabelBackfillJob]:
+    """Reserva um job pendente (ou travado há mais de `lock_timeout` segundos)"""
+    now = datetime.now(timezone.utc)
+    claimable = or_(
+        models.LabelBackfillJob.status == models.BACKFILL_PENDING,
+        and_(
+            models.LabelBackfillJob.status == models.BACKFILL_RUNNING,
+            models.LabelBackfillJob.locked_at < now - timedelta(seconds=lock_timeout)
+        )
+    )
+    query = select(models.LabelBackfillJob.id).where(claimable).order_by(models.LabelBackfillJob.id)
+    if job_id is not None:
+        query = query.where(models.LabelBackfillJob.id == job_id)
+
+    # Reserva otimista: poucos jobs e um worker por processo, basta vencer o UPDATE
+    for candidate in db.scalars(query.limit(5)).all():
+        result = db.execute(
+            update(models.LabelBackfillJob)
+            .where(models.LabelBackfillJob.id == candidate, claimable)
+            .values(
+                status=models.BACKFILL_RUNNING,
+                locked_at=now,
+                started_at=func.coalesce(models.LabelBackfillJob.started_at, now)
+            )
+        )
+        if result.rowcount:
+            db.commit()
+            return db.get(models.LabelBackfillJob, candidate)
+    db.commit()
+    return None
+
+
+def _new_links(db: Session, links: List[dict]) -> List[dict]:
+    """Remove os vínculos que já existem e insere os demais sem violar a unicidade"""
+    if not links:
+        return []
+    existing = set(db.execute(
+        select(models.FeedbackLabel.feedback_id, models.FeedbackLabel.label_id).where(
+            models.FeedbackLabel.feedback_id.in_({link["feedback_id"] for link in links}),
+            models.FeedbackLabel.label_id.in_({link["label_id"] for link in links})
+        )
+    ).all())
+    links = [link for link in links if (link["feedback_id"], link["label_id"]) not in existing]
+    if not links:
+        return []
+
+    table = models.FeedbackLabel.__table__
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        db.execute(
+            dialect_insert(table).on_conflict_do_nothing(index_elements=["feedback_id", "label_id"]),
+            links
+        )
+    else:
+        db.execute(insert(table), links)
+    return links
+
+
+def process_batch(db: Session, analyzer, job: models.LabelBackfillJob, batch_size: int) -> int:
+    """Rotula o próximo lote do job e avança o checkpoint; retorna quantos feedbacks leu"""
+    labels: Dict[str, int] = {
+        name: label_id
+        for label_id, name in db.execute(
+            select(models.Label.id, models.Label.name).where(models.Label.id.in_(job.label_ids))
+        )
+    }
+    rows = []
+    if labels:
+        rows = db.execute(
+            select(
+                models.Feedback.id, models.Feedback.comment, models.Feedback.created_at,
+                models.Feedback.sentiment_label, models.Feedback.sentiment_score
+            )
+            .where(
+                models.Feedback.id > job.last_feedback_id,
+                models.Feedback.id <= job.max_feedback_id,
+                models.Feedback.enrichment_status == models.ENRICHMENT_DONE
+            )
+            .order_by(models.Feedback.id)
+            .limit(batch_size)
+        ).all()
+
+    now = datetime.now(timezone.utc)
+    if not rows:
+        job.status = models.BACKFILL_DONE
+        job.finished_at = now
+        job.locked_at = None
+        db.commit()
+        logger.info(f"Backfill de rótulos {job.id} concluído: {job.processed} feedbacks, {job.matched} vínculos")
+        return 0
+
+    # Falha do modelo sobe como exceção: o checkpoint não avança e o lote é tentado de novo
+    with metrics.stage("label_backfill", "labeling"):
+        generated = analyzer.generate_labels_batch(
+            [row.comment or "" for row in rows], list(labels), raise_errors=True
+        )
+
+    with metrics.stage("label_backfill", "insert_labels"):
+        links = _new_links(db, [
+            {"feedback_id": row.id, "label_id": labels[name]}
+            for row, names in zip(rows, generated)
+            for name in names if name in labels
+        ])
+
+    if links:
+        names_by_id = {label_id: name for name, label_id in labels.items()}
+        linked: Dict[int, List[str]] = {}
+        for link in links:
+            linked.setdefault(link["feedback_id"], []).append(names_by_id[link["label_id"]])
+        with metrics.stage("label_backfill", "rollups"):
+            rollups.record_labels(db, [
+                rollups.RollupEntry(row.created_at, row.sentiment_label, row.sentiment_score, None, tuple(linked[row.id]))
+                for row in rows if row.id in linked
+            ])
+        # Sincronizações incrementais (?since=) passam a ver os rótulos novos
+        db.execute(
+            update(models.Feedback).where(models.Feedback.id.in_(list(linked))).values(updated_at=models.utcnow())
+        )
+
+    job.last_feedback_id = rows[-1].id
+    job.processed += len(rows)
+    job.matched += len(links)
+    job.locked_at = now
+    with metrics.stage("label_backfill", "commit"):
+        db.commit()
+    return len(rows)
+
+
+def _mark_failed(db: Session, job_id: int, error: Exception):
+    db.rollback()
+    job = db.get(models.LabelBackfillJob, job_id)
+    if job is None:
+        return
+    job.attempts = (job.attempts or 0) + 1
+    exhausted = job.attempts >= config.LABEL_BACKFILL_MAX_ATTEMPTS
+    # Sem perder o checkpoint: a próxima tentativa continua do último lote confirmado
+    job.status = models.BACKFILL_FAILED if exhausted else models.BACKFILL_PENDING
+    job.last_error = str(error)[:1000]
+    job.locked_at = None
+    db.commit()
+
+
+class LabelBackfillWorker:
+    """Thread que executa os jobs de backfill um lote por vez, limitada a `rate` feedbacks/s"""
+
+    def __init__(self, analyzer, batch_size: int = config.LABEL_BACKFILL_BATCH_SIZE,
+                 rate: float = config.LABEL_BACKFILL_RATE,
+                 poll_interval: float = config.LABEL_BACKFILL_POLL_INTERVAL):
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.rate = rate
+        self.poll_interval = poll_interval
+        self._job_id: Optional[int] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="label-backfill-worker", daemon=True)
+        self._thread.start()
+        logger.info("Worker de backfill de rótulos iniciado")
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def process_once(self, job_id: Optional[int] = None) -> int:
+        """Processa um lote do job atual (ou reserva o próximo) e retorna quantos feedbacks leu"""
+        db = SessionLocal()
+        try:
+            job = None
+            if self._job_id is not None:
+                job = db.get(models.LabelBackfillJob, self._job_id)
+                if job is None or job.status != models.BACKFILL_RUNNING:
+                    job = self._job_id = None
+            if job is None:
+                job = claim_job(db, config.LABEL_BACKFILL_LOCK_TIMEOUT, job_id)
+                if job is None:
+                    return 0
+                self._job_id = job.id
+            try:
+                processed = process_batch(db, self.analyzer, job, self.batch_size)
+            except Exception as e:
+                logger.error(f"Erro no backfill de rótulos {self._job_id}: {e}")
+                _mark_failed(db, self._job_id, e)
+                self._job_id = None
+                return 0
+            if not processed:
+                self._job_id = None
+            return processed
+        finally:
+            db.close()
+
+    def throttle(self, processed: int, elapsed: float):
+        """Espera o necessário para manter a vazão em `rate` feedbacks/s"""
+        if self.rate > 0 and processed:
+            self._stopped.wait(max(0.0, processed / self.rate - elapsed))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            start = time.perf_counter()
+            try:
+                processed = self.process_once()
+            except Exception as e:
+                logger.error(f"Erro no worker de backfill de rótulos: {e}")
+                processed = 0
+            if processed:
+                self.throttle(processed, time.perf_counter() - start)
+            elif self._job_id is None:
+                self._stopped.wait(self.poll_interval)
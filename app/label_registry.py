@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Optional
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import config
+from app.inference_cache import label_set_version
+import app.models as models
+
+
+class LabelRegistry:
+    """Mantém nome -> id e a lista de candidatos em memória, com versão do conjunto de rótulos
+
+    A versão é um hash do conjunto de nomes, portanto é a mesma em todos os processos
+    e pode ser usada como parte de chaves de cache.
+    """
+
+    def __init__(self, ttl: float = config.LABEL_REGISTRY_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._version: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+
+    def _is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return self.ttl > 0 and time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self, db: Session):
+        rows = db.execute(select(models.Label.name, models.Label.id).order_by(models.Label.id)).all()
+        with self._lock:
+            self._ids = {name: label_id for name, label_id in rows}
+            self._names = [name for name, _ in rows]
+            self._version = label_set_version(self._names)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if self._is_stale():
+            self.refresh(db)
+
+    def invalidate(self):
+        """Força a releitura no próximo acesso (ex.: após POST /labels/)"""
+        with self._lock:
+            self._loaded_at = None
+
+    def version(self, db: Session) -> str:
+        self.ensure_loaded(db)
+        return self._version
+
+    def candidates(self, db: Session) -> List[str]:
+        self.ensure_loaded(db)
+        with self._lock:
+            return list(self._names)
+
+    def get_or_create(self, db: Session, names: Iterable[str], comment: str = "") -> Dict[str, int]:
+        """Mapeia nomes para ids; só consulta o banco para nomes desconhecidos"""
+        names = set(names)
+        if not names:
+            return {}
+
+        self.ensure_loaded(db)
+        with self._lock:
+            label_ids = {name: self._ids[name] for name in names if name in self._ids}
+
+        missing = names - label_ids.keys()
+        if missing:
+            # Pode ter sido criado por outro processo desde a última leitura
+            rows = db.execute(select(models.Label.name, models.Label.id).where(models.Label.name.in_(missing)))
+            label_ids.update({name: label_id for name, label_id in rows})
+
+            for name in missing - label_ids.keys():
+                db_label = models.Label(name=name, description=f"Automatically generated for: {comment[:50]}...")
+                db.add(db_label)
+                db.flush()
+                label_ids[name] = db_label.id
+
+            # O conjunto mudou (ou estava desatualizado): relê após o commit de quem chamou
+            self.invalidate()
+
+        return label_ids
+
+
+label_registry = LabelRegistry()
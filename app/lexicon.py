@@ -0,0 +1,107 @@
+"""Primeiro nível da cascata de sentimento: léxico em português, sem modelos
+
+Decide só os casos claros (frases curtas com palavras de uma única polaridade);
+o restante recebe confiança baixa e segue para o transformer.
+"""
+from typing import Dict, List, Optional
+import re
+import unicodedata
+
+from app import config
+
+# Versão do léxico (entra no id do modelo de sentimento, invalidando o cache ao mudar)
+LEXICON_VERSION = 2
+
+# Radicais sem acento; um token casa com o maior radical que for seu prefixo
+POSITIVE_STEMS = (
+    "ador", "excelent", "otim", "perfeit", "maravilh", "incrive", "recomend",
+    "satisfeit", "impecav", "fantastic", "lind", "rapid", "eficient",
+    "confiav", "supero", "elogi", "feliz", "gostei", "aprovad", "prestativ", "atencios", "durav",
+    "nitid", "sensaciona", "espetacula", "agil", "pontual",
+)
+NEGATIVE_STEMS = (
+    "pessim", "horrive", "defeit", "quebr", "atras", "decepcion", "ruim", "pior", "lament",
+    "arrepend", "engan", "falsific", "fragil", "problem", "reclam", "demor", "errad", "extravi",
+    "danific", "amassad", "perigos", "insuport", "caris", "desonest", "abusiv", "denunci", "procon",
+    "inexistent", "despreparad", "maltrat", "falt", "frustr", "golpe", "estrag",
+)
+# Palavras curtas que, como prefixo, casariam com termos neutros de produto
+# ("mal" em mala/malha, "amo" em amostra, "bom" em bomba): só valem inteiras
+POSITIVE_WORDS = {"amo", "amei", "bom", "boa", "bons", "boas", "top", "show"}
+NEGATIVE_WORDS = {"mal", "lixo", "odeio", "odiei", "odiamos"}
+# Tokens que começam com um radical mas não são polarizados ("atrás" não é "atraso")
+NEUTRAL_WORDS = {"atras"}
+NEGATORS = {"nao", "nunca", "jamais", "nem", "sem"}
+# Conectivos de contraste indicam opinião mista: o léxico não decide
+CONTRAST_WORDS = {"mas", "porem", "entretanto", "contudo", "todavia", "apesar", "embora"}
+
+NEGATION_SCOPE = 3
+# Uma única palavra polarizada não basta para dispensar o transformer
+# ("não chegou bom como o anterior"): fica abaixo do limiar padrão da cascata
+SINGLE_HIT_MAX_CONFIDENCE = 0.75
+_TOKEN = re.compile(r"[a-z]+")
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+class LexiconSentimentScorer:
+    """Sentimento por contagem de palavras polarizadas, com negação e confiança"""
+
+    def __init__(self, max_tokens: int = config.SENTIMENT_LEXICON_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self._stems: Dict[str, int] = {stem: 1 for stem in POSITIVE_STEMS}
+        self._stems.update({stem: -1 for stem in NEGATIVE_STEMS})
+        self._words: Dict[str, int] = {word: 1 for word in POSITIVE_WORDS}
+        self._words.update({word: -1 for word in NEGATIVE_WORDS})
+        self._max_stem = max(len(stem) for stem in self._stems)
+        self._min_stem = min(len(stem) for stem in self._stems)
+
+    def _polarity(self, token: str) -> Optional[int]:
+        if token in self._words:
+            return self._words[token]
+        if token in NEUTRAL_WORDS:
+            return None
+        for length in range(min(len(token), self._max_stem), self._min_stem - 1, -1):
+            polarity = self._stems.get(token[:length])
+            if polarity is not None:
+                return polarity
+        return None
+
+    def score(self, text: str) -> dict:
+        """Retorna label (positive/negative/neutral) e score = confiança em [0, 1)"""
+        tokens = _TOKEN.findall(fold(text))
+        if not tokens or len(tokens) > self.max_tokens or CONTRAST_WORDS.intersection(tokens):
+            return {"label": "neutral", "score": 0.0}
+
+        positive = negative = 0
+        negated_until = -1
+        for index, token in enumerate(tokens):
+            if token in NEGATORS:
+                negated_until = index + NEGATION_SCOPE
+                continue
+            polarity = self._polarity(token)
+            if polarity is None:
+                continue
+            if index <= negated_until:
+                polarity = -polarity
+            if polarity > 0:
+                positive += 1
+            else:
+                negative += 1
+
+        hits = positive + negative
+        if not hits or (positive and negative):
+            return {"label": "neutral", "score": 0.0}
+
+        # Mais palavras polarizadas e maior proporção do texto -> mais confiança
+        coverage = hits / len(tokens)
+        confidence = min(0.99, 0.6 + 0.15 * hits + 0.5 * coverage)
+        if hits < 2:
+            confidence = min(confidence, SINGLE_HIT_MAX_CONFIDENCE)
+        return {"label": "positive" if positive else "negative", "score": round(confidence, 4)}
+
+    def score_batch(self, texts: List[str]) -> List[dict]:
+        return [self.score(text) for text in texts]
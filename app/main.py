@@ -1,10 +1,14 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, get_db
-from app import models
-from app.routers import feedbacks, purchases, labels
+from app import config, inference, metrics, schemas
+from app.enrichment import EnrichmentWorkerPool
+from app.label_backfill import LabelBackfillWorker
+from app.migrate import upgrade_database
+from app.vector_index import vector_index
+from app.routers import feedbacks, health, purchases, labels, stats
 
-models.Base.metadata.create_all(bind=engine)
+if config.RUN_MIGRATIONS:
+    upgrade_database()
 
 app = FastAPI(
     title="Feedback Analysis API",
@@ -18,11 +22,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    return await metrics.instrument_request(request, call_next)
+
 app.include_router(feedbacks.router)
 app.include_router(purchases.router)
 app.include_router(labels.router)
+app.include_router(health.router)
+app.include_router(stats.router)
+
+enrichment_workers = EnrichmentWorkerPool(inference.get_analyzer())
+# O backfill usa o analisador sem o cache: cada conjunto de rótulos é consultado uma única vez
+label_backfill_worker = LabelBackfillWorker(inference.get_analyzer().analyzer)
+
+@app.on_event("startup")
+def start_background_tasks():
+    # Arquivos memory-mapped: abrir o índice não lê os vetores para a memória
+    vector_index.load()
+    inference.start_model_loading()
+    if config.LOAD_MODELS and config.ENRICHMENT_WORKERS > 0:
+        enrichment_workers.start()
+    if config.LOAD_MODELS and config.LABEL_BACKFILL_WORKER:
+        label_backfill_worker.start()
+
+@app.on_event("shutdown")
+def shutdown_analyzer():
+    enrichment_workers.stop()
+    label_backfill_worker.stop()
+    inference.shutdown()
+
+@app.get("/cache/stats", response_model=schemas.CacheStats)
+def read_cache_stats():
+    return inference.get_analyzer().cache.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,246 @@
+"""Métricas do processo em formato texto do Prometheus (GET /metrics) e cabeçalho Server-Timing
+
+Registro mínimo em memória (contadores e histogramas com rótulos, mais coletores
+chamados a cada leitura para valores que já existem em outro lugar, como as
+estatísticas do cache). Com vários workers do uvicorn cada processo expõe as suas.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import bisect
+import threading
+import time
+
+from app import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de rótulos: [contagens por bucket (não cumulativas) + overflow, soma, total]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# Coletor: função chamada a cada leitura que devolve [(nome, tipo, descrição, [(rótulos, valor)])]
+Collector = Callable[[], List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# coletor {getattr(collector, '__name__', collector)} falhou: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "feedback_api_request_duration_seconds", "Duração das requisições HTTP", ("method", "route", "status")
+))
+STAGE_SECONDS = registry.register(Histogram(
+    "feedback_api_stage_duration_seconds", "Duração de cada etapa do caminho quente", ("operation", "stage")
+))
+MODEL_SECONDS = registry.register(Histogram(
+    "feedback_model_inference_duration_seconds", "Duração de cada chamada aos modelos", ("model",)
+))
+MODEL_BATCH_SIZE = registry.register(Histogram(
+    "feedback_model_batch_size", "Textos por chamada aos modelos", ("model",), buckets=BATCH_SIZE_BUCKETS
+))
+SENTIMENT_TIER_TOTAL = registry.register(Counter(
+    "feedback_sentiment_tier_total", "Textos decididos por cada nível da cascata de sentimento", ("tier",)
+))
+DB_CHECKOUT_SECONDS = registry.register(Histogram(
+    "feedback_db_pool_checkout_duration_seconds", "Espera para obter uma conexão do pool", ("engine",)
+))
+INFERENCE_EXECUTOR_INFLIGHT = registry.register(Gauge(
+    "feedback_inference_executor_inflight", "Chamadas no executor de inferência (rodando ou na fila)"
+))
+
+# Etapas da requisição atual, para o cabeçalho Server-Timing
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(operation: str, name: str):
+    """Mede uma etapa no histograma e, dentro de uma requisição, no Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, operation=operation, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+@contextmanager
+def model_call(model: str, batch_size: int):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        MODEL_SECONDS.observe(time.perf_counter() - start, model=model)
+        MODEL_BATCH_SIZE.observe(batch_size, model=model)
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    # Etapas repetidas (ex.: blocos do bulk) são somadas
+    totals: Dict[str, float] = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+
+async def instrument_request(request, call_next):
+    """Middleware HTTP: duração por rota e, com SERVER_TIMING=true, o cabeçalho Server-Timing"""
+    timings: List[Tuple[str, float]] = []
+    token = _request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_timings.reset(token)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        elapsed, method=request.method, route=getattr(route, "path", "unmatched"), status=response.status_code
+    )
+    if config.SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing_header(timings + [("total", elapsed)])
+    return response
+
+
+def render() -> str:
+    return registry.render()
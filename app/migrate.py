@@ -0,0 +1,46 @@
+from pathlib import Path
+import logging
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revisão equivalente ao esquema original gerado por create_all; as colunas e tabelas que
+# create_all passou a criar depois são completadas, se faltarem, pela revisão 0001a
+BASELINE_REVISION = "0001"
+
+# Chave do advisory lock que serializa migrações de várias réplicas subindo juntas
+_MIGRATION_LOCK_KEY = 7201301
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    return cfg
+
+
+def upgrade_database(revision: str = "head"):
+    """Aplica as migrações pendentes (substitui o antigo Base.metadata.create_all)"""
+    cfg = alembic_config()
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+        cfg.attributes["connection"] = connection
+
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "feedbacks" in tables:
+            # Banco criado por create_all: marca o esquema inicial como aplicado
+            logger.info(f"Banco sem histórico de migrações, marcando revisão {BASELINE_REVISION}")
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, revision)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database()
@@ -1,8 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, JSON, LargeBinary, Text, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.database import Base
 
+# Estados do enriquecimento (sentimento + rótulos) de um feedback
+ENRICHMENT_PENDING = "pending"
+ENRICHMENT_PROCESSING = "processing"
+ENRICHMENT_DONE = "done"
+ENRICHMENT_FAILED = "failed"
+
+# Estados de um job de backfill de rótulos
+BACKFILL_PENDING = "pending"
+BACKFILL_RUNNING = "running"
+BACKFILL_DONE = "done"
+BACKFILL_FAILED = "failed"
+
+
+def utcnow() -> datetime:
+    """Timestamps das colunas usadas nos cursores (created_at/updated_at)
+
+    Gerados no Python para terem sempre o mesmo formato: no SQLite o CURRENT_TIMESTAMP
+    grava "YYYY-MM-DD HH:MM:SS", que não se compara com o valor do cursor (com microssegundos).
+    """
+    return datetime.now(timezone.utc)
+
 class Purchase(Base):
     __tablename__ = "purchases"
     
@@ -12,6 +34,7 @@ class Purchase(Base):
     product_name = Column(String)
     amount = Column(Float)
     purchase_date = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow, index=True)
     
     feedbacks = relationship("Feedback", back_populates="purchase")
 
@@ -23,11 +46,26 @@ class Feedback(Base):
     comment = Column(Text)
     sentiment_score = Column(Float)
     sentiment_label = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sentiment_tier = Column(String)  # nível da cascata que decidiu: "lexicon" ou "transformer"
+    secondary_polarity = Column(Float)
+    # Vetor do comentário (float16/int8, ver app/vector_index.py); não é lido nas consultas comuns
+    embedding = deferred(Column(LargeBinary))
+    # Quando o embedding foi gravado: marca d'água que os processos da API usam para buscar vetores novos
+    embedded_at = Column(DateTime(timezone=True), index=True)
+    enrichment_status = Column(String, default=ENRICHMENT_DONE, server_default=ENRICHMENT_DONE, index=True)
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow, index=True)
     
     purchase = relationship("Purchase", back_populates="feedbacks")
     labels = relationship("FeedbackLabel", back_populates="feedback")
 
+    # Índices das consultas principais (ver migrations/versions/0002 e scripts/explain_queries.py)
+    __table_args__ = (
+        Index("ix_feedbacks_created_at_id", "created_at", "id"),  # períodos e paginação por cursor
+        Index("ix_feedbacks_purchase_id", "purchase_id"),
+        Index("ix_feedbacks_sentiment_label_created_at", "sentiment_label", "created_at"),
+    )
+
 class Label(Base):
     __tablename__ = "labels"
     
@@ -46,4 +84,74 @@ class FeedbackLabel(Base):
     label_id = Column(Integer, ForeignKey("labels.id"))
     
     feedback = relationship("Feedback", back_populates="labels")
-    label = relationship("Label", back_populates="feedbacks")
\ No newline at end of file
+    label = relationship("Label", back_populates="feedbacks")
+
+    __table_args__ = (
+        # Um rótulo por feedback; também atende a busca dos rótulos de cada feedback
+        Index("uq_feedback_labels_feedback_id_label_id", "feedback_id", "label_id", unique=True),
+        # Filtro por rótulo: label_id -> feedback_id sem visitar a tabela
+        Index("ix_feedback_labels_label_id_feedback_id", "label_id", "feedback_id"),
+    )
+
+class EnrichmentJob(Base):
+    __tablename__ = "enrichment_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    feedback_id = Column(Integer, ForeignKey("feedbacks.id"), index=True)
+    status = Column(String, default=ENRICHMENT_PENDING, index=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    locked_at = Column(DateTime(timezone=True))
+
+    feedback = relationship("Feedback")
+
+class LabelBackfillJob(Base):
+    """Aplica rótulos novos aos feedbacks já enriquecidos, em lotes, com checkpoint por Feedback.id"""
+    __tablename__ = "label_backfill_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    label_ids = Column(JSON, nullable=False)
+    status = Column(String, default=BACKFILL_PENDING, index=True)
+    # Feedbacks com id > last_feedback_id e <= max_feedback_id ainda faltam; os mais
+    # novos que max_feedback_id já foram rotulados com o rótulo no conjunto de candidatos
+    last_feedback_id = Column(Integer, nullable=False, default=0)
+    max_feedback_id = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    matched = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    locked_at = Column(DateTime(timezone=True))
+
+class InferenceCacheEntry(Base):
+    __tablename__ = "inference_cache"
+
+    key = Column(String(64), primary_key=True)
+    kind = Column(String)
+    value = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SentimentRollup(Base):
+    """Contagens e somas de score por período, sentimento e dimensão (geral, produto ou rótulo)"""
+    __tablename__ = "sentiment_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String, nullable=False)  # "day" ou "week"
+    bucket_start = Column(Date, nullable=False)
+    dimension = Column(String, nullable=False)  # "all", "product" ou "label"
+    dimension_key = Column(String, nullable=False, default="")
+    sentiment_label = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "period", "bucket_start", "dimension", "dimension_key", "sentiment_label",
+            name="uq_sentiment_rollups_bucket"
+        ),
+    )
\ No newline at end of file
@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+import logging
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "week")
+UPSERT_CHUNK_SIZE = 500
+
+
+class RollupEntry(NamedTuple):
+    created_at: Optional[datetime]
+    sentiment_label: str
+    score: float
+    product_id: Optional[str]
+    labels: Tuple[str, ...] = ()
+
+
+def bucket_start(value: Optional[datetime], period: str) -> date:
+    """Dia (UTC) do registro ou a segunda-feira da semana correspondente"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    day = value.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _accumulate(deltas: dict, entry: RollupEntry, dimensions: Iterable[Tuple[str, str]]):
+    for period in PERIODS:
+        bucket = bucket_start(entry.created_at, period)
+        for dimension, key in dimensions:
+            totals = deltas[(period, bucket, dimension, key or "", entry.sentiment_label)]
+            totals[0] += 1
+            totals[1] += entry.score or 0.0
+
+
+def _upsert(db: Session, deltas: dict):
+    if not deltas:
+        return
+    table = models.SentimentRollup.__table__
+    # Ordem estável evita deadlocks entre transações que atualizam os mesmos buckets
+    rows = [
+        {
+            "period": period, "bucket_start": bucket, "dimension": dimension,
+            "dimension_key": key, "sentiment_label": sentiment,
+            "count": totals[0], "score_sum": totals[1]
+        }
+        for (period, bucket, dimension, key, sentiment), totals in sorted(deltas.items())
+    ]
+
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        # Lotes limitados para respeitar o máximo de parâmetros por instrução
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = dialect_insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=["period", "bucket_start", "dimension", "dimension_key", "sentiment_label"],
+                set_={
+                    "count": table.c.count + statement.excluded.count,
+                    "score_sum": table.c.score_sum + statement.excluded.score_sum
+                }
+            )
+            db.execute(statement)
+        return
+
+    for row in rows:
+        existing = db.scalars(select(models.SentimentRollup).filter_by(
+            period=row["period"], bucket_start=row["bucket_start"], dimension=row["dimension"],
+            dimension_key=row["dimension_key"], sentiment_label=row["sentiment_label"]
+        )).first()
+        if existing:
+            existing.count += row["count"]
+            existing.score_sum += row["score_sum"]
+        else:
+            db.add(models.SentimentRollup(**row))
+
+
+def record(db: Session, entries: Iterable[RollupEntry]):
+    """Incrementa os rollups com feedbacks recém-analisados (sem commit)"""
+    deltas = defaultdict(lambda: [0, 0.0])
+    for entry in entries:
+        dimensions = [("all", ""), ("product", entry.product_id)]
+        dimensions += [("label", label) for label in entry.labels]
+        _accumulate(deltas, entry, dimensions)
+    _upsert(db, deltas)
+
+
+def record_labels(db: Session, entries: Iterable[RollupEntry]):
+    """Incrementa apenas a dimensão de rótulos (rótulos adicionados depois da ingestão)"""
+    deltas = defaultdict(lambda: [0, 0.0])
+    for entry in entries:
+        _accumulate(deltas, entry, [("label", label) for label in entry.labels])
+    _upsert(db, deltas)
+
+
+def rebuild(db: Session, chunk_size: int = 5000) -> int:
+    """Recalcula todos os rollups a partir das tabelas de origem (backfill)"""
+    db.execute(delete(models.SentimentRollup))
+    deltas = defaultdict(lambda: [0, 0.0])
+    done = models.Feedback.enrichment_status == models.ENRICHMENT_DONE
+
+    feedback_rows = db.execute(
+        select(
+            models.Feedback.created_at, models.Feedback.sentiment_label,
+            models.Feedback.sentiment_score, models.Purchase.product_id
+        )
+        .outerjoin(models.Purchase, models.Purchase.id == models.Feedback.purchase_id)
+        .where(done)
+        .execution_options(yield_per=chunk_size)
+    )
+    processed = 0
+    for created_at, sentiment, score, product_id in feedback_rows:
+        entry = RollupEntry(created_at, sentiment, score, product_id)
+        _accumulate(deltas, entry, [("all", ""), ("product", product_id)])
+        processed += 1
+
+    label_rows = db.execute(
+        select(
+            models.Feedback.created_at, models.Feedback.sentiment_label,
+            models.Feedback.sentiment_score, models.Label.name
+        )
+        .join(models.FeedbackLabel, models.FeedbackLabel.feedback_id == models.Feedback.id)
+        .join(models.Label, models.Label.id == models.FeedbackLabel.label_id)
+        .where(done)
+        .execution_options(yield_per=chunk_size)
+    )
+    for created_at, sentiment, score, label in label_rows:
+        _accumulate(deltas, RollupEntry(created_at, sentiment, score, None), [("label", label)])
+
+    _upsert(db, deltas)
+    db.commit()
+    logger.info(f"Rollups recalculados a partir de {processed} feedbacks ({len(deltas)} buckets)")
+    return processed
+
+
+def query(db: Session, period: str, dimension: str, start_date: Optional[date] = None,
+          end_date: Optional[date] = None, sentiment_label: Optional[str] = None,
+          group_by: Iterable[str] = ()) -> List[dict]:
+    """Soma count/score_sum dos rollups agrupando pelas colunas pedidas"""
+    table = models.SentimentRollup
+    columns = [getattr(table, name) for name in group_by]
+    statement = (
+        select(*columns, func.sum(table.count), func.sum(table.score_sum))
+        .where(table.period == period, table.dimension == dimension)
+        .group_by(*columns)
+        .order_by(*columns)
+    )
+    if start_date:
+        statement = statement.where(table.bucket_start >= bucket_start(datetime.combine(start_date, datetime.min.time()), period))
+    if end_date:
+        statement = statement.where(table.bucket_start <= end_date)
+    if sentiment_label:
+        statement = statement.where(table.sentiment_label == sentiment_label)
+
+    results = []
+    for row in db.execute(statement):
+        *keys, count, score_sum = row
+        count = int(count or 0)
+        results.append({
+            **dict(zip(group_by, keys)),
+            "count": count,
+            "score_avg": (score_sum or 0.0) / count if count else None
+        })
+    return results
@@ -1,80 +1,393 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-from app.ai_processing import FeedbackAnalyzer
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timezone
+import asyncio
+import json
+from app.ai_processing import compute_polarity, map_sentiment_label
+from app.inference import require_analyzer, run_inference
+from app.label_registry import label_registry
+from app.vector_index import decode_embedding, embedding_blobs, vector_index
+from app import config, crud, export, metrics, rollups, search
 import app.models as models
 import app.schemas as schemas
-from app.database import get_db
+from app.database import get_async_db
 
 router = APIRouter(prefix="/feedbacks", tags=["feedbacks"])
-analyzer = FeedbackAnalyzer()
+
+async def _load_feedback(db: AsyncSession, feedback_id: int) -> Optional[models.Feedback]:
+    # Labels are loaded eagerly: lazy loads are not allowed on an AsyncSession
+    result = await db.execute(
+        select(models.Feedback)
+        .options(
+            selectinload(models.Feedback.labels)
+            .selectinload(models.FeedbackLabel.label)
+        )
+        .where(models.Feedback.id == feedback_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
 
 @router.post("/", response_model=schemas.Feedback)
-def create_feedback(feedback: schemas.FeedbackCreate, db: Session = Depends(get_db)):
+async def create_feedback(
+    feedback: schemas.FeedbackCreate,
+    response: Response,
+    background: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     # Check if purchase exists
-    db_purchase = db.query(models.Purchase).filter(models.Purchase.id == feedback.purchase_id).first()
+    with metrics.stage("create_feedback", "purchase_lookup"):
+        db_purchase = await db.get(models.Purchase, feedback.purchase_id)
     if not db_purchase:
         raise HTTPException(status_code=404, detail="Purchase not found")
-    
-    # Analyze sentiment
-    sentiment = analyzer.analyze_sentiment(feedback.comment)
-    
-    # Map sentiment to label
-    if sentiment["label"] in ["positive", "pos"]:
-        sentiment["label"] = "Positivo"
-    elif sentiment["label"] in ["negative", "neg"]:
-        sentiment["label"] = "Negativo"
-    else:
-        sentiment["label"] = "Neutro"
-    
+
+    if background is None:
+        background = config.ENRICHMENT_MODE == "async"
+
+    if background:
+        # Store right away and let the enrichment workers fill in sentiment and labels
+        with metrics.stage("create_feedback", "enqueue"):
+            db_feedback = models.Feedback(purchase_id=feedback.purchase_id, comment=feedback.comment)
+            db.add(db_feedback)
+            await db.flush()
+            crud.enqueue_enrichment(db, db_feedback)
+            await db.commit()
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await _load_feedback(db, db_feedback.id)
+
+    analyzer = require_analyzer()
+
+    # Get existing labels, then release the connection while the models run
+    with metrics.stage("create_feedback", "label_candidates"):
+        existing_labels = await db.run_sync(label_registry.candidates)
+        await db.commit()
+
+    # Analyze sentiment and generate labels on the inference executor
+    with metrics.stage("create_feedback", "sentiment"):
+        sentiment = await run_inference(analyzer.analyze_sentiment, feedback.comment)
+    with metrics.stage("create_feedback", "labeling"):
+        generated_labels = await run_inference(analyzer.generate_labels, feedback.comment, existing_labels)
+    with metrics.stage("create_feedback", "embedding"):
+        embeddings = await run_inference(analyzer.embed_batch, [feedback.comment])
+
     # Create feedback
-    db_feedback = models.Feedback(
-        purchase_id=feedback.purchase_id,
-        comment=feedback.comment,
-        sentiment_score=sentiment["score"],
-        sentiment_label=sentiment["label"]
-    )
-    db.add(db_feedback)
-    db.commit()
-    db.refresh(db_feedback)
-    
-    # Get existing labels
-    existing_labels = [label.name for label in db.query(models.Label).all()]
-    
-    # Generate and assign labels
-    generated_labels = analyzer.generate_labels(feedback.comment, existing_labels)
-    
-    for label_name in generated_labels:
-        # Check if label exists
-        db_label = db.query(models.Label).filter(models.Label.name == label_name).first()
-        
-        # If not, create it
-        if not db_label:
-            db_label = models.Label(name=label_name, description=f"Automatically generated for: {feedback.comment[:50]}...")
-            db.add(db_label)
-            db.commit()
-            db.refresh(db_label)
-        
-        # Link label to feedback
-        db_feedback_label = models.FeedbackLabel(
-            feedback_id=db_feedback.id,
-            label_id=db_label.id
+    with metrics.stage("create_feedback", "insert"):
+        db_feedback = models.Feedback(
+            purchase_id=feedback.purchase_id,
+            comment=feedback.comment
         )
-        db.add(db_feedback_label)
-    
-    db.commit()
-    return db_feedback
+        db.add(db_feedback)
+        await db.flush()
 
-@router.get("/", response_model=List[schemas.Feedback])
-def read_feedbacks(skip: int = 0, limit: int = 200, db: Session = Depends(get_db)):
-    feedbacks = (
-        db.query(models.Feedback)
-        .options(
-            joinedload(models.Feedback.labels)
-            .joinedload(models.FeedbackLabel.label)
+    def store_analysis(session: Session):
+        with metrics.stage("create_feedback", "label_lookup"):
+            crud.save_analysis(session, db_feedback, sentiment, generated_labels, embedding_blobs(embeddings, 1)[0])
+        with metrics.stage("create_feedback", "rollups"):
+            rollups.record(session, [rollups.RollupEntry(
+                None, db_feedback.sentiment_label, db_feedback.sentiment_score,
+                db_purchase.product_id, tuple(generated_labels)
+            )])
+
+    await db.run_sync(store_analysis)
+    with metrics.stage("create_feedback", "commit"):
+        await db.commit()
+    vector_index.add([db_feedback.id], embeddings)
+    with metrics.stage("create_feedback", "load_response"):
+        return await _load_feedback(db, db_feedback.id)
+
+def _parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """Aceita um array JSON ou NDJSON (um objeto por linha)"""
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    try:
+        if "ndjson" in content_type or not text.startswith("["):
+            return [json.loads(line) for line in text.splitlines() if line.strip()]
+        payload = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    return payload
+
+def _analyze_chunk(analyzer, comments: List[str], existing_labels: List[str]):
+    """Inferência de um bloco do bulk (roda no executor de inferência)"""
+    with metrics.stage("bulk", "sentiment"):
+        sentiments = analyzer.analyze_sentiment_batch(comments)
+    with metrics.stage("bulk", "labeling"):
+        generated = analyzer.generate_labels_batch(comments, existing_labels)
+    with metrics.stage("bulk", "polarity"):
+        polarities = compute_polarity(comments)
+    with metrics.stage("bulk", "embedding"):
+        embeddings = analyzer.embed_batch(comments)
+    return sentiments, generated, polarities, embeddings
+
+def _store_chunk(db: Session, chunk, products: Dict[int, str], sentiments, generated, polarities, embeddings) -> List[int]:
+    embedded_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "purchase_id": item.purchase_id,
+            "comment": item.comment,
+            "sentiment_score": sentiment["score"],
+            "sentiment_label": map_sentiment_label(sentiment["label"]),
+            "sentiment_tier": sentiment.get("tier"),
+            "secondary_polarity": polarity,
+            "embedding": blob,
+            "embedded_at": embedded_at if blob is not None else None
+        }
+        for (_, item), sentiment, polarity, blob in zip(
+            chunk, sentiments, polarities, embedding_blobs(embeddings, len(chunk))
         )
-        .offset(skip)
-        .limit(limit)
-        .all()
+    ]
+    with metrics.stage("bulk", "insert"):
+        feedback_ids = crud.bulk_insert_feedbacks(db, rows)
+
+    with metrics.stage("bulk", "label_lookup"):
+        label_ids = label_registry.get_or_create(db, {name for names in generated for name in names})
+    with metrics.stage("bulk", "insert_labels"):
+        crud.bulk_insert_feedback_labels(db, [
+            {"feedback_id": feedback_id, "label_id": label_ids[name]}
+            for feedback_id, names in zip(feedback_ids, generated)
+            for name in names
+        ])
+
+    with metrics.stage("bulk", "rollups"):
+        rollups.record(db, [
+            rollups.RollupEntry(None, row["sentiment_label"], row["sentiment_score"], products[row["purchase_id"]], tuple(names))
+            for row, names in zip(rows, generated)
+        ])
+    return feedback_ids
+
+async def _ingest_bulk(payload: List[Any], db: AsyncSession, analyzer) -> schemas.FeedbackBulkResult:
+    items = [schemas.FeedbackBulkItemResult(index=index) for index in range(len(payload))]
+
+    # Validate every item, keeping per-item errors
+    valid = []
+    for index, raw in enumerate(payload):
+        try:
+            if not isinstance(raw, dict):
+                raise ValueError("Item must be a JSON object")
+            valid.append((index, schemas.FeedbackCreate(**raw)))
+        except (ValueError, TypeError) as e:
+            items[index].error = str(e)
+
+    # Check all purchases with a single query
+    with metrics.stage("bulk", "purchase_lookup"):
+        products = await db.run_sync(crud.get_purchase_products, [item.purchase_id for _, item in valid])
+    accepted = []
+    for index, item in valid:
+        if item.purchase_id in products:
+            accepted.append((index, item))
+        else:
+            items[index].error = "Purchase not found"
+
+    with metrics.stage("bulk", "label_candidates"):
+        existing_labels = await db.run_sync(label_registry.candidates)
+
+    indexed = []
+    for start in range(0, len(accepted), config.BULK_CHUNK_SIZE):
+        chunk = accepted[start:start + config.BULK_CHUNK_SIZE]
+        comments = [item.comment for _, item in chunk]
+
+        # Inference is blocking, keep it on the inference executor
+        sentiments, generated, polarities, embeddings = await run_inference(
+            _analyze_chunk, analyzer, comments, existing_labels
+        )
+        feedback_ids = await db.run_sync(
+            _store_chunk, chunk, products, sentiments, generated, polarities, embeddings
+        )
+        indexed.append((feedback_ids, embeddings))
+
+        for (index, _), feedback_id in zip(chunk, feedback_ids):
+            items[index].id = feedback_id
+
+    with metrics.stage("bulk", "commit"):
+        await db.commit()
+    for feedback_ids, embeddings in indexed:
+        vector_index.add(feedback_ids, embeddings)
+
+    created = sum(1 for item in items if item.id is not None)
+    return schemas.FeedbackBulkResult(created=created, failed=len(items) - created, items=items)
+
+@router.post("/bulk", response_model=schemas.FeedbackBulkResult)
+async def create_feedbacks_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    analyzer = Depends(require_analyzer)
+):
+    payload = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    return await _ingest_bulk(payload, db, analyzer)
+
+def feedback_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sentiment_label: Optional[str] = None,
+    labels: Optional[List[str]] = Query(None),
+    purchase_id: Optional[int] = None,
+    product_id: Optional[str] = None,
+    enrichment_status: Optional[str] = None
+) -> schemas.FeedbackFilters:
+    return schemas.FeedbackFilters(
+        start_date=start_date,
+        end_date=end_date,
+        sentiment_label=sentiment_label,
+        labels=labels,
+        purchase_id=purchase_id,
+        product_id=product_id,
+        enrichment_status=enrichment_status
+    )
+
+@router.get("/", response_model=List[schemas.Feedback])
+async def read_feedbacks(
+    response: Response,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(200, ge=1, le=1000),
+    filters: schemas.FeedbackFilters = Depends(feedback_filters),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Keyset pagination on (created_at, id), or on (updated_at, id) for incremental
+    # syncs with `since`; the next page cursor goes in X-Next-Cursor
+    sort_column = models.Feedback.updated_at if since else models.Feedback.created_at
+    query = (
+        select(models.Feedback)
+        .where(*crud.feedback_filter_clauses(filters))
+        .order_by(sort_column, models.Feedback.id)
     )
-    return feedbacks
\ No newline at end of file
+    if since:
+        query = query.where(models.Feedback.updated_at >= since)
+    if cursor:
+        try:
+            query = query.where(crud.keyset_clause(sort_column, models.Feedback.id, cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif skip:
+        query = query.offset(skip)
+
+    with metrics.stage("list_feedbacks", "query"):
+        feedbacks = (await db.scalars(
+            query
+            .options(
+                selectinload(models.Feedback.labels)
+                .selectinload(models.FeedbackLabel.label)
+            )
+            .limit(limit)
+        )).all()
+    if len(feedbacks) == limit:
+        last = feedbacks[-1]
+        response.headers["X-Next-Cursor"] = crud.encode_cursor(getattr(last, sort_column.key), last.id)
+    return feedbacks
+
+@router.get("/export")
+def export_feedbacks(
+    format: str = "ndjson",
+    filters: schemas.FeedbackFilters = Depends(feedback_filters)
+):
+    # Rows are streamed from a server-side cursor, memory stays flat regardless of table size
+    if format not in export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(export.EXPORT_FORMATS)}")
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        export.stream_export(format, filters),
+        media_type=export.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="feedbacks.{extension}"'}
+    )
+
+@router.get("/search", response_model=List[schemas.FeedbackSearchResult])
+async def search_feedbacks(
+    q: str = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    filters: schemas.FeedbackFilters = Depends(feedback_filters),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Ranked full-text search (tsvector/GIN on Postgres, FTS5 on SQLite), combinable with the list filters
+    statement = search.search_statement(db.bind.dialect.name, q, crud.feedback_filter_clauses(filters))
+    with metrics.stage("search_feedbacks", "query"):
+        rows = (await db.execute(
+            statement
+            .options(
+                selectinload(models.Feedback.labels)
+                .selectinload(models.FeedbackLabel.label)
+            )
+            .offset(skip)
+            .limit(limit)
+        )).all()
+    return [
+        schemas.FeedbackSearchResult(
+            **schemas.Feedback.model_validate(feedback).model_dump(), rank=rank or 0.0,
+            snippet=search.highlight_html(snippet)
+        )
+        for feedback, rank, snippet in rows
+    ]
+
+async def _similar_feedbacks(db: AsyncSession, vector, k: int, exclude: Optional[int] = None) -> List[schemas.SimilarFeedback]:
+    # Picks up vectors written by other processes, then scans off the event loop
+    await db.run_sync(vector_index.refresh)
+    with metrics.stage("similar_feedbacks", "search"):
+        hits = await asyncio.to_thread(vector_index.search, vector, k, exclude)
+    with metrics.stage("similar_feedbacks", "load"):
+        feedbacks = {
+            feedback.id: feedback
+            for feedback in (await db.scalars(
+                select(models.Feedback)
+                .options(
+                    selectinload(models.Feedback.labels)
+                    .selectinload(models.FeedbackLabel.label)
+                )
+                .where(models.Feedback.id.in_([feedback_id for feedback_id, _ in hits]))
+            )).all()
+        }
+    return [
+        schemas.SimilarFeedback(
+            **schemas.Feedback.model_validate(feedbacks[feedback_id]).model_dump(), similarity=similarity
+        )
+        for feedback_id, similarity in hits if feedback_id in feedbacks
+    ]
+
+async def _embed(analyzer, text: str):
+    vectors = await run_inference(analyzer.embed_batch, [text])
+    if vectors is None:
+        raise HTTPException(status_code=503, detail="Embedding model is not available")
+    return vectors[0]
+
+@router.post("/similar", response_model=List[schemas.SimilarFeedback])
+async def search_similar_feedbacks(
+    query: schemas.SimilarFeedbackQuery,
+    db: AsyncSession = Depends(get_async_db),
+    analyzer = Depends(require_analyzer)
+):
+    return await _similar_feedbacks(db, await _embed(analyzer, query.text), query.k)
+
+@router.get("/enrichment", response_model=schemas.EnrichmentStatus)
+async def read_enrichment_status(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(crud.enrichment_status_counts)
+
+@router.get("/{feedback_id}", response_model=schemas.Feedback)
+async def read_feedback(feedback_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_feedback = await _load_feedback(db, feedback_id)
+    if not db_feedback:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    return db_feedback
+
+@router.get("/{feedback_id}/similar", response_model=List[schemas.SimilarFeedback])
+async def read_similar_feedbacks(
+    feedback_id: int,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    row = (await db.execute(
+        select(models.Feedback.comment, models.Feedback.embedding).where(models.Feedback.id == feedback_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    # Feedback without a stored vector yet (pending enrichment or not backfilled) is embedded on the fly
+    if row.embedding is not None:
+        vector = decode_embedding(row.embedding)
+    else:
+        vector = await _embed(require_analyzer(), row.comment or "")
+    return await _similar_feedbacks(db, vector, k, exclude=feedback_id)
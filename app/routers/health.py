@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response, status
+import app.schemas as schemas
+from app import inference
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/live")
+def live():
+    return {"status": "ok"}
+
+@router.get("/ready", response_model=schemas.Readiness)
+def ready(response: Response):
+    state = inference.readiness()
+    if not state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state
@@ -1,21 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app import label_backfill
 import app.models as models
 import app.schemas as schemas
-from app.database import get_db
+from app.database import get_async_db
+from app.label_registry import label_registry
 
 router = APIRouter(prefix="/labels", tags=["labels"])
 
+async def _create_backfill(db: AsyncSession, label_ids: List[int]) -> dict:
+    job = await db.run_sync(label_backfill.create_job, label_ids)
+    await db.commit()
+    return label_backfill.describe(job)
+
 @router.post("/", response_model=schemas.Label)
-def create_purchase(label: schemas.LabelCreate, db: Session = Depends(get_db)):
+async def create_purchase(
+    label: schemas.LabelCreate,
+    backfill: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
     db_label = models.Label(**label.dict())
     db.add(db_label)
-    db.commit()
-    db.refresh(db_label)
+    await db.commit()
+    await db.refresh(db_label)
+    label_registry.invalidate()
+    # New feedback already gets the label; backfill=true also applies it to existing feedback
+    if backfill:
+        await _create_backfill(db, [db_label.id])
     return db_label
 
 @router.get("/", response_model=List[schemas.Label])
-def read_labels(skip: int = 0, limit: int = 200, db: Session = Depends(get_db)):
-    labels = db.query(models.Label).offset(skip).limit(limit).all()
-    return labels
\ No newline at end of file
+async def read_labels(skip: int = 0, limit: int = 200, db: AsyncSession = Depends(get_async_db)):
+    labels = (await db.scalars(select(models.Label).offset(skip).limit(limit))).all()
+    return labels
+
+@router.post("/{label_id}/backfill", response_model=schemas.LabelBackfillJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_label_backfill(label_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Scores only this label against existing feedback; returns the active job if one exists
+    if not await db.get(models.Label, label_id):
+        raise HTTPException(status_code=404, detail="Label not found")
+    return await _create_backfill(db, [label_id])
+
+@router.get("/backfill/{job_id}", response_model=schemas.LabelBackfillJob)
+async def read_label_backfill(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(models.LabelBackfillJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return label_backfill.describe(job)
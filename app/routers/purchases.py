@@ -1,21 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 import app.models as models
 import app.schemas as schemas
-from app.database import get_db
+from app import crud
+from app.database import get_async_db
 
 router = APIRouter(prefix="/purchases", tags=["purchases"])
 
 @router.post("/", response_model=schemas.Purchase)
-def create_purchase(purchase: schemas.PurchaseCreate, db: Session = Depends(get_db)):
+async def create_purchase(purchase: schemas.PurchaseCreate, db: AsyncSession = Depends(get_async_db)):
     db_purchase = models.Purchase(**purchase.dict())
     db.add(db_purchase)
-    db.commit()
-    db.refresh(db_purchase)
+    await db.commit()
+    await db.refresh(db_purchase)
     return db_purchase
 
 @router.get("/", response_model=List[schemas.Purchase])
-def read_purchases(skip: int = 0, limit: int = 200, db: Session = Depends(get_db)):
-    purchases = db.query(models.Purchase).offset(skip).limit(limit).all()
-    return purchases
\ No newline at end of file
+async def read_purchases(
+    response: Response,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Same cursor contract as GET /feedbacks/: (updated_at, id) order, next page in X-Next-Cursor
+    query = select(models.Purchase).order_by(models.Purchase.updated_at, models.Purchase.id)
+    if since:
+        query = query.where(models.Purchase.updated_at >= since)
+    if cursor:
+        try:
+            query = query.where(crud.keyset_clause(models.Purchase.updated_at, models.Purchase.id, cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif skip:
+        query = query.offset(skip)
+
+    purchases = (await db.scalars(query.limit(limit))).all()
+    if len(purchases) == limit:
+        last = purchases[-1]
+        response.headers["X-Next-Cursor"] = crud.encode_cursor(last.updated_at, last.id)
+    return purchases
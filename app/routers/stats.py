@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+import app.models as models
+import app.schemas as schemas
+from app import rollups
+from app.database import get_db
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+# Todos os endpoints leem apenas a tabela sentiment_rollups, mantida na ingestão
+
+def _combine(rows: List[dict]) -> dict:
+    count = sum(row["count"] for row in rows)
+    score_sum = sum(row["score_avg"] * row["count"] for row in rows if row["score_avg"] is not None)
+    return {"count": count, "score_avg": score_sum / count if count else None}
+
+@router.get("/summary", response_model=schemas.StatsSummary)
+def read_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    rows = rollups.query(db, "day", "all", start_date, end_date, group_by=["sentiment_label"])
+    total = _combine(rows)
+    return {
+        "total": total["count"],
+        "score_avg": total["score_avg"],
+        "by_sentiment": {
+            row["sentiment_label"]: {
+                "count": row["count"],
+                "share": row["count"] / total["count"] if total["count"] else 0.0,
+                "score_avg": row["score_avg"]
+            }
+            for row in rows
+        }
+    }
+
+@router.get("/timeseries", response_model=List[schemas.StatsBucket])
+def read_timeseries(
+    period: str = "week",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sentiment_label: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    if period not in rollups.PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of: {', '.join(rollups.PERIODS)}")
+    return rollups.query(db, period, "all", start_date, end_date, sentiment_label, group_by=["bucket_start"])
+
+@router.get("/products", response_model=List[schemas.ProductStats])
+def read_product_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sentiment_label: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    rows = rollups.query(
+        db, "day", "product", start_date, end_date, sentiment_label,
+        group_by=["dimension_key", "sentiment_label"]
+    )
+    products = {}
+    for row in rows:
+        products.setdefault(row["dimension_key"], []).append(row)
+
+    names = dict(db.execute(
+        select(models.Purchase.product_id, models.Purchase.product_name)
+        .where(models.Purchase.product_id.in_(list(products)))
+        .distinct()
+    ).all())
+
+    return [
+        {
+            "product_id": product_id,
+            "product_name": names.get(product_id),
+            **_combine(product_rows),
+            "by_sentiment": {row["sentiment_label"]: row["count"] for row in product_rows}
+        }
+        for product_id, product_rows in products.items()
+    ]
+
+@router.get("/labels", response_model=List[schemas.LabelStats])
+def read_label_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sentiment_label: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    rows = rollups.query(db, "day", "label", start_date, end_date, sentiment_label, group_by=["dimension_key"])
+    stats = [{"label": row["dimension_key"], "count": row["count"], "score_avg": row["score_avg"]} for row in rows]
+    return sorted(stats, key=lambda row: row["count"], reverse=True)
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 
 class PurchaseBase(BaseModel):
     customer_id: str
@@ -14,6 +14,7 @@ class PurchaseCreate(PurchaseBase):
 class Purchase(PurchaseBase):
     id: int
     purchase_date: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         orm_mode = True
@@ -33,6 +34,21 @@ class Label(LabelBase):
         orm_mode = True
         from_attributes = True  # Novo no Pydantic v2
 
+class LabelBackfillJob(BaseModel):
+    id: int
+    label_ids: List[int]
+    status: str
+    total: int = 0
+    processed: int = 0
+    matched: int = 0
+    progress: float = 0.0  # fração dos feedbacks existentes já processada
+    rate: Optional[float] = None  # feedbacks/s desde o início
+    last_feedback_id: int = 0
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 class FeedbackLabelBase(BaseModel):
     pass
 
@@ -53,11 +69,98 @@ class FeedbackCreate(FeedbackBase):
 
 class Feedback(FeedbackBase):
     id: int
-    sentiment_score: float
-    sentiment_label: str
+    sentiment_score: Optional[float] = None
+    sentiment_label: Optional[str] = None
+    sentiment_tier: Optional[str] = None
+    secondary_polarity: Optional[float] = None
+    enrichment_status: str = "done"
     created_at: datetime
+    updated_at: Optional[datetime] = None
     labels: List[FeedbackLabel] = Field(default_factory=list)  # Usamos FeedbackLabel aqui
     
     class Config:
         orm_mode = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FeedbackSearchResult(Feedback):
+    rank: float  # relevância (maior = mais relevante)
+    snippet: Optional[str] = None  # trecho com os termos entre <b></b>
+
+class SimilarFeedback(Feedback):
+    similarity: float  # cosseno entre os embeddings (1 = idêntico)
+
+class SimilarFeedbackQuery(BaseModel):
+    text: str = Field(..., min_length=1)
+    k: int = Field(10, ge=1, le=100)
+
+class FeedbackBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class FeedbackBulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[FeedbackBulkItemResult]
+
+class EnrichmentStatus(BaseModel):
+    pending: int = 0
+    processing: int = 0
+    done: int = 0
+    failed: int = 0
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    persistent_hits: int
+    coalesced: int
+    evictions: int
+    hit_rate: float
+
+class ModelStatus(BaseModel):
+    status: str
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class Readiness(BaseModel):
+    ready: bool
+    models: Dict[str, ModelStatus]
+
+class FeedbackFilters(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    sentiment_label: Optional[str] = None
+    labels: Optional[List[str]] = None
+    purchase_id: Optional[int] = None
+    product_id: Optional[str] = None
+    enrichment_status: Optional[str] = None
+
+class SentimentBreakdown(BaseModel):
+    count: int
+    share: float
+    score_avg: Optional[float] = None
+
+class StatsSummary(BaseModel):
+    total: int
+    score_avg: Optional[float] = None
+    by_sentiment: Dict[str, SentimentBreakdown]
+
+class StatsBucket(BaseModel):
+    bucket_start: date
+    count: int
+    score_avg: Optional[float] = None
+
+class ProductStats(BaseModel):
+    product_id: str
+    product_name: Optional[str] = None
+    count: int
+    score_avg: Optional[float] = None
+    by_sentiment: Dict[str, int]
+
+class LabelStats(BaseModel):
+    label: str
+    count: int
+    score_avg: Optional[float] = None
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Busca textual nos comentários dos feedbacks
+
+PostgreSQL: coluna gerada `feedbacks.search_vector` (tsvector, configuração
+'portuguese') com índice GIN. SQLite: tabela FTS5 `feedbacks_fts` mantida por
+triggers. Ambos criados na migração 0005, fora do modelo ORM por serem
+específicos de cada banco.
+"""
+from typing import Optional
+import html
+import re
+
+from sqlalchemy import Float, Integer, String, and_, func, literal, literal_column, select, text
+
+import app.models as models
+
+# Precisa ser a mesma configuração da coluna gerada na migração
+SEARCH_CONFIG = "portuguese"
+# O banco marca os termos com caracteres de uso privado; o comentário é escapado
+# e só então os marcadores viram <b></b> (ver highlight_html)
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+SNIPPET_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=30, MinWords=10, MaxFragments=2"
+)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_query(q: str) -> str:
+    """Termos entre aspas com prefixo (*): evita erros de sintaxe do MATCH e cobre plurais/flexões"""
+    return " ".join(f'"{term}"*' for term in _TERM.findall(q))
+
+
+def ranked_matches(dialect: str, q: str):
+    """(subconsulta feedback_id/rank, expressão do trecho destacado); maior rank = mais relevante"""
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        vector = literal_column("feedbacks.search_vector")
+        matches = (
+            select(models.Feedback.id.label("feedback_id"), func.ts_rank_cd(vector, query).label("rank"))
+            .where(vector.op("@@")(query))
+            .subquery("matches")
+        )
+        # ts_headline só é calculado para as linhas da página (depois do ORDER BY/LIMIT)
+        return matches, func.ts_headline(SEARCH_CONFIG, models.Feedback.comment, query, SNIPPET_OPTIONS)
+
+    if dialect == "sqlite":
+        # bm25 (coluna rank do FTS5) é menor para os mais relevantes
+        matches = (
+            text(
+                "SELECT rowid AS feedback_id, -rank AS rank, "
+                "snippet(feedbacks_fts, 0, :start, :stop, '…', 16) AS snippet "
+                "FROM feedbacks_fts WHERE feedbacks_fts MATCH :query"
+            )
+            .bindparams(query=fts5_query(q) or '""', start=HIGHLIGHT_START, stop=HIGHLIGHT_STOP)
+            .columns(feedback_id=Integer, rank=Float, snippet=String)
+            .subquery("matches")
+        )
+        return matches, matches.c.snippet
+
+    # Outros bancos: LIKE em todos os termos, sem índice nem ranking
+    terms = _TERM.findall(q) or [q]
+    matches = (
+        select(models.Feedback.id.label("feedback_id"), literal(1.0).label("rank"))
+        .where(and_(*[models.Feedback.comment.ilike(f"%{term}%") for term in terms]))
+        .subquery("matches")
+    )
+    return matches, models.Feedback.comment
+
+
+def highlight_html(snippet: Optional[str]) -> Optional[str]:
+    """Trecho com o HTML do comentário escapado e apenas os termos encontrados entre <b></b>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(HIGHLIGHT_START, "<b>").replace(HIGHLIGHT_STOP, "</b>")
+
+
+def search_statement(dialect: str, q: str, clauses: list):
+    """SELECT (Feedback, rank, snippet) ordenado por relevância, com os filtros da listagem"""
+    matches, snippet = ranked_matches(dialect, q)
+    return (
+        select(models.Feedback, matches.c.rank, snippet.label("snippet"))
+        .join(matches, matches.c.feedback_id == models.Feedback.id)
+        .where(*clauses)
+        .order_by(matches.c.rank.desc(), models.Feedback.id.desc())
+    )
@@ -0,0 +1,81 @@
+"""Pipelines determinísticos que imitam a saída dos modelos (INFERENCE_BACKEND=stub)
+
+Usados em benchmarks e testes de carga sem baixar nem executar os modelos: o
+resultado depende apenas do texto, e STUB_MODEL_LATENCY_MS simula o custo por item.
+"""
+from typing import List
+import hashlib
+import time
+import unicodedata
+
+from app import config
+
+POSITIVE_WORDS = ("adorei", "excelente", "perfeit", "recomendo", "otim", "impecavel", "satisfeit", "incrivel", "super")
+NEGATIVE_WORDS = ("pessim", "defeito", "horrivel", "atras", "quebr", "nunca", "decepcion", "errad", "enganos", "pior")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _unit(*parts: str) -> float:
+    """Número estável em [0, 1) derivado do texto"""
+    digest = hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def _simulate_cost(items: int):
+    if config.STUB_MODEL_LATENCY_MS > 0:
+        time.sleep(config.STUB_MODEL_LATENCY_MS * items / 1000)
+
+
+class StubSentimentPipeline:
+    def __call__(self, texts: List[str], batch_size: int = 1, **kwargs) -> List[dict]:
+        _simulate_cost(len(texts))
+        results = []
+        for text in texts:
+            folded = _fold(text)
+            balance = sum(word in folded for word in POSITIVE_WORDS) - sum(word in folded for word in NEGATIVE_WORDS)
+            label = "positive" if balance > 0 else "negative" if balance < 0 else "neutral"
+            results.append({"label": label, "score": 0.5 + 0.49 * _unit("sentiment", folded)})
+        return results
+
+
+class StubZeroShotPipeline:
+    def __call__(self, texts: List[str], candidate_labels: List[str], multi_label: bool = True,
+                 batch_size: int = 1, **kwargs) -> List[dict]:
+        _simulate_cost(len(texts))
+        results = []
+        for text in texts:
+            folded = _fold(text)
+            # Rótulo citado no texto vence; os demais recebem score baixo e estável
+            scores = [
+                0.9 if _fold(label).replace("_", " ") in folded else 0.6 * _unit("label", folded, label)
+                for label in candidate_labels
+            ]
+            ranked = sorted(zip(candidate_labels, scores), key=lambda pair: pair[1], reverse=True)
+            results.append({
+                "sequence": text,
+                "labels": [label for label, _ in ranked],
+                "scores": [score for _, score in ranked]
+            })
+        return results
+
+
+class StubTextEmbedder:
+    """Embeddings por hashing de palavras: textos com palavras em comum ficam próximos"""
+
+    dimension = 384
+
+    def encode(self, texts: List[str], batch_size: int = 32):
+        import numpy as np
+
+        _simulate_cost(len(texts))
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _fold(text).split():
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+                matrix[row, int.from_bytes(digest, "big") % self.dimension] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
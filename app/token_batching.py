@@ -0,0 +1,138 @@
+"""Lotes por comprimento em tokens para as chamadas aos pipelines
+
+O pipeline preenche cada item até o maior do lote; ordenar por comprimento e
+limitar os tokens preenchidos por lote (INFERENCE_TOKEN_BUDGET) evita gastar
+computação com padding e impede que um comentário enorme domine a latência.
+Textos acima de INFERENCE_MAX_TOKENS são divididos em trechos e os scores dos
+trechos são agregados de volta no texto original.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import re
+
+from app import config, metrics
+
+Span = Tuple[int, int]
+
+_WORD = re.compile(r"\S+")
+# Tokens especiais ([CLS]/[SEP], <s>/</s>) quando o tokenizer não informa
+DEFAULT_SPECIAL_TOKENS = 2
+
+
+def token_spans(tokenizer, texts: List[str]) -> List[List[Span]]:
+    """Posições (início, fim) de cada token no texto, sem os tokens especiais
+
+    Sem tokenizer rápido (backend stub) cada palavra conta como um token.
+    """
+    texts = [text or "" for text in texts]
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        encoded = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True)
+        return [[tuple(offset) for offset in offsets] for offsets in encoded["offset_mapping"]]
+    return [[match.span() for match in _WORD.finditer(text)] for text in texts]
+
+
+def special_tokens(tokenizer) -> int:
+    try:
+        return tokenizer.num_special_tokens_to_add()
+    except AttributeError:
+        return DEFAULT_SPECIAL_TOKENS
+
+
+class TokenChunks:
+    """Trechos enviados ao modelo e a qual texto original cada um pertence"""
+
+    def __init__(self, texts: List[str], tokenizer, max_tokens: int = config.INFERENCE_MAX_TOKENS,
+                 max_chunks: int = config.INFERENCE_MAX_CHUNKS, extra_tokens: int = 0):
+        self.size = len(texts)
+        self.pieces: List[str] = []
+        self.owners: List[int] = []
+        self.lengths: List[int] = []
+        # Trechos acima de max_chunks são descartados (o texto fica truncado)
+        window = max(1, max_tokens - special_tokens(tokenizer) - extra_tokens)
+        overhead = special_tokens(tokenizer) + extra_tokens
+        for index, (text, spans) in enumerate(zip(texts, token_spans(tokenizer, texts))):
+            text = text or ""
+            if len(spans) <= window:
+                self._add(text, index, len(spans) + overhead)
+                continue
+            for start in range(0, min(len(spans), window * max_chunks), window):
+                piece = spans[start:start + window]
+                self._add(text[piece[0][0]:piece[-1][1]], index, len(piece) + overhead)
+
+    def _add(self, piece: str, owner: int, length: int):
+        self.pieces.append(piece)
+        self.owners.append(owner)
+        self.lengths.append(length)
+
+    def grouped(self, results: List) -> List[List[Tuple[object, int]]]:
+        """(resultado, comprimento) de cada trecho, agrupados por texto original"""
+        groups: List[List[Tuple[object, int]]] = [[] for _ in range(self.size)]
+        for owner, result, length in zip(self.owners, results, self.lengths):
+            groups[owner].append((result, length))
+        return groups
+
+
+def plan_batches(lengths: Sequence[int], token_budget: int = config.INFERENCE_TOKEN_BUDGET,
+                 max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """Agrupa índices em ordem crescente de comprimento com itens x maior comprimento <= orçamento
+
+    Um item sozinho acima do orçamento forma o próprio lote.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Em ordem crescente o item novo é o maior do lote e define o padding
+        full = max_batch_size is not None and len(current) >= max_batch_size
+        if current and (full or (len(current) + 1) * lengths[index] > token_budget):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def run_bucketed(pipeline, model: str, chunks: TokenChunks, **kwargs) -> List:
+    """Executa o pipeline lote a lote e devolve os resultados na ordem dos trechos"""
+    results: List = [None] * len(chunks.pieces)
+    for batch in plan_batches(chunks.lengths):
+        with metrics.model_call(model, len(batch)):
+            outputs = pipeline([chunks.pieces[index] for index in batch], batch_size=len(batch), **kwargs)
+        for index, output in zip(batch, outputs):
+            results[index] = output
+    return results
+
+
+def aggregate_sentiment(groups: List[List[Tuple[dict, int]]]) -> List[dict]:
+    """Voto dos trechos ponderado pelo comprimento; o score é a média ponderada do rótulo vencedor"""
+    aggregated = []
+    for group in groups:
+        if len(group) == 1:
+            aggregated.append(group[0][0])
+            continue
+        weights: Dict[str, float] = {}
+        for result, length in group:
+            weights[result["label"]] = weights.get(result["label"], 0.0) + result["score"] * length
+        label = max(weights, key=weights.get)
+        total = sum(length for _, length in group)
+        aggregated.append({**group[0][0], "label": label, "score": weights[label] / total})
+    return aggregated
+
+
+def aggregate_labels(groups: List[List[Tuple[dict, int]]]) -> List[dict]:
+    """Multi-label: cada rótulo fica com o maior score entre os trechos"""
+    aggregated = []
+    for group in groups:
+        if len(group) == 1:
+            aggregated.append(group[0][0])
+            continue
+        best: Dict[str, float] = {}
+        for result, _ in group:
+            for label, score in zip(result["labels"], result["scores"]):
+                best[label] = max(score, best.get(label, 0.0))
+        ranked = sorted(best.items(), key=lambda pair: pair[1], reverse=True)
+        aggregated.append({
+            "sequence": group[0][0].get("sequence"),
+            "labels": [label for label, _ in ranked],
+            "scores": [score for _, score in ranked]
+        })
+    return aggregated
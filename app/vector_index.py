@@ -0,0 +1,352 @@
+"""Índice vetorial dos embeddings dos feedbacks (busca de feedbacks similares)
+
+Os vetores ficam em VECTOR_INDEX_DIR como .npy (float16 ou int8) abertos
+memory-mapped: só as páginas consultadas são lidas e os workers do uvicorn
+compartilham o cache de páginas do sistema. Até VECTOR_INDEX_ANN_THRESHOLD
+vetores a busca é exata (produto escalar em blocos); acima disso o arquivo é
+gravado ordenado por partição (IVF, k-means esférico) e a busca visita só as
+VECTOR_INDEX_NPROBE partições mais próximas. Vetores gravados depois da última
+reconstrução ficam em memória (busca exata) até a próxima
+(scripts/backfill_embeddings.py); cada processo busca os gravados pelos demais
+pela marca d'água feedbacks.embedded_at.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app import config, metrics
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+# Primeiro byte do blob em feedbacks.embedding identifica o formato
+DTYPE_HEADERS = {"float16": b"h", "int8": b"b"}
+HEADER_DTYPES = {header: dtype for dtype, header in DTYPE_HEADERS.items()}
+INT8_SCALE = 127.0
+
+META_FILE = "meta.json"
+SEARCH_CHUNK_SIZE = 65536
+REFRESH_BATCH_SIZE = 5000
+# embedded_at é atribuído antes do commit (e por relógios de hosts diferentes): cada
+# refresh relê esta janela para não perder linhas confirmadas fora de ordem
+REFRESH_OVERLAP = timedelta(seconds=120)
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_SAMPLE = 100000
+
+
+def quantize(matrix, dtype: str = config.EMBEDDING_DTYPE) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "int8":
+        # Vetores de norma 1: cada componente está em [-1, 1]
+        return np.clip(np.rint(matrix * INT8_SCALE), -127, 127).astype(np.int8)
+    return matrix.astype(np.float16)
+
+
+def dequantize(matrix: np.ndarray) -> np.ndarray:
+    if matrix.dtype == np.int8:
+        return matrix.astype(np.float32) / INT8_SCALE
+    return matrix.astype(np.float32)
+
+
+def embedding_blobs(matrix, size: int, dtype: str = config.EMBEDDING_DTYPE) -> List[Optional[bytes]]:
+    """Blobs para feedbacks.embedding (None para todos quando não há encoder)"""
+    if matrix is None:
+        return [None] * size
+    header = DTYPE_HEADERS[dtype]
+    return [header + row.tobytes() for row in quantize(matrix, dtype)]
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    dtype = HEADER_DTYPES[bytes(blob[:1])]
+    return dequantize(np.frombuffer(blob, dtype=dtype, offset=1))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) <= k:
+        return np.arange(len(scores))
+    return np.argpartition(-scores, k - 1)[:k]
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    """Partição (centróide mais similar) de cada linha, em blocos para limitar a memória"""
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), chunk_size):
+        chunk = dequantize(np.asarray(matrix[start:start + chunk_size]))
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(sample: np.ndarray, partitions: int, iterations: int = KMEANS_ITERATIONS,
+                    seed: int = 0) -> np.ndarray:
+    """k-means esférico (similaridade de cosseno) sobre uma amostra float32"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), partitions, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # Partições vazias mantêm o centróide anterior
+        empty = norms[:, 0] < 1e-12
+        sums[empty] = centroids[empty]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def _save(path: str, array: np.ndarray):
+    with open(path + ".tmp", "wb") as handle:
+        np.save(handle, array)
+    os.replace(path + ".tmp", path)
+
+
+def build_index(db: Session, directory: str = config.VECTOR_INDEX_DIR, dtype: str = config.EMBEDDING_DTYPE,
+                ann_threshold: int = config.VECTOR_INDEX_ANN_THRESHOLD, chunk_size: int = 10000) -> dict:
+    """Grava os arquivos do índice a partir de feedbacks.embedding; retorna os metadados"""
+    os.makedirs(directory, exist_ok=True)
+    has_embedding = models.Feedback.embedding.isnot(None)
+    # Lido antes das linhas: o que for gravado durante a reconstrução é buscado pelo refresh
+    embedded_until = db.scalar(select(func.max(models.Feedback.embedded_at)))
+    embedded_until = embedded_until.isoformat() if embedded_until else None
+    count = db.scalar(select(func.count()).select_from(models.Feedback).where(has_embedding)) or 0
+    first = db.scalar(select(models.Feedback.embedding).where(has_embedding).limit(1))
+    dimension = len(decode_embedding(first)) if first is not None else 0
+    if not count or not dimension:
+        _save(os.path.join(directory, "ids.npy"), np.zeros(0, dtype=np.int64))
+        return _write_meta(directory, {"count": 0, "dimension": 0, "dtype": dtype, "partitions": 0,
+                                       "max_feedback_id": 0, "embedded_until": embedded_until})
+
+    ids = np.empty(count, dtype=np.int64)
+    vectors_path = os.path.join(directory, "vectors.npy")
+    vectors = np.lib.format.open_memmap(vectors_path + ".tmp", mode="w+", dtype=quantize([[0.0]], dtype).dtype,
+                                        shape=(count, dimension))
+    rows = db.execute(
+        select(models.Feedback.id, models.Feedback.embedding)
+        .where(has_embedding)
+        .order_by(models.Feedback.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    position = 0
+    for partition in rows.partitions():
+        block = [(feedback_id, decode_embedding(blob)) for feedback_id, blob in partition]
+        # Linhas gravadas depois do COUNT ficam para a próxima reconstrução
+        block = block[:count - position]
+        if not block:
+            break
+        ids[position:position + len(block)] = [feedback_id for feedback_id, _ in block]
+        vectors[position:position + len(block)] = quantize(np.vstack([vector for _, vector in block]), dtype)
+        position += len(block)
+    ids, vectors = ids[:position], vectors[:position]
+
+    partitions = 0
+    if position >= ann_threshold:
+        partitions = int(min(4096, max(16, math.sqrt(position))))
+        rng = np.random.default_rng(0)
+        sample_size = min(position, max(partitions * 40, 10000), KMEANS_MAX_SAMPLE)
+        sample = dequantize(np.asarray(vectors[np.sort(rng.choice(position, sample_size, replace=False))]))
+        centroids = train_centroids(sample, partitions)
+        assignments = _assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=partitions))]).astype(np.int64)
+
+        # Cada partição fica contígua no arquivo: a busca lê só as fatias visitadas
+        ordered = np.lib.format.open_memmap(vectors_path + ".sorted", mode="w+", dtype=vectors.dtype,
+                                            shape=vectors.shape)
+        for start in range(0, position, chunk_size):
+            ordered[start:start + chunk_size] = vectors[order[start:start + chunk_size]]
+        ordered.flush()
+        del vectors, ordered
+        os.replace(vectors_path + ".sorted", vectors_path + ".tmp")
+        ids = ids[order]
+        _save(os.path.join(directory, "centroids.npy"), centroids)
+        _save(os.path.join(directory, "offsets.npy"), offsets)
+    else:
+        vectors.flush()
+        del vectors
+
+    os.replace(vectors_path + ".tmp", vectors_path)
+    _save(os.path.join(directory, "ids.npy"), ids)
+    meta = _write_meta(directory, {
+        "count": int(position),
+        "dimension": dimension,
+        "dtype": dtype,
+        "partitions": partitions,
+        "max_feedback_id": int(ids.max()) if position else 0,
+        "embedded_until": embedded_until
+    })
+    logger.info(f"Índice vetorial reconstruído: {position} vetores, {partitions} partições")
+    return meta
+
+
+def _write_meta(directory: str, meta: dict) -> dict:
+    meta["embedding_model"] = "stub" if config.INFERENCE_BACKEND == "stub" else config.EMBEDDING_MODEL
+    meta["built_at"] = time.time()
+    # Os metadados são gravados por último: processos que leem o índice só o recarregam depois
+    with open(os.path.join(directory, META_FILE + ".tmp"), "w") as handle:
+        json.dump(meta, handle)
+    os.replace(os.path.join(directory, META_FILE + ".tmp"), os.path.join(directory, META_FILE))
+    return meta
+
+
+class VectorIndex:
+    """Arquivos memory-mapped da última reconstrução + vetores novos em memória"""
+
+    def __init__(self, directory: str = config.VECTOR_INDEX_DIR, nprobe: int = config.VECTOR_INDEX_NPROBE,
+                 refresh_interval: float = config.VECTOR_INDEX_REFRESH_INTERVAL):
+        self.directory = directory
+        self.nprobe = nprobe
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._meta_mtime: Optional[float] = None
+        self._delta: Dict[int, np.ndarray] = {}
+        # Posição (embedded_at, id) da próxima leitura do refresh e maior embedded_at já lido
+        self._cursor: Optional[Tuple[datetime, int]] = None
+        self._embedded_until: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._delta)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """Abre os arquivos da última reconstrução (se existirem) sem lê-los para a memória"""
+        meta_path = self._path(META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path) as handle:
+            meta = json.load(handle)
+        ids = np.load(self._path("ids.npy"), mmap_mode="r")
+        vectors = np.load(self._path("vectors.npy"), mmap_mode="r") if meta["count"] else None
+        centroids = offsets = None
+        if meta["partitions"]:
+            centroids = np.load(self._path("centroids.npy"))
+            offsets = np.load(self._path("offsets.npy"))
+        with self._lock:
+            self._ids, self._vectors, self._centroids, self._offsets = ids, vectors, centroids, offsets
+            # Vetores em memória já incluídos na reconstrução saem do delta
+            if self._delta:
+                delta_ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+                indexed = set(delta_ids[np.isin(delta_ids, ids)].tolist())
+                self._delta = {key: value for key, value in self._delta.items() if key not in indexed}
+            if meta.get("embedded_until"):
+                self._advance(datetime.fromisoformat(meta["embedded_until"]))
+                start = (self._embedded_until - REFRESH_OVERLAP, 0)
+                if self._cursor is None or start > self._cursor:
+                    self._cursor = start
+            self._meta_mtime = os.path.getmtime(meta_path)
+        logger.info(f"Índice vetorial carregado: {meta['count']} vetores, {meta['partitions']} partições")
+
+    def add(self, ids: List[int], vectors):
+        """Inclui vetores recém-gravados (busca exata até a próxima reconstrução)"""
+        if vectors is None or not len(ids):
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            for feedback_id, vector in zip(ids, matrix):
+                self._delta[int(feedback_id)] = vector
+
+    def refresh(self, db: Session):
+        """Recarrega os arquivos reconstruídos e busca no banco os vetores gravados por outros processos"""
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+
+        meta_path = self._path(META_FILE)
+        if os.path.exists(meta_path) and os.path.getmtime(meta_path) != self._meta_mtime:
+            self.load()
+
+        # Pela ordem em que foram gravados, não pelo id: no modo assíncrono um feedback
+        # antigo pode receber o embedding depois de outros mais novos
+        embedded_at = models.Feedback.embedded_at
+        query = select(models.Feedback.id, models.Feedback.embedding, embedded_at).where(
+            embedded_at.isnot(None), models.Feedback.embedding.isnot(None)
+        )
+        if self._cursor is not None:
+            at, last_id = self._cursor
+            query = query.where(or_(embedded_at > at, and_(embedded_at == at, models.Feedback.id > last_id)))
+        rows = db.execute(query.order_by(embedded_at, models.Feedback.id).limit(REFRESH_BATCH_SIZE)).all()
+        if rows:
+            # A janela de sobreposição relê vetores que já estão na reconstrução: esses não entram no delta
+            indexed = np.isin(np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows)), self._ids)
+            fresh = [row for row, in_base in zip(rows, indexed) if not in_base]
+            if fresh:
+                self.add([row.id for row in fresh], np.vstack([decode_embedding(row.embedding) for row in fresh]))
+            self._cursor = (rows[-1].embedded_at, rows[-1].id)
+            self._advance(rows[-1].embedded_at)
+        if len(rows) < REFRESH_BATCH_SIZE and self._embedded_until is not None:
+            # Alcançou o fim: o próximo refresh recomeça na janela de sobreposição
+            self._cursor = (self._embedded_until - REFRESH_OVERLAP, 0)
+
+    def _advance(self, embedded_at: datetime):
+        if self._embedded_until is None or embedded_at > self._embedded_until:
+            self._embedded_until = embedded_at
+
+    def _base_ranges(self, query: np.ndarray, centroids, offsets, size: int) -> List[Tuple[int, int]]:
+        if centroids is None:
+            return [(0, size)]
+        probes = np.argsort(-(centroids @ query))[:self.nprobe]
+        return [(int(offsets[probe]), int(offsets[probe + 1])) for probe in probes]
+
+    def search(self, query, k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Os k feedbacks mais similares (id, similaridade de cosseno), do mais para o menos similar"""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            ids, vectors, centroids, offsets = self._ids, self._vectors, self._centroids, self._offsets
+            delta_ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+            delta = np.vstack(list(self._delta.values())) if self._delta else None
+
+        wanted = k + 1  # o próprio feedback pode aparecer no resultado
+        found_ids, found_scores = [], []
+        if vectors is not None:
+            for start, end in self._base_ranges(query, centroids, offsets, len(ids)):
+                for chunk_start in range(start, end, SEARCH_CHUNK_SIZE):
+                    chunk_end = min(end, chunk_start + SEARCH_CHUNK_SIZE)
+                    scores = dequantize(np.asarray(vectors[chunk_start:chunk_end])) @ query
+                    top = _top_k(scores, wanted)
+                    found_ids.append(np.asarray(ids[chunk_start:chunk_end])[top])
+                    found_scores.append(scores[top])
+        if delta is not None:
+            scores = delta @ query
+            top = _top_k(scores, wanted)
+            found_ids.append(delta_ids[top])
+            found_scores.append(scores[top])
+        if not found_ids:
+            return []
+
+        all_ids = np.concatenate(found_ids)
+        all_scores = np.concatenate(found_scores)
+        results, seen = [], set()
+        for index in np.argsort(-all_scores):
+            feedback_id = int(all_ids[index])
+            if feedback_id == exclude or feedback_id in seen:
+                continue
+            seen.add(feedback_id)
+            results.append((feedback_id, float(all_scores[index])))
+            if len(results) == k:
+                break
+        return results
+
+    def collect_metrics(self):
+        return [(
+            "feedback_vector_index_vectors", "gauge", "Vetores no índice de similares por segmento",
+            [({"segment": "mmap"}, len(self._ids)), ({"segment": "memory"}, len(self._delta))]
+        )]
+
+
+vector_index = VectorIndex()
+metrics.registry.register_collector(vector_index.collect_metrics)
@@ -0,0 +1,122 @@
+from typing import List, Optional
+import gc
+import logging
+import multiprocessing.pool
+import threading
+
+from app import config, metrics
+
+logger = logging.getLogger(__name__)
+
+# Analisador carregado no processo pai; os workers o herdam via fork (copy-on-write)
+_shared_analyzer = None
+
+
+def _init_worker(num_threads: int):
+    import torch
+
+    # Cada worker usa um conjunto fixo de threads intra-op para não disputar núcleos
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+
+def _sentiment_batch(texts: List[str], raise_errors: bool) -> List[dict]:
+    return _shared_analyzer.analyze_sentiment_batch(texts, raise_errors=raise_errors)
+
+
+def _labels_batch(texts: List[str], existing_labels: List[str], raise_errors: bool) -> List[List[str]]:
+    return _shared_analyzer.generate_labels_batch(texts, existing_labels, raise_errors=raise_errors)
+
+
+def _warmup_worker(_):
+    _shared_analyzer.warmup()
+
+
+class ProcessPoolAnalyzer:
+    """Distribui as chamadas do FeedbackAnalyzer entre processos que compartilham os pesos"""
+
+    def __init__(self, analyzer, num_workers: int = config.INFERENCE_WORKERS,
+                 threads_per_worker: int = config.INFERENCE_THREADS_PER_WORKER,
+                 min_chunk_size: int = 4):
+        self.analyzer = analyzer
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.min_chunk_size = min_chunk_size
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == "analyzer":
+            raise AttributeError(name)
+        return getattr(self.analyzer, name)
+
+    def load(self):
+        """Carrega os modelos no pai e só então cria os workers com fork"""
+        global _shared_analyzer
+        with self._lock:
+            if self._pool is not None:
+                return
+            # Nenhuma inferência roda no pai antes do fork, evitando herdar pools OpenMP já iniciados
+            self.analyzer.load()
+            _shared_analyzer = self.analyzer
+
+            # Move os objetos atuais para a geração permanente: o GC dos filhos não
+            # toca nos cabeçalhos deles e as páginas dos pesos continuam compartilhadas
+            gc.collect()
+            gc.freeze()
+            context = multiprocessing.get_context("fork")
+            self._pool = context.Pool(
+                self.num_workers,
+                initializer=_init_worker,
+                initargs=(self.threads_per_worker,)
+            )
+            logger.info(f"{self.num_workers} worker(s) de inferência com {self.threads_per_worker} thread(s) cada")
+
+    def warmup(self):
+        self.load()
+        self._pool.map(_warmup_worker, range(self.num_workers), chunksize=1)
+
+    def _chunks(self, texts: List[str]) -> List[List[str]]:
+        # Lotes grandes (bulk, enriquecimento) são divididos entre os workers
+        parts = max(1, min(self.num_workers, len(texts) // self.min_chunk_size))
+        size = -(-len(texts) // parts)
+        return [texts[start:start + size] for start in range(0, len(texts), size)]
+
+    def analyze_sentiment(self, text: str, raise_errors: bool = False) -> dict:
+        return self.analyze_sentiment_batch([text], raise_errors)[0]
+
+    def analyze_sentiment_batch(self, texts: List[str], raise_errors: bool = False) -> List[dict]:
+        if not texts:
+            return []
+        self.load()
+        # Os workers não expõem métricas: a chamada é medida aqui, no processo da API
+        with metrics.model_call("sentiment", len(texts)):
+            results = self._pool.starmap(
+                _sentiment_batch, [(chunk, raise_errors) for chunk in self._chunks(texts)], chunksize=1
+            )
+        return [result for chunk in results for result in chunk]
+
+    def generate_labels(self, text: str, existing_labels: List[str], raise_errors: bool = False) -> List[str]:
+        return self.generate_labels_batch([text], existing_labels, raise_errors)[0]
+
+    def generate_labels_batch(self, texts: List[str], existing_labels: List[str],
+                              raise_errors: bool = False) -> List[List[str]]:
+        if not texts:
+            return []
+        self.load()
+        with metrics.model_call("labeling", len(texts)):
+            results = self._pool.starmap(
+                _labels_batch, [(chunk, existing_labels, raise_errors) for chunk in self._chunks(texts)], chunksize=1
+            )
+        return [result for chunk in results for result in chunk]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+        self.analyzer.shutdown()
@@ -0,0 +1 @@
+"""Benchmarks reproduzíveis dos caminhos de ingestão e leitura (ver benchmarks/run.py)."""
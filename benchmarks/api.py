@@ -0,0 +1,108 @@
+"""POST /feedbacks/ e GET /feedbacks/ via TestClient, com a tabela crescendo entre os tamanhos"""
+from typing import List
+import itertools
+
+from benchmarks.common import checked, measure, report
+
+SUITE = "api"
+PAGE_SIZE = 200
+
+
+def _feedback_count() -> int:
+    from sqlalchemy import func, select
+
+    from app.database import SessionLocal
+    import app.models as models
+
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count(models.Feedback.id)))
+    finally:
+        db.close()
+
+
+def _grow_to(rows: int, seed: int):
+    """Completa a tabela até `rows` feedbacks com o gerador de dados sintéticos"""
+    from scripts.generate_data import build_parser, generate
+
+    missing = rows - _feedback_count()
+    if missing > 0:
+        generate(build_parser().parse_args([
+            "--rows", str(missing), "--seed", str(seed + rows), "--skip-rollups", "--quiet"
+        ]))
+
+
+def _purchase_ids(limit: int = 1000) -> List[int]:
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    import app.models as models
+
+    db = SessionLocal()
+    try:
+        return list(db.scalars(select(models.Purchase.id).order_by(models.Purchase.id.desc()).limit(limit)))
+    finally:
+        db.close()
+
+
+def run(sizes: List[int], iterations: int, seed: int) -> List[dict]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from seed import SAMPLE_COMMENTS
+
+    results = []
+
+    def add(result: dict):
+        report(result)
+        results.append(result)
+
+    with TestClient(app) as client:
+        for size in sizes:
+            _grow_to(size, seed)
+            params = {"rows": size}
+            purchase_ids = _purchase_ids()
+            sample_label = client.get("/labels/", params={"limit": 1}).json()
+
+            add(measure(SUITE, "GET /feedbacks/ first page", lambda _: checked(
+                client.get("/feedbacks/", params={"limit": PAGE_SIZE})
+            ), iterations, params, items_per_call=PAGE_SIZE))
+
+            def walk_pages(_, pages=5):
+                cursor = None
+                for _ in range(pages):
+                    page_params = {"limit": PAGE_SIZE}
+                    if cursor:
+                        page_params["cursor"] = cursor
+                    cursor = checked(client.get("/feedbacks/", params=page_params)).headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+
+            add(measure(SUITE, "GET /feedbacks/ cursor walk (5 pages)", walk_pages, iterations, params,
+                        items_per_call=5 * PAGE_SIZE))
+
+            add(measure(SUITE, "GET /feedbacks/ sentiment + date range", lambda _: checked(
+                client.get("/feedbacks/", params={
+                    "limit": PAGE_SIZE, "sentiment_label": "Negativo",
+                    "start_date": "2000-01-01", "end_date": "2100-01-01"
+                })
+            ), iterations, params, items_per_call=PAGE_SIZE))
+
+            if sample_label:
+                add(measure(SUITE, "GET /feedbacks/ label filter", lambda _: checked(
+                    client.get("/feedbacks/", params={"limit": PAGE_SIZE, "labels": sample_label[0]["name"]})
+                ), iterations, params, items_per_call=PAGE_SIZE))
+
+            counter = itertools.count()
+
+            def post_feedback(_):
+                index = next(counter)
+                checked(client.post("/feedbacks/", params={"background": False}, json={
+                    "purchase_id": purchase_ids[index % len(purchase_ids)],
+                    # Varia o texto para não medir apenas acertos de cache
+                    "comment": f"{SAMPLE_COMMENTS[index % len(SAMPLE_COMMENTS)]} #{size}-{index}"
+                }))
+
+            add(measure(SUITE, "POST /feedbacks/", post_feedback, iterations, params))
+
+    return results
@@ -0,0 +1,63 @@
+from typing import Any, Callable, Dict, List, Optional
+import time
+
+import numpy as np
+
+
+def measure(suite: str, name: str, func: Callable[[Any], Any], iterations: int,
+            params: Optional[Dict[str, Any]] = None, items_per_call: int = 1, warmup: int = 1,
+            setup: Optional[Callable[[], Any]] = None) -> dict:
+    """Executa `func` `iterations` vezes e resume as latências (ms) e a vazão (itens/s)
+
+    `setup`, quando informado, prepara fora da medição o argumento de cada chamada
+    (ex.: uma cópia dos dados que a função modifica).
+    """
+    for _ in range(warmup):
+        func(setup() if setup else None)
+
+    latencies = []
+    for _ in range(iterations):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument)
+        latencies.append(time.perf_counter() - start)
+
+    samples = np.array(latencies) * 1000
+    total_seconds = float(np.sum(latencies))
+    return {
+        "suite": suite,
+        "name": name,
+        "params": params or {},
+        "iterations": iterations,
+        "items_per_call": items_per_call,
+        "throughput_per_s": round(items_per_call * iterations / total_seconds, 2) if total_seconds else None,
+        "latency_ms": {
+            "mean": round(float(samples.mean()), 3),
+            "p50": round(float(np.percentile(samples, 50)), 3),
+            "p95": round(float(np.percentile(samples, 95)), 3),
+            "p99": round(float(np.percentile(samples, 99)), 3),
+            "min": round(float(samples.min()), 3),
+            "max": round(float(samples.max()), 3)
+        }
+    }
+
+
+def report(result: dict):
+    latency = result["latency_ms"]
+    params = " ".join(f"{key}={value}" for key, value in result["params"].items())
+    print(
+        f"[{result['suite']}] {result['name']} {params}: "
+        f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms "
+        f"({result['throughput_per_s']}/s)"
+    )
+
+
+def checked(response):
+    """Falha cedo em vez de medir respostas de erro"""
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def cycle(values: List[Any], count: int, offset: int = 0) -> List[Any]:
+    return [values[(offset + index) % len(values)] for index in range(count)]
@@ -0,0 +1,47 @@
+"""Compara dois arquivos de resultados (p50/p95/p99 e vazão) casando suíte, nome e parâmetros.
+
+Uso:
+    python -m benchmarks.compare base.json candidato.json
+"""
+import argparse
+import json
+
+
+def _key(result: dict):
+    return result["suite"], result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def _change(old, new) -> str:
+    if not old or new is None:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = {_key(result): result for result in json.load(file)["results"]}
+    with open(args.candidate, encoding="utf-8") as file:
+        candidate = json.load(file)["results"]
+
+    for result in candidate:
+        old = baseline.get(_key(result))
+        suite, name, params = _key(result)
+        if old is None:
+            print(f"[{suite}] {name} {params}: sem referência na base")
+            continue
+        changes = " ".join(
+            f"{metric}={old['latency_ms'][metric]}→{result['latency_ms'][metric]}ms "
+            f"({_change(old['latency_ms'][metric], result['latency_ms'][metric])})"
+            for metric in ("p50", "p95", "p99")
+        )
+        throughput = _change(old["throughput_per_s"], result["throughput_per_s"])
+        print(f"[{suite}] {name} {params}: {changes} vazão {throughput}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Transformações de DataFrame do painel (streamlit_app/data_store.py) sobre respostas sintéticas da API"""
+from datetime import datetime, timedelta, timezone
+from typing import List
+import copy
+import random
+
+from benchmarks.common import measure, report
+
+SUITE = "dashboard"
+
+
+def api_rows(count: int, seed: int) -> List[dict]:
+    """Linhas no formato de GET /feedbacks/ (rótulos aninhados)"""
+    from seed import PREDEFINED_LABELS, SAMPLE_COMMENTS
+
+    rng = random.Random(seed)
+    end = datetime.now(timezone.utc)
+    label_objects = [
+        {"id": index + 1, "name": name, "description": None, "created_at": end.isoformat()}
+        for index, name in enumerate(PREDEFINED_LABELS)
+    ]
+    rows = []
+    for index in range(1, count + 1):
+        created_at = (end - timedelta(seconds=rng.uniform(0, 365 * 86400))).isoformat()
+        rows.append({
+            "id": index,
+            "purchase_id": index,
+            "comment": rng.choice(SAMPLE_COMMENTS),
+            "sentiment_score": rng.uniform(0.5, 1.0),
+            "sentiment_label": rng.choice(["Positivo", "Neutro", "Negativo"]),
+            "secondary_polarity": rng.uniform(-1, 1),
+            "enrichment_status": "done",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "labels": [
+                {"id": index * 10 + position, "label": label}
+                for position, label in enumerate(rng.sample(label_objects, rng.randint(0, 3)))
+            ]
+        })
+    return rows
+
+
+def run(sizes: List[int], iterations: int, seed: int) -> List[dict]:
+    from streamlit_app import data_store
+
+    results = []
+
+    def add(result: dict):
+        report(result)
+        results.append(result)
+
+    for size in sizes:
+        params = {"rows": size}
+        rows = api_rows(size, seed)
+
+        def flatten(fresh_rows):
+            return data_store._normalize(data_store._flatten_feedbacks(fresh_rows), ["created_at", "updated_at"])
+
+        # _flatten_feedbacks remove a chave "labels" das linhas: cada chamada recebe uma cópia
+        add(measure(SUITE, "flatten + normalize", flatten, iterations, params, items_per_call=size,
+                    setup=lambda: copy.deepcopy(rows)))
+
+        df_raw = flatten(copy.deepcopy(rows))
+        add(measure(SUITE, "build_label_index", lambda _: data_store.build_label_index(df_raw), iterations, params,
+                    items_per_call=size))
+
+        df, df_labels = data_store.build_label_index(df_raw)
+        middle = df["created_at"].min() + (df["created_at"].max() - df["created_at"].min()) / 2
+        filters = {
+            "start_date": middle.date(),
+            "end_date": df["created_at"].max().date(),
+            "sentiment": "Negativo",
+            "labels": ["entrega", "qualidade"]
+        }
+        add(measure(SUITE, "filter_mask", lambda _: data_store.filter_mask(df, df_labels, **filters), iterations,
+                    params, items_per_call=size))
+
+        selected = df.loc[data_store.filter_mask(df, df_labels, start_date=filters["start_date"]), "id"]
+        add(measure(SUITE, "label_counts", lambda _: data_store.label_counts(df_labels, selected), iterations,
+                    params, items_per_call=size))
+    return results
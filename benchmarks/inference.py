@@ -0,0 +1,51 @@
+"""Chamadas diretas ao FeedbackAnalyzer (sem cache nem micro-batching) por tamanho de lote e de rótulos"""
+from typing import List
+
+from benchmarks.common import cycle, measure, report
+
+SUITE = "inference"
+
+
+def label_pool(count: int) -> List[str]:
+    from seed import PREDEFINED_LABELS
+
+    extra = [f"tema_{index}" for index in range(max(0, count - len(PREDEFINED_LABELS)))]
+    return (PREDEFINED_LABELS + extra)[:count]
+
+
+def run(batch_sizes: List[int], label_counts: List[int], iterations: int) -> List[dict]:
+    from app.ai_processing import FeedbackAnalyzer
+    from seed import SAMPLE_COMMENTS
+
+    analyzer = FeedbackAnalyzer()
+    analyzer.warmup()
+    results = []
+    try:
+        for batch_size in batch_sizes:
+            texts = cycle(SAMPLE_COMMENTS, batch_size)
+
+            result = measure(SUITE, "analyze_sentiment_batch", lambda _: analyzer.analyze_sentiment_batch(texts),
+                             iterations, {"batch_size": batch_size, "backend": analyzer.backend},
+                             items_per_call=batch_size)
+            report(result)
+            results.append(result)
+
+            # Um comentário longo no lote: mede o efeito dos lotes por comprimento e dos trechos
+            mixed = texts[:-1] + [" ".join(SAMPLE_COMMENTS)]
+            result = measure(SUITE, "analyze_sentiment_batch (mixed lengths)",
+                             lambda _: analyzer.analyze_sentiment_batch(mixed), iterations,
+                             {"batch_size": batch_size, "backend": analyzer.backend}, items_per_call=batch_size)
+            report(result)
+            results.append(result)
+
+            for label_count in label_counts:
+                labels = label_pool(label_count)
+                result = measure(SUITE, "generate_labels_batch",
+                                 lambda _: analyzer.generate_labels_batch(texts, labels), iterations,
+                                 {"batch_size": batch_size, "labels": label_count, "backend": analyzer.backend},
+                                 items_per_call=batch_size)
+                report(result)
+                results.append(result)
+    finally:
+        analyzer.shutdown()
+    return results
@@ -0,0 +1,65 @@
+"""Esquema inicial (tabelas criadas por create_all antes das migrações)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "purchases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("customer_id", sa.String()),
+        sa.Column("product_id", sa.String()),
+        sa.Column("product_name", sa.String()),
+        sa.Column("amount", sa.Float()),
+        sa.Column("purchase_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_purchases_id", "purchases", ["id"])
+    op.create_index("ix_purchases_customer_id", "purchases", ["customer_id"])
+    op.create_index("ix_purchases_product_id", "purchases", ["product_id"])
+
+    op.create_table(
+        "feedbacks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("purchase_id", sa.Integer(), sa.ForeignKey("purchases.id")),
+        sa.Column("comment", sa.Text()),
+        sa.Column("sentiment_score", sa.Float()),
+        sa.Column("sentiment_label", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_feedbacks_id", "feedbacks", ["id"])
+
+    op.create_table(
+        "labels",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_labels_id", "labels", ["id"])
+    op.create_index("ix_labels_name", "labels", ["name"], unique=True)
+
+    op.create_table(
+        "feedback_labels",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("feedback_id", sa.Integer(), sa.ForeignKey("feedbacks.id")),
+        sa.Column("label_id", sa.Integer(), sa.ForeignKey("labels.id")),
+    )
+    op.create_index("ix_feedback_labels_id", "feedback_labels", ["id"])
+
+
+def downgrade():
+    op.drop_table("feedback_labels")
+    op.drop_table("labels")
+    op.drop_table("feedbacks")
+    op.drop_table("purchases")
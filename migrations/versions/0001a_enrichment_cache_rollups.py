@@ -0,0 +1,111 @@
+"""Colunas e tabelas adicionadas por create_all antes das migrações
+
+Enriquecimento assíncrono (feedbacks.enrichment_status, enrichment_jobs), cache de
+inferência, rollups de sentimento, polaridade secundária e updated_at para a
+sincronização incremental. Bancos sem histórico são marcados na revisão 0001
+independentemente da versão que os criou, então cada item só é criado se faltar.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _add_columns(table, columns, indexes):
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+    missing = [column for column in columns if column.name not in existing]
+    if missing:
+        # SQLite não aceita ADD COLUMN com default não constante (now()): recria a tabela
+        recreate = "always" if op.get_bind().dialect.name == "sqlite" else "auto"
+        with op.batch_alter_table(table, recreate=recreate) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+    existing_indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+    for name, column in indexes:
+        if name not in existing_indexes:
+            op.create_index(name, table, [column])
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    _add_columns(
+        "purchases",
+        [sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now())],
+        [("ix_purchases_updated_at", "updated_at")]
+    )
+    # Feedbacks já existentes foram enriquecidos de forma síncrona: status "done"
+    _add_columns(
+        "feedbacks",
+        [
+            sa.Column("secondary_polarity", sa.Float()),
+            sa.Column("enrichment_status", sa.String(), server_default="done"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        ],
+        [("ix_feedbacks_enrichment_status", "enrichment_status"), ("ix_feedbacks_updated_at", "updated_at")]
+    )
+
+    if "enrichment_jobs" not in tables:
+        op.create_table(
+            "enrichment_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("feedback_id", sa.Integer(), sa.ForeignKey("feedbacks.id")),
+            sa.Column("status", sa.String()),
+            sa.Column("attempts", sa.Integer()),
+            sa.Column("last_error", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("locked_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_enrichment_jobs_id", "enrichment_jobs", ["id"])
+        op.create_index("ix_enrichment_jobs_feedback_id", "enrichment_jobs", ["feedback_id"])
+        op.create_index("ix_enrichment_jobs_status", "enrichment_jobs", ["status"])
+
+    if "inference_cache" not in tables:
+        op.create_table(
+            "inference_cache",
+            sa.Column("key", sa.String(64), primary_key=True),
+            sa.Column("kind", sa.String()),
+            sa.Column("value", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    if "sentiment_rollups" not in tables:
+        op.create_table(
+            "sentiment_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("period", sa.String(), nullable=False),
+            sa.Column("bucket_start", sa.Date(), nullable=False),
+            sa.Column("dimension", sa.String(), nullable=False),
+            sa.Column("dimension_key", sa.String(), nullable=False),
+            sa.Column("sentiment_label", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("score_sum", sa.Float(), nullable=False),
+            sa.UniqueConstraint(
+                "period", "bucket_start", "dimension", "dimension_key", "sentiment_label",
+                name="uq_sentiment_rollups_bucket"
+            ),
+        )
+        op.create_index("ix_sentiment_rollups_id", "sentiment_rollups", ["id"])
+
+
+def downgrade():
+    op.drop_table("sentiment_rollups")
+    op.drop_table("inference_cache")
+    op.drop_table("enrichment_jobs")
+    op.drop_index("ix_feedbacks_updated_at", table_name="feedbacks")
+    op.drop_index("ix_feedbacks_enrichment_status", table_name="feedbacks")
+    with op.batch_alter_table("feedbacks") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("enrichment_status")
+        batch_op.drop_column("secondary_polarity")
+    op.drop_index("ix_purchases_updated_at", table_name="purchases")
+    with op.batch_alter_table("purchases") as batch_op:
+        batch_op.drop_column("updated_at")
@@ -0,0 +1,38 @@
+"""Índices das consultas de feedbacks e unicidade de feedback_labels
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_feedbacks_created_at_id", "feedbacks", ["created_at", "id"])
+    op.create_index("ix_feedbacks_purchase_id", "feedbacks", ["purchase_id"])
+    op.create_index("ix_feedbacks_sentiment_label_created_at", "feedbacks", ["sentiment_label", "created_at"])
+
+    # Remove vínculos duplicados (mantém o mais antigo) antes de impor a unicidade
+    op.execute(sa.text(
+        "DELETE FROM feedback_labels WHERE id NOT IN "
+        "(SELECT MIN(id) FROM feedback_labels GROUP BY feedback_id, label_id)"
+    ))
+    op.create_index(
+        "uq_feedback_labels_feedback_id_label_id", "feedback_labels", ["feedback_id", "label_id"], unique=True
+    )
+    op.create_index("ix_feedback_labels_label_id_feedback_id", "feedback_labels", ["label_id", "feedback_id"])
+
+
+def downgrade():
+    op.drop_index("ix_feedback_labels_label_id_feedback_id", table_name="feedback_labels")
+    op.drop_index("uq_feedback_labels_feedback_id_label_id", table_name="feedback_labels")
+    op.drop_index("ix_feedbacks_sentiment_label_created_at", table_name="feedbacks")
+    op.drop_index("ix_feedbacks_purchase_id", table_name="feedbacks")
+    op.drop_index("ix_feedbacks_created_at_id", table_name="feedbacks")
@@ -0,0 +1,25 @@
+"""Coluna feedbacks.sentiment_tier (nível da cascata que decidiu o sentimento)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("feedbacks", sa.Column("sentiment_tier", sa.String(), nullable=True))
+    # Antes da cascata todo sentimento vinha do transformer
+    op.execute(sa.text("UPDATE feedbacks SET sentiment_tier = 'transformer' WHERE sentiment_label IS NOT NULL"))
+
+
+def downgrade():
+    with op.batch_alter_table("feedbacks") as batch_op:
+        batch_op.drop_column("sentiment_tier")
@@ -0,0 +1,43 @@
+"""Tabela label_backfill_jobs (backfill incremental de rótulos novos)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "label_backfill_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("label_ids", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("last_feedback_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_feedback_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("matched", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+        sa.Column("locked_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_label_backfill_jobs_id", "label_backfill_jobs", ["id"])
+    op.create_index("ix_label_backfill_jobs_status", "label_backfill_jobs", ["status"])
+
+
+def downgrade():
+    op.drop_index("ix_label_backfill_jobs_status", table_name="label_backfill_jobs")
+    op.drop_index("ix_label_backfill_jobs_id", table_name="label_backfill_jobs")
+    op.drop_table("label_backfill_jobs")
@@ -0,0 +1,55 @@
+"""Busca textual nos comentários: tsvector + GIN (PostgreSQL) ou FTS5 (SQLite)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Coluna gerada: mantida pelo próprio banco em INSERT/UPDATE/COPY (reescreve a tabela uma vez)
+        op.execute(
+            "ALTER TABLE feedbacks ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('portuguese', coalesce(comment, ''))) STORED"
+        )
+        op.create_index("ix_feedbacks_search_vector", "feedbacks", ["search_vector"], postgresql_using="gin")
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE feedbacks_fts USING fts5("
+            "comment, content='feedbacks', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER feedbacks_fts_insert AFTER INSERT ON feedbacks BEGIN "
+            "INSERT INTO feedbacks_fts(rowid, comment) VALUES (new.id, new.comment); END"
+        )
+        op.execute(
+            "CREATE TRIGGER feedbacks_fts_delete AFTER DELETE ON feedbacks BEGIN "
+            "INSERT INTO feedbacks_fts(feedbacks_fts, rowid, comment) VALUES ('delete', old.id, old.comment); END"
+        )
+        op.execute(
+            "CREATE TRIGGER feedbacks_fts_update AFTER UPDATE OF comment ON feedbacks BEGIN "
+            "INSERT INTO feedbacks_fts(feedbacks_fts, rowid, comment) VALUES ('delete', old.id, old.comment); "
+            "INSERT INTO feedbacks_fts(rowid, comment) VALUES (new.id, new.comment); END"
+        )
+        # Indexa os comentários existentes
+        op.execute("INSERT INTO feedbacks_fts(feedbacks_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_feedbacks_search_vector", table_name="feedbacks")
+        op.execute("ALTER TABLE feedbacks DROP COLUMN search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("feedbacks_fts_insert", "feedbacks_fts_delete", "feedbacks_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS feedbacks_fts")
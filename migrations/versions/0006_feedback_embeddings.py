@@ -0,0 +1,24 @@
+"""Coluna feedbacks.embedding (vetor do comentário em float16/int8)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Preenchida na ingestão; para feedbacks antigos use scripts/backfill_embeddings.py
+    op.add_column("feedbacks", sa.Column("embedding", sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("feedbacks") as batch_op:
+        batch_op.drop_column("embedding")
@@ -0,0 +1,27 @@
+"""Coluna feedbacks.embedded_at (marca d'água da atualização do índice de similares)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("feedbacks", sa.Column("embedded_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_feedbacks_embedded_at", "feedbacks", ["embedded_at"])
+    # Embeddings já gravados: a última alteração da linha é a melhor estimativa disponível
+    op.execute(sa.text("UPDATE feedbacks SET embedded_at = updated_at WHERE embedding IS NOT NULL"))
+
+
+def downgrade():
+    op.drop_index("ix_feedbacks_embedded_at", table_name="feedbacks")
+    with op.batch_alter_table("feedbacks") as batch_op:
+        batch_op.drop_column("embedded_at")
@@ -0,0 +1,31 @@
+"""SQLite: timestamps gravados por CURRENT_TIMESTAMP no formato com microssegundos
+
+Linhas antigas têm "YYYY-MM-DD HH:MM:SS" (default do servidor) e as novas, gravadas
+pelo Python, "YYYY-MM-DD HH:MM:SS.ffffff"; a paginação por cursor compara esses
+textos, então todas passam a usar o segundo formato. No PostgreSQL não há o que fazer.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (("purchases", "updated_at"), ("feedbacks", "created_at"), ("feedbacks", "updated_at"))
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, column in COLUMNS:
+        op.execute(sa.text(f"UPDATE {table} SET {column} = {column} || '.000000' WHERE length({column}) = 19"))
+
+
+def downgrade():
+    pass
@@ -0,0 +1,81 @@
+"""Calcula os embeddings dos feedbacks que ainda não têm e reconstrói o índice de similares.
+
+Usa o mesmo encoder da ingestão (TextEmbedder com EMBEDDING_MODEL, ou o stub com
+INFERENCE_BACKEND=stub). Rode de novo periodicamente para mover os vetores novos
+da memória da API para os arquivos memory-mapped (e reparticionar o índice IVF).
+
+Uso:
+    python scripts/backfill_embeddings.py --batch-size 256
+    python scripts/backfill_embeddings.py --rebuild-only
+"""
+from datetime import datetime, timezone
+import argparse
+import logging
+import time
+
+from sqlalchemy import select, update
+
+from app import config
+from app.database import SessionLocal
+from app.vector_index import build_index, embedding_blobs
+import app.models as models
+
+
+def build_embedder():
+    if config.INFERENCE_BACKEND == "stub":
+        from app.stub_models import StubTextEmbedder
+
+        return StubTextEmbedder()
+    from app.embeddings import TextEmbedder
+
+    return TextEmbedder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dtype", choices=("float16", "int8"), default=config.EMBEDDING_DTYPE)
+    parser.add_argument("--rebuild-only", action="store_true", help="Apenas reconstrói o índice a partir do banco")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        if not args.rebuild_only:
+            embedder = build_embedder()
+            last_id, total, start = 0, 0, time.perf_counter()
+            while True:
+                rows = db.execute(
+                    select(models.Feedback.id, models.Feedback.comment)
+                    .where(models.Feedback.embedding.is_(None), models.Feedback.id > last_id)
+                    .order_by(models.Feedback.id)
+                    .limit(args.batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                blobs = embedding_blobs(embedder.encode([comment or "" for _, comment in rows]), len(rows), args.dtype)
+                embedded_at = datetime.now(timezone.utc)
+                db.execute(
+                    update(models.Feedback),
+                    [
+                        {"id": feedback_id, "embedding": blob, "embedded_at": embedded_at}
+                        for (feedback_id, _), blob in zip(rows, blobs)
+                    ]
+                )
+                db.commit()
+
+                last_id = rows[-1][0]
+                total += len(rows)
+                print(f"{total} embeddings calculados (último id {last_id}, "
+                      f"{total / (time.perf_counter() - start):.0f}/s)")
+
+        meta = build_index(db, dtype=args.dtype)
+        print(f"Índice em {config.VECTOR_INDEX_DIR}: {meta['count']} vetores ({meta['dtype']}), "
+              f"{meta['partitions'] or 'sem'} partições")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Aplica rótulos novos aos feedbacks já enriquecidos (backfill incremental e retomável).
+
+Cria um job para os rótulos informados (ou retoma um existente) e o executa em
+primeiro plano. Só os rótulos do job passam pelo zero-shot; interrompido, o job
+continua do último lote confirmado.
+
+Uso:
+    python scripts/backfill_labels.py --label entrega_rapida --label embalagem
+    python scripts/backfill_labels.py --job-id 3 --rate 0
+"""
+import argparse
+import logging
+import sys
+import time
+
+from sqlalchemy import select
+
+from app import config, label_backfill
+from app.ai_processing import FeedbackAnalyzer
+from app.database import SessionLocal
+import app.models as models
+
+
+def create_job(names) -> int:
+    db = SessionLocal()
+    try:
+        labels = dict(db.execute(select(models.Label.name, models.Label.id).where(models.Label.name.in_(names))).all())
+        missing = sorted(set(names) - set(labels))
+        if missing:
+            sys.exit(f"Rótulos não encontrados: {', '.join(missing)}")
+        job = label_backfill.create_job(db, list(labels.values()))
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def report(job_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        job = db.get(models.LabelBackfillJob, job_id)
+        if job is None:
+            sys.exit(f"Job {job_id} não encontrado")
+        return label_backfill.describe(job)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--label", action="append", help="Nome de um rótulo existente (repita para vários)")
+    group.add_argument("--job-id", type=int, help="Retoma um job existente")
+    parser.add_argument("--batch-size", type=int, default=config.LABEL_BACKFILL_BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=config.LABEL_BACKFILL_RATE,
+                        help="Limite de feedbacks/s (0 = sem limite)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    job_id = args.job_id or create_job(args.label)
+    worker = label_backfill.LabelBackfillWorker(FeedbackAnalyzer(), batch_size=args.batch_size, rate=args.rate)
+
+    while True:
+        start = time.perf_counter()
+        processed = worker.process_once(job_id)
+        status = report(job_id)
+        if not processed:
+            break
+        print(f"job {job_id}: {status['processed']}/{status['total']} feedbacks "
+              f"({status['progress']:.1%}), {status['matched']} vínculos, último id {status['last_feedback_id']}")
+        worker.throttle(processed, time.perf_counter() - start)
+
+    if status["status"] == models.BACKFILL_RUNNING:
+        print(f"job {job_id} está em execução em outro processo")
+    else:
+        print(f"job {job_id}: {status['status']} ({status['matched']} vínculos criados)"
+              + (f" - {status['last_error']}" if status["last_error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
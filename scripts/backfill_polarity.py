@@ -0,0 +1,48 @@
+"""Preenche secondary_polarity dos feedbacks antigos em lotes.
+
+Uso:
+    python scripts/backfill_polarity.py --batch-size 1000
+"""
+import argparse
+
+from sqlalchemy import select, update
+
+from app.ai_processing import compute_polarity
+from app.database import SessionLocal
+import app.models as models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    last_id, total = 0, 0
+    try:
+        while True:
+            rows = db.execute(
+                select(models.Feedback.id, models.Feedback.comment)
+                .where(models.Feedback.secondary_polarity.is_(None), models.Feedback.id > last_id)
+                .order_by(models.Feedback.id)
+                .limit(args.batch_size)
+            ).all()
+            if not rows:
+                break
+
+            polarities = compute_polarity([comment for _, comment in rows])
+            db.execute(
+                update(models.Feedback),
+                [{"id": feedback_id, "secondary_polarity": polarity} for (feedback_id, _), polarity in zip(rows, polarities)]
+            )
+            db.commit()
+
+            last_id = rows[-1][0]
+            total += len(rows)
+            print(f"{total} feedbacks atualizados (último id {last_id})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
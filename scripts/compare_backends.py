@@ -0,0 +1,130 @@
+"""Compara latência e concordância de rótulos entre backends de inferência.
+
+Uso:
+    python scripts/compare_backends.py --candidate onnx
+    python scripts/compare_backends.py --candidate torch-int8 --input comentarios.txt --output resultado.json
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+from sqlalchemy import select
+
+from app.ai_processing import INFERENCE_BACKENDS, FeedbackAnalyzer, map_sentiment_label
+from app.database import SessionLocal
+import app.models as models
+
+
+def load_comments(path: str, limit: int) -> List[str]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            comments = [line.strip() for line in f if line.strip()]
+        return comments[:limit]
+
+    db = SessionLocal()
+    try:
+        return list(db.scalars(select(models.Feedback.comment).where(models.Feedback.comment.isnot(None)).limit(limit)))
+    finally:
+        db.close()
+
+
+def load_labels(path: str) -> List[str]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    db = SessionLocal()
+    try:
+        return list(db.scalars(select(models.Label.name)))
+    finally:
+        db.close()
+
+
+def run_backend(backend: str, comments: List[str], labels: List[str], batch_size: int) -> dict:
+    start = time.perf_counter()
+    analyzer = FeedbackAnalyzer(backend=backend)
+    load_seconds = time.perf_counter() - start
+    analyzer.warmup()
+
+    sentiments, generated, latencies = [], [], []
+    for offset in range(0, len(comments), batch_size):
+        batch = comments[offset:offset + batch_size]
+        start = time.perf_counter()
+        sentiments.extend(analyzer.analyze_sentiment_batch(batch))
+        generated.extend(analyzer.generate_labels_batch(batch, labels))
+        latencies.append((time.perf_counter() - start) / len(batch))
+
+    analyzer.shutdown()
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "mean_ms_per_comment": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "sentiments": sentiments,
+        "labels": generated
+    }
+
+
+def agreement(baseline: dict, candidate: dict) -> dict:
+    total = len(baseline["sentiments"])
+    if not total:
+        return {"sentiment_agreement": 0.0, "label_exact_agreement": 0.0, "label_jaccard": 0.0, "max_score_delta": 0.0}
+
+    same_sentiment = sum(
+        map_sentiment_label(a["label"]) == map_sentiment_label(b["label"])
+        for a, b in zip(baseline["sentiments"], candidate["sentiments"])
+    )
+    score_deltas = [abs(a["score"] - b["score"]) for a, b in zip(baseline["sentiments"], candidate["sentiments"])]
+
+    exact, jaccard = 0, 0.0
+    for a, b in zip(baseline["labels"], candidate["labels"]):
+        a, b = set(a), set(b)
+        exact += a == b
+        jaccard += len(a & b) / len(a | b) if a | b else 1.0
+
+    return {
+        "sentiment_agreement": same_sentiment / total,
+        "max_score_delta": max(score_deltas),
+        "label_exact_agreement": exact / total,
+        "label_jaccard": jaccard / total
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default="torch", choices=INFERENCE_BACKENDS)
+    parser.add_argument("--candidate", required=True, choices=INFERENCE_BACKENDS)
+    parser.add_argument("--input", help="Arquivo com um comentário por linha (padrão: feedbacks do banco)")
+    parser.add_argument("--labels", help="Arquivo com um rótulo por linha (padrão: tabela labels)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--output", help="Grava o relatório em JSON")
+    args = parser.parse_args()
+
+    comments = load_comments(args.input, args.limit)
+    labels = load_labels(args.labels)
+    print(f"{len(comments)} comentários, {len(labels)} rótulos")
+
+    baseline = run_backend(args.baseline, comments, labels, args.batch_size)
+    candidate = run_backend(args.candidate, comments, labels, args.batch_size)
+
+    report = {
+        "comments": len(comments),
+        "labels": len(labels),
+        "batch_size": args.batch_size,
+        "baseline": {key: baseline[key] for key in ("backend", "load_seconds", "mean_ms_per_comment")},
+        "candidate": {key: candidate[key] for key in ("backend", "load_seconds", "mean_ms_per_comment")},
+        "speedup": baseline["mean_ms_per_comment"] / candidate["mean_ms_per_comment"]
+        if candidate["mean_ms_per_comment"] else 0.0,
+        **agreement(baseline, candidate)
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Confere, via EXPLAIN, se as consultas principais de feedbacks usam os índices esperados.
+
+Com tabelas pequenas o planejador do PostgreSQL prefere varreduras sequenciais;
+por isso a sessão roda com enable_seqscan=off, verificando que o índice é utilizável.
+
+Uso:
+    python scripts/explain_queries.py [--verbose]
+"""
+from datetime import date
+import argparse
+import json
+import sys
+
+from sqlalchemy import select, text
+
+from app import crud, search
+from app.database import engine
+import app.models as models
+import app.schemas as schemas
+
+PAGE_SIZE = 200
+
+
+def feedback_page(filters: schemas.FeedbackFilters):
+    return (
+        select(models.Feedback)
+        .where(*crud.feedback_filter_clauses(filters))
+        .order_by(models.Feedback.created_at, models.Feedback.id)
+        .limit(PAGE_SIZE)
+    )
+
+
+# (descrição, consulta, índices aceitos)
+CHECKS = [
+    (
+        "listagem por período (GET /feedbacks/?start_date&end_date)",
+        feedback_page(schemas.FeedbackFilters(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))),
+        {"ix_feedbacks_created_at_id"},
+    ),
+    (
+        "feedbacks de uma compra (purchase_id)",
+        feedback_page(schemas.FeedbackFilters(purchase_id=1)),
+        {"ix_feedbacks_purchase_id"},
+    ),
+    (
+        "sentimento em um período",
+        feedback_page(schemas.FeedbackFilters(
+            sentiment_label="negativo", start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)
+        )),
+        {"ix_feedbacks_sentiment_label_created_at"},
+    ),
+    (
+        "filtro por rótulo (labels=)",
+        feedback_page(schemas.FeedbackFilters(labels=["entrega"])),
+        {"ix_feedback_labels_label_id_feedback_id"},
+    ),
+    (
+        "rótulos de uma página de feedbacks (selectinload)",
+        select(models.FeedbackLabel).where(models.FeedbackLabel.feedback_id.in_([1, 2, 3])),
+        {"uq_feedback_labels_feedback_id_label_id"},
+    ),
+]
+
+
+def dialect_checks(dialect: str) -> list:
+    """Consultas com plano específico do banco"""
+    if dialect == "postgresql":
+        # No SQLite a busca usa a tabela virtual FTS5, que não aparece como índice
+        return [(
+            "busca textual (GET /feedbacks/search?q=)",
+            search.search_statement(dialect, "entrega atrasada", []).limit(PAGE_SIZE),
+            {"ix_feedbacks_search_vector"},
+        )]
+    return []
+
+
+def _plan_indexes_postgres(node) -> set:
+    found = set()
+    if isinstance(node, dict):
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        for value in node.values():
+            found |= _plan_indexes_postgres(value)
+    elif isinstance(node, list):
+        for value in node:
+            found |= _plan_indexes_postgres(value)
+    return found
+
+
+def explain(connection, statement):
+    """Retorna (índices usados, plano em texto)"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "postgresql":
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _plan_indexes_postgres(plan), json.dumps(plan, indent=2)
+
+    # SQLite: "SEARCH feedbacks USING INDEX ix_... (...)"
+    details = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    used = {
+        word
+        for detail in details
+        for word in detail.replace("(", " ").split()
+        if word.startswith(("ix_", "uq_"))
+    }
+    return used, "\n".join(details)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="Mostra o plano completo de cada consulta")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for description, statement, expected in CHECKS + dialect_checks(connection.dialect.name):
+            used, plan = explain(connection, statement)
+            ok = bool(used & expected)
+            failures += not ok
+            print(f"[{'OK' if ok else 'FALHOU'}] {description}: esperado {sorted(expected)}, usados {sorted(used) or '-'}")
+            if args.verbose or not ok:
+                print(plan)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Gera compras, feedbacks e rótulos sintéticos em volume de produção para testes de carga.
+
+As linhas são gravadas em blocos com COPY (PostgreSQL) ou executemany (demais bancos).
+Sentimento e rótulos vêm de um stub determinístico (padrão, controlado por --seed) ou
+dos modelos reais em lote (--scoring model, com cache para os comentários repetidos).
+Os ids são atribuídos pelo gerador a partir do maior id existente; rode-o sem outros
+escritores no banco.
+
+Uso:
+    python scripts/generate_data.py --rows 2000000 --days 730 --seed 42
+    python scripts/generate_data.py --rows 50000 --scoring model --chunk-size 2000
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+import argparse
+import csv
+import io
+import itertools
+import logging
+import random
+import time
+
+from sqlalchemy import func, insert, select, text
+
+from app import rollups
+from app.ai_processing import compute_polarity, map_sentiment_label
+from app.database import SessionLocal, engine
+from app.migrate import upgrade_database
+import app.models as models
+from seed import NEGATIVE_COMMENTS, NEUTRAL_COMMENTS, POSITIVE_COMMENTS, PREDEFINED_LABELS, PRODUCTS
+
+SENTIMENT_COMMENTS = {
+    "Positivo": POSITIVE_COMMENTS,
+    "Neutro": NEUTRAL_COMMENTS,
+    "Negativo": NEGATIVE_COMMENTS,
+}
+
+# Faixas de score/polaridade do stub, por sentimento
+STUB_POLARITY = {"Positivo": (0.1, 0.9), "Neutro": (-0.1, 0.1), "Negativo": (-0.9, -0.1)}
+
+PURCHASE_COLUMNS = ["id", "customer_id", "product_id", "product_name", "amount", "purchase_date", "updated_at"]
+FEEDBACK_COLUMNS = [
+    "id", "purchase_id", "comment", "sentiment_score", "sentiment_label",
+    "sentiment_tier", "secondary_polarity", "enrichment_status", "created_at", "updated_at"
+]
+FEEDBACK_LABEL_COLUMNS = ["feedback_id", "label_id"]
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Pesos de cauda longa: o item de posição k tem peso 1/k^skew (skew=0 é uniforme)"""
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 3 or any(part < 0 for part in parts) or not sum(parts):
+        raise argparse.ArgumentTypeError("Use três pesos positivo,neutro,negativo (ex.: 0.5,0.2,0.3)")
+    return dict(zip(["Positivo", "Neutro", "Negativo"], parts))
+
+
+class DataGenerator:
+    """Produz os blocos de linhas; toda a aleatoriedade sai de um único RNG com semente"""
+
+    def __init__(self, args, label_ids: Dict[str, int], first_purchase_id: int, first_feedback_id: int):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.label_ids = label_ids
+        self.next_purchase_id = first_purchase_id
+        self.next_feedback_id = first_feedback_id
+
+        # Embaralha antes de aplicar os pesos para que os produtos/rótulos "populares" dependam da semente
+        self.products = list(PRODUCTS)
+        self.rng.shuffle(self.products)
+        self.product_weights = list(itertools.accumulate(zipf_weights(len(self.products), args.product_skew)))
+
+        self.labels = list(label_ids)
+        self.rng.shuffle(self.labels)
+        self.label_weights = list(itertools.accumulate(zipf_weights(len(self.labels), args.label_skew)))
+
+        self.sentiments = list(args.sentiment_mix)
+        self.sentiment_weights = list(itertools.accumulate(args.sentiment_mix.values()))
+
+        self.end = args.end_date
+        self.span_seconds = args.days * 86400
+
+    def _comment(self, sentiment: str, product_name: str) -> str:
+        pool = SENTIMENT_COMMENTS[sentiment]
+        comment = self.rng.choice(pool)
+        # Combina frases e cita o produto para que os textos não se repitam todos
+        if self.rng.random() < 0.4:
+            comment = f"{comment} {self.rng.choice(pool)}"
+        if self.rng.random() < 0.3:
+            comment = f"{product_name}: {comment}"
+        return comment
+
+    def chunk(self, size: int):
+        """Retorna (purchases, feedbacks, feedback_labels) de um bloco com `size` feedbacks"""
+        rng = self.rng
+        purchases, feedbacks, links = [], [], []
+        for _ in range(size):
+            product = rng.choices(self.products, cum_weights=self.product_weights)[0]
+            purchase_date = self.end - timedelta(seconds=rng.uniform(0, self.span_seconds))
+            # Feedback chega até duas semanas depois da compra
+            created_at = min(purchase_date + timedelta(seconds=rng.uniform(0, 14 * 86400)), self.end)
+            sentiment = rng.choices(self.sentiments, cum_weights=self.sentiment_weights)[0]
+
+            purchase_id = self.next_purchase_id
+            feedback_id = self.next_feedback_id
+            self.next_purchase_id += 1
+            self.next_feedback_id += 1
+
+            purchases.append({
+                "id": purchase_id,
+                "customer_id": f"CUST{rng.randrange(self.args.customers):07d}",
+                "product_id": product["id"],
+                "product_name": product["name"],
+                "amount": float(rng.randint(*product["price_range"])),
+                "purchase_date": purchase_date,
+                "updated_at": created_at
+            })
+            feedbacks.append({
+                "id": feedback_id,
+                "purchase_id": purchase_id,
+                "comment": self._comment(sentiment, product["name"]),
+                "sentiment_score": round(rng.uniform(0.55, 0.99), 4),
+                "sentiment_label": sentiment,
+                "sentiment_tier": None,
+                "secondary_polarity": round(rng.uniform(*STUB_POLARITY[sentiment]), 4),
+                "enrichment_status": models.ENRICHMENT_DONE,
+                "created_at": created_at,
+                "updated_at": created_at
+            })
+            names = set(rng.choices(self.labels, cum_weights=self.label_weights, k=rng.randint(1, self.args.max_labels)))
+            links.extend({"feedback_id": feedback_id, "label_id": self.label_ids[name]} for name in names)
+        return purchases, feedbacks, links
+
+
+def score_with_models(analyzer, feedbacks: List[dict], label_ids: Dict[str, int]) -> List[dict]:
+    """Substitui sentimento, polaridade e rótulos do stub pelos resultados dos modelos"""
+    comments = [row["comment"] for row in feedbacks]
+    sentiments = analyzer.analyze_sentiment_batch(comments)
+    generated = analyzer.generate_labels_batch(comments, list(label_ids))
+    for row, sentiment, polarity in zip(feedbacks, sentiments, compute_polarity(comments)):
+        row["sentiment_score"] = sentiment["score"]
+        row["sentiment_label"] = map_sentiment_label(sentiment["label"])
+        row["sentiment_tier"] = sentiment.get("tier")
+        row["secondary_polarity"] = polarity
+    # Rótulos sugeridos fora da lista existente são ignorados para não criar rótulos durante a carga
+    return [
+        {"feedback_id": row["id"], "label_id": label_ids[name]}
+        for row, names in zip(feedbacks, generated)
+        for name in set(names) if name in label_ids
+    ]
+
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: List[dict]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # Campo vazio sem aspas é NULL no COPY ... CSV
+        writer.writerow([
+            row[column].isoformat() if isinstance(row[column], datetime) else row[column]
+            for column in columns
+        ])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def write_chunk(purchases: List[dict], feedbacks: List[dict], links: List[dict]):
+    """Grava um bloco em uma transação: COPY no PostgreSQL, executemany nos demais"""
+    if engine.dialect.name == "postgresql":
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            _copy_rows(cursor, "purchases", PURCHASE_COLUMNS, purchases)
+            _copy_rows(cursor, "feedbacks", FEEDBACK_COLUMNS, feedbacks)
+            _copy_rows(cursor, "feedback_labels", FEEDBACK_LABEL_COLUMNS, links)
+            connection.commit()
+        finally:
+            connection.close()
+        return
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.Purchase), purchases)
+        connection.execute(insert(models.Feedback), feedbacks)
+        if links:
+            connection.execute(insert(models.FeedbackLabel), links)
+
+
+def ensure_labels(db) -> Dict[str, int]:
+    existing = dict(db.execute(select(models.Label.name, models.Label.id)).all())
+    for name in PREDEFINED_LABELS:
+        if name not in existing:
+            db.add(models.Label(name=name, description=f"Rótulo para {name}"))
+    db.commit()
+    rows = db.execute(select(models.Label.name, models.Label.id).where(models.Label.name.in_(PREDEFINED_LABELS)))
+    return {name: label_id for name, label_id in rows}
+
+
+def _next_id(db, column) -> int:
+    return (db.scalar(select(func.max(column))) or 0) + 1
+
+
+def _reset_sequences():
+    """Os ids foram gravados explicitamente: alinha as sequências do PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in ("purchases", "feedbacks", "feedback_labels"):
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+
+
+def _build_analyzer():
+    from app.ai_processing import FeedbackAnalyzer
+    from app.inference_cache import CachedAnalyzer, InferenceCache
+
+    # Os comentários gerados se repetem muito: o cache em memória evita inferências repetidas
+    return CachedAnalyzer(FeedbackAnalyzer(), InferenceCache(persistent=False))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Quantidade de feedbacks (uma compra por feedback)")
+    parser.add_argument("--customers", type=int, default=None, help="Clientes distintos (padrão: rows / 3)")
+    parser.add_argument("--days", type=int, default=365, help="Período coberto, terminando em --end-date")
+    parser.add_argument("--end-date", type=lambda value: datetime.fromisoformat(value).replace(tzinfo=timezone.utc),
+                        default=None, help="Data final (ISO, padrão: agora)")
+    parser.add_argument("--product-skew", type=float, default=1.1, help="Expoente Zipf da popularidade dos produtos (0 = uniforme)")
+    parser.add_argument("--label-skew", type=float, default=1.0, help="Expoente Zipf da frequência dos rótulos (0 = uniforme)")
+    parser.add_argument("--max-labels", type=int, default=3, help="Máximo de rótulos por feedback")
+    parser.add_argument("--sentiment-mix", type=parse_mix, default=parse_mix("0.55,0.2,0.25"),
+                        help="Pesos positivo,neutro,negativo")
+    parser.add_argument("--scoring", choices=("stub", "model"), default="stub",
+                        help="stub: sentimento/rótulos determinísticos; model: inferência em lote com os modelos")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Linhas por transação")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-rollups", action="store_true", help="Não recalcula sentiment_rollups ao final")
+    parser.add_argument("--quiet", action="store_true", help="Não imprime o progresso de cada bloco")
+    return parser
+
+
+def generate(args) -> int:
+    """Gera args.rows compras/feedbacks no banco configurado e retorna quantos foram gravados"""
+    args.customers = args.customers or max(1, args.rows // 3)
+    args.end_date = args.end_date or datetime.now(timezone.utc)
+
+    db = SessionLocal()
+    try:
+        label_ids = ensure_labels(db)
+        first_purchase_id = _next_id(db, models.Purchase.id)
+        first_feedback_id = _next_id(db, models.Feedback.id)
+    finally:
+        db.close()
+
+    generator = DataGenerator(args, label_ids, first_purchase_id, first_feedback_id)
+    analyzer = _build_analyzer() if args.scoring == "model" else None
+
+    started = time.perf_counter()
+    written = 0
+    try:
+        while written < args.rows:
+            purchases, feedbacks, links = generator.chunk(min(args.chunk_size, args.rows - written))
+            if analyzer is not None:
+                links = score_with_models(analyzer, feedbacks, label_ids)
+            write_chunk(purchases, feedbacks, links)
+            written += len(feedbacks)
+            if not args.quiet:
+                elapsed = time.perf_counter() - started
+                print(f"{written}/{args.rows} feedbacks ({written / elapsed:.0f} linhas/s)")
+    finally:
+        if analyzer is not None:
+            analyzer.shutdown()
+
+    _reset_sequences()
+
+    if not args.skip_rollups:
+        db = SessionLocal()
+        try:
+            rollups.rebuild(db)
+        finally:
+            db.close()
+    return written
+
+
+def main():
+    args = build_parser().parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database()
+
+    started = time.perf_counter()
+    written = generate(args)
+    print(f"{written} compras e feedbacks gerados em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Recalcula a tabela sentiment_rollups a partir de feedbacks e rótulos (backfill).
+
+Uso:
+    python scripts/rebuild_rollups.py
+"""
+import logging
+
+from app import rollups
+from app.database import SessionLocal
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        processed = rollups.rebuild(db)
+        print(f"Rollups recalculados a partir de {processed} feedbacks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,19 @@ import plotly.graph_objects as go
 from datetime import datetime
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
+import re
 from textblob import TextBlob
+import data_store
 
 # Configuração da página
 st.set_page_config(page_title="Feedback Insights Pro", layout="wide", page_icon="📊")
 st.title("📈 Painel de Análise de Feedbacks")
 
 # URL da API FastAPI
-API_URL = "http://localhost:8000"
+API_URL = data_store.API_URL
+
+# Caracteres com significado em markdown/Streamlit ($ = LaTeX, : = emojis); < > & já chegam escapados
+MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()#+\-.!|~$:])")
 
 # Sidebar para filtros avançados
 with st.sidebar:
@@ -52,47 +57,81 @@ with st.sidebar:
     # Botão para atualizar dados
     refresh_data = st.button("Atualizar Dados")
 
-# Obter dados da API com cache
-@st.cache_data(ttl=300)  # Cache por 5 minutos
-def get_feedbacks():
-    response = requests.get(f"{API_URL}/feedbacks/")
-    return response.json() if response.ok else []
+# Dados locais (Parquet) sincronizados de forma incremental com a API
+@st.cache_data(ttl=300)  # Sincroniza no máximo a cada 5 minutos, salvo pelo botão
+def load_data():
+    df_feedbacks, df_labels = data_store.build_label_index(data_store.sync_feedbacks())
+    return df_feedbacks, df_labels, data_store.sync_purchases()
 
-@st.cache_data(ttl=300)
-def get_purchases():
-    response = requests.get(f"{API_URL}/purchases/")
-    return response.json() if response.ok else []
+if refresh_data:
+    # Força um sync imediato (apenas o delta desde o último)
+    load_data.clear()
+    get_labels.clear()
 
-# Processamento dos dados
-feedbacks = get_feedbacks()
-purchases = get_purchases()
+try:
+    df_all_feedbacks, df_feedback_labels, df_purchases = load_data()
+except requests.RequestException as e:
+    st.error(f"Erro ao sincronizar dados com a API: {e}")
+    st.stop()
 
-if not feedbacks:
+if df_all_feedbacks.empty:
     st.warning("⚠️ Nenhum feedback encontrado na base de dados.")
     st.stop()
 
-# Criar DataFrame e aplicar filtros
-df_feedbacks = pd.DataFrame(feedbacks)
+# Aplicar filtros (todos combinados em uma única máscara)
+# Todos os rótulos selecionados equivale a não filtrar
+labels_active = bool(label_filter) and set(label_filter) != set(available_labels)
+mask = data_store.filter_mask(
+    df_all_feedbacks,
+    df_feedback_labels,
+    start_date=date_range[0] if len(date_range) == 2 else None,
+    end_date=date_range[1] if len(date_range) == 2 else None,
+    sentiment=sentiment_filter if sentiment_filter != "Todos" else None,
+    labels=label_filter if labels_active else None
+)
+df_feedbacks = df_all_feedbacks[mask]
 
-# Converter datas e filtrar por período
-df_feedbacks['created_at'] = pd.to_datetime(df_feedbacks['created_at'])
-if len(date_range) == 2:
-    mask = (df_feedbacks['created_at'].dt.date >= date_range[0]) & \
-           (df_feedbacks['created_at'].dt.date <= date_range[1])
-    df_feedbacks = df_feedbacks.loc[mask]
+# Agregados pré-calculados pela API (tabelas de rollup). Com filtro de rótulos
+# os números precisam ser recalculados sobre os feedbacks filtrados.
+@st.cache_data(ttl=300)
+def get_stats(path, params):
+    response = requests.get(f"{API_URL}/stats/{path}", params=dict(params))
+    return response.json() if response.ok else None
 
-# Filtro por sentimento
+stats_params = {}
+if len(date_range) == 2:
+    stats_params = {"start_date": date_range[0].isoformat(), "end_date": date_range[1].isoformat()}
+sentiment_params = dict(stats_params)
 if sentiment_filter != "Todos":
-    df_feedbacks = df_feedbacks[df_feedbacks["sentiment_label"] == sentiment_filter]
+    sentiment_params["sentiment_label"] = sentiment_filter
+summary = None if labels_active else get_stats("summary", tuple(stats_params.items()))
 
-# Filtro por rótulos
-if label_filter:
-    feedbacks_with_labels = []
-    for feedback in feedbacks:
-        feedback_labels = [fl['label']['name'] for fl in feedback.get('labels', []) if 'label' in fl]
-        if any(label in feedback_labels for label in label_filter):
-            feedbacks_with_labels.append(feedback)
-    df_feedbacks = pd.DataFrame(feedbacks_with_labels)
+if summary is not None:
+    by_sentiment = summary["by_sentiment"]
+    if sentiment_filter != "Todos":
+        by_sentiment = {k: v for k, v in by_sentiment.items() if k == sentiment_filter}
+    sentiment_counts = pd.Series({k: v["count"] for k, v in by_sentiment.items()}, dtype="int64")
+    total = int(sentiment_counts.sum())
+    avg_score = sum((v["score_avg"] or 0.0) * v["count"] for v in by_sentiment.values()) / total if total else 0.0
+else:
+    sentiment_counts = df_feedbacks['sentiment_label'].value_counts()
+    total = len(df_feedbacks)
+    avg_score = df_feedbacks['sentiment_score'].mean()
+
+@st.cache_resource
+def polarity_memo():
+    return {}
+
+def fill_polarity(df):
+    polarity = df['secondary_polarity'].astype('float64')
+    missing = polarity.isna()
+    if missing.any():
+        memo = polarity_memo()
+        for feedback_id, comment in zip(df.loc[missing, 'id'], df.loc[missing, 'comment']):
+            if feedback_id not in memo:
+                memo[feedback_id] = TextBlob(comment or "").sentiment.polarity
+        polarity = polarity.fillna(df['id'].map(memo))
+    return polarity
 
 # Layout principal
 tab1, tab2, tab3 = st.tabs(["📊 Visão Geral", "🔍 Análise Detalhada", "📝 Feedbacks Completos"])
@@ -103,32 +142,27 @@ with tab1:
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total de Feedbacks", len(df_feedbacks))
+        st.metric("Total de Feedbacks", total)
     
     with col2:
-        avg_score = df_feedbacks['sentiment_score'].mean()
         st.metric("Média de Sentimento", f"{avg_score:.2f}", 
                  "👍 Positivo" if avg_score > 0.6 else "👎 Negativo" if avg_score < 0.4 else "😐 Neutro")
     
     with col3:
-        if df_feedbacks[df_feedbacks['sentiment_label'] == 'Positivo'].shape[0] != 0:
-            pos_perc = df_feedbacks[df_feedbacks['sentiment_label'] == 'Positivo'].shape[0] / df_feedbacks.shape[0]
-        else:
-            pos_perc = 0
+        pos_perc = sentiment_counts.get('Positivo', 0) / total if total else 0
         st.metric("Feedbacks Positivos", f"{pos_perc:.1%}")
     
     with col4:
-        if df_feedbacks[df_feedbacks['sentiment_label'] == 'Negativo'].shape[0] != 0:
-            neg_perc = df_feedbacks[df_feedbacks['sentiment_label'] == 'Negativo'].shape[0] / df_feedbacks.shape[0]
-        else:
-            neg_perc = 0
+        neg_perc = sentiment_counts.get('Negativo', 0) / total if total else 0
         st.metric("Feedbacks Negativos", f"{neg_perc:.1%}")
     
     # Gráficos principais
     st.subheader("📊 Distribuição de Sentimentos")
+    df_sentiments = sentiment_counts.rename_axis('sentiment_label').reset_index(name='count')
     fig1 = px.pie(
-        df_feedbacks,
+        df_sentiments,
         names="sentiment_label",
+        values="count",
         color="sentiment_label",
         color_discrete_map={'Positivo':'green', 'Neutro':'gray', 'Negativo':'red'},
         hole=0.4
@@ -136,31 +170,31 @@ with tab1:
     st.plotly_chart(fig1, use_container_width=True)
     
     # Evolução temporal
-    if len(df_feedbacks) > 0:
+    if total > 0:
         st.subheader("📅 Tendência Temporal")
         
-        # Garantir que a coluna é datetime e converter para timezone-naive se necessário
-        df_feedbacks['created_at'] = pd.to_datetime(df_feedbacks['created_at']).dt.tz_localize(None)
-        
         try:
-            # Criar cópia para não modificar o DataFrame original
-            df_temp = df_feedbacks.copy()
-            df_temp = df_temp.set_index('created_at')
-            
-            # Verificar se o índice é datetime
-            if isinstance(df_temp.index, pd.DatetimeIndex):
-                df_temporal = df_temp['sentiment_score'].resample('W').mean().reset_index()
-                
-                fig2 = px.line(
-                    df_temporal,
-                    x='created_at',
-                    y='sentiment_score',
-                    title="Evolução do Sentimento Médio (Semanal)"
+            timeseries = None if labels_active else get_stats(
+                "timeseries", tuple(dict(sentiment_params, period="week").items())
+            )
+            if timeseries is not None:
+                df_temporal = pd.DataFrame(timeseries).rename(
+                    columns={'bucket_start': 'created_at', 'score_avg': 'sentiment_score'}
                 )
-                fig2.add_hline(y=0.5, line_dash="dash", line_color="red")
-                st.plotly_chart(fig2, use_container_width=True)
             else:
-                st.warning("Os dados de data não estão no formato correto para análise temporal.")
+                # Garantir que a coluna é datetime e converter para timezone-naive se necessário
+                df_temp = df_feedbacks.copy()
+                df_temp['created_at'] = pd.to_datetime(df_temp['created_at']).dt.tz_localize(None)
+                df_temporal = df_temp.set_index('created_at')['sentiment_score'].resample('W').mean().reset_index()
+            
+            fig2 = px.line(
+                df_temporal,
+                x='created_at',
+                y='sentiment_score',
+                title="Evolução do Sentimento Médio (Semanal)"
+            )
+            fig2.add_hline(y=0.5, line_dash="dash", line_color="red")
+            st.plotly_chart(fig2, use_container_width=True)
         except Exception as e:
             st.error(f"Erro ao gerar gráfico temporal: {str(e)}")
     else:
@@ -171,17 +205,13 @@ with tab2:
     st.subheader("🏷️ Análise por Rótulos")
     
     # Processar rótulos
-    all_labels = []
-    for feedback in feedbacks:
-        for feedback_label in feedback.get('labels', []):
-            if 'label' in feedback_label:
-                all_labels.append(feedback_label['label']['name'])
-    
-    if all_labels:
-        df_labels = pd.DataFrame(all_labels, columns=['label'])
-        label_counts = df_labels['label'].value_counts().reset_index()
-        label_counts.columns = ['label', 'count']
-        
+    label_stats = None if labels_active else get_stats("labels", tuple(sentiment_params.items()))
+    if label_stats is not None:
+        label_counts = pd.DataFrame(label_stats, columns=['label', 'count'])
+    else:
+        label_counts = data_store.label_counts(df_feedback_labels, df_feedbacks['id'])
+    
+    if not label_counts.empty:
         fig3 = px.bar(
             label_counts.head(10),
             x='label',
@@ -193,8 +223,8 @@ with tab2:
         
         # Word Cloud
         st.subheader("☁️ Nuvem de Palavras dos Rótulos")
-        text = ' '.join(all_labels)
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
+        frequencies = dict(zip(label_counts['label'], label_counts['count']))
+        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies)
         fig_wc, ax = plt.subplots()
         ax.imshow(wordcloud, interpolation='bilinear')
         ax.axis('off')
@@ -204,8 +234,18 @@ with tab2:
     
     # Análise de correlação
     st.subheader("🔗 Correlação entre Sentimento e Produtos")
-    if purchases and 'purchase_id' in df_feedbacks.columns:
-        df_purchases = pd.DataFrame(purchases)
+    product_stats = None if labels_active else get_stats("products", tuple(sentiment_params.items()))
+    if product_stats:
+        df_products = pd.DataFrame(product_stats).sort_values('score_avg')
+        fig4 = px.bar(
+            df_products,
+            x='product_name',
+            y='score_avg',
+            color='count',
+            title="Sentimento Médio por Produto"
+        )
+        st.plotly_chart(fig4, use_container_width=True)
+    elif not df_purchases.empty:
         df_merged = pd.merge(df_feedbacks, df_purchases, left_on='purchase_id', right_on='id')
         
         fig4 = px.box(
@@ -218,11 +258,34 @@ with tab2:
         st.plotly_chart(fig4, use_container_width=True)
 
 with tab3:
+    # Busca textual feita pela API (índice full-text), com os mesmos filtros da barra lateral
+    st.subheader("🔎 Buscar nos Comentários")
+    search_query = st.text_input("Termos da busca", placeholder="ex.: entrega atrasada")
+    if search_query:
+        search_params = dict(sentiment_params)
+        if labels_active:
+            search_params["labels"] = label_filter
+        response = requests.get(
+            f"{API_URL}/feedbacks/search", params={**search_params, "q": search_query, "limit": 200}
+        )
+        if response.ok:
+            results = response.json()
+            st.caption(f"{len(results)} resultado(s) mais relevantes")
+            for result in results:
+                # O snippet já vem com o HTML do comentário escapado pela API (só <b></b> dos termos);
+                # escapa também a sintaxe markdown para o texto do cliente não ser interpretado
+                snippet = MARKDOWN_SPECIAL.sub(r"\\\1", result['snippet'] or "")
+                st.markdown(f"**{result['sentiment_label'] or '—'}** · {result['created_at'][:10]} — {snippet}",
+                            unsafe_allow_html=True)
+        else:
+            st.error(f"Erro na busca: {response.status_code}")
+
     # Tabela interativa de feedbacks
     st.subheader("📝 Feedbacks Detalhados")
     
-    # Adicionar análise de polaridade do TextBlob
-    df_feedbacks['polarity'] = df_feedbacks['comment'].apply(lambda x: TextBlob(x).sentiment.polarity)
+    # Polaridade do TextBlob calculada na ingestão; linhas antigas sem o valor
+    # são calculadas aqui uma única vez por feedback
+    df_feedbacks = df_feedbacks.assign(polarity=fill_polarity(df_feedbacks))
     
     # Mostrar tabela com filtros
     cols_to_show = st.multiselect(
@@ -0,0 +1,141 @@
+"""Cache local (Parquet) de feedbacks e compras, sincronizado de forma incremental com a API."""
+import os
+from datetime import timedelta
+
+import pandas as pd
+import requests
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+CACHE_DIR = os.getenv("DASHBOARD_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache"))
+PAGE_SIZE = 1000
+
+# Transações longas podem gravar updated_at anterior ao último sync: relê uma
+# pequena janela e descarta duplicadas pelo id
+SYNC_OVERLAP = timedelta(minutes=5)
+
+FEEDBACK_COLUMNS = [
+    "id", "purchase_id", "comment", "sentiment_score", "sentiment_label",
+    "secondary_polarity", "enrichment_status", "created_at", "updated_at", "label_names"
+]
+PURCHASE_COLUMNS = [
+    "id", "customer_id", "product_id", "product_name", "amount", "purchase_date", "updated_at"
+]
+
+
+def fetch_all(path, params=None):
+    """Percorre as páginas da API seguindo o cursor do cabeçalho X-Next-Cursor"""
+    rows, cursor = [], None
+    while True:
+        page_params = dict(params or {}, limit=PAGE_SIZE)
+        if cursor:
+            page_params["cursor"] = cursor
+        response = requests.get(f"{API_URL}{path}", params=page_params)
+        response.raise_for_status()
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    return rows
+
+
+def _flatten_feedbacks(rows):
+    for row in rows:
+        row["label_names"] = [fl["label"]["name"] for fl in row.pop("labels", []) if "label" in fl]
+    return pd.DataFrame(rows).reindex(columns=FEEDBACK_COLUMNS)
+
+
+def _flatten_purchases(rows):
+    return pd.DataFrame(rows).reindex(columns=PURCHASE_COLUMNS)
+
+
+def _normalize(df, date_columns):
+    for column in date_columns:
+        df[column] = pd.to_datetime(df[column], utc=True)
+    return df
+
+
+def _sync(name, path, columns, flatten, date_columns):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache_file = os.path.join(CACHE_DIR, f"{name}.parquet")
+
+    if os.path.exists(cache_file):
+        cached = pd.read_parquet(cache_file)
+    else:
+        cached = pd.DataFrame(columns=columns)
+    cached = _normalize(cached, date_columns)
+
+    params = {}
+    if not cached.empty and cached["updated_at"].notna().any():
+        params["since"] = (cached["updated_at"].max() - SYNC_OVERLAP).isoformat()
+
+    rows = fetch_all(path, params)
+    if not rows:
+        return cached
+
+    delta = _normalize(flatten(rows), date_columns)
+    merged = (
+        pd.concat([cached, delta], ignore_index=True)
+        .drop_duplicates(subset="id", keep="last")
+        .sort_values(["created_at" if "created_at" in columns else "id", "id"])
+        .reset_index(drop=True)
+    )
+    merged.to_parquet(cache_file, index=False)
+    return merged
+
+
+def sync_feedbacks():
+    """Atualiza o cache local de feedbacks trazendo só o que mudou desde o último sync"""
+    return _sync("feedbacks", "/feedbacks/", FEEDBACK_COLUMNS, _flatten_feedbacks, ["created_at", "updated_at"])
+
+
+def sync_purchases():
+    return _sync("purchases", "/purchases/", PURCHASE_COLUMNS, _flatten_purchases, ["purchase_date", "updated_at"])
+
+
+def clear_cache():
+    """Remove os arquivos locais, forçando uma carga completa no próximo sync"""
+    for name in ("feedbacks", "purchases"):
+        cache_file = os.path.join(CACHE_DIR, f"{name}.parquet")
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+
+
+def build_label_index(df_feedbacks):
+    """Normaliza os rótulos em uma tabela feedback x rótulo com dtypes categóricos
+
+    Retorna o frame de feedbacks sem a coluna de listas e a tabela
+    (feedback_id, label), usada para filtros e contagens vetorizados.
+    """
+    exploded = df_feedbacks[["id", "label_names"]].explode("label_names").dropna(subset=["label_names"])
+    df_labels = pd.DataFrame({
+        "feedback_id": exploded["id"].to_numpy(dtype="int64"),
+        "label": pd.Categorical(exploded["label_names"])
+    })
+
+    df = df_feedbacks.drop(columns=["label_names"])
+    for column in ("sentiment_label", "enrichment_status"):
+        df[column] = df[column].astype("category")
+    return df, df_labels
+
+
+def filter_mask(df_feedbacks, df_labels, start_date=None, end_date=None, sentiment=None, labels=None):
+    """Combina todos os filtros em uma única máscara booleana sobre df_feedbacks"""
+    mask = pd.Series(True, index=df_feedbacks.index)
+    if start_date is not None:
+        mask &= df_feedbacks["created_at"] >= pd.Timestamp(start_date, tz="UTC")
+    if end_date is not None:
+        # Data final inclusiva
+        mask &= df_feedbacks["created_at"] < pd.Timestamp(end_date, tz="UTC") + pd.Timedelta(days=1)
+    if sentiment:
+        mask &= df_feedbacks["sentiment_label"] == sentiment
+    if labels:
+        matching = df_labels.loc[df_labels["label"].isin(labels), "feedback_id"]
+        mask &= df_feedbacks["id"].isin(matching)
+    return mask
+
+
+def label_counts(df_labels, feedback_ids):
+    """Contagem de rótulos dos feedbacks selecionados, em ordem decrescente"""
+    counts = df_labels.loc[df_labels["feedback_id"].isin(feedback_ids), "label"].value_counts()
+    counts = counts[counts > 0]
+    return counts.rename_axis("label").reset_index(name="count")
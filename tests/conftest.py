@@ -0,0 +1,41 @@
+"""Ambiente dos testes: SQLite temporário e modelos stub (precisa rodar antes de importar app.*)"""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='feedback-tests-'), 'tests.db')}"
+)
+os.environ["INFERENCE_BACKEND"] = "stub"
+os.environ["MODEL_LOADING"] = "lazy"
+os.environ["ENRICHMENT_MODE"] = "sync"
+os.environ["ENRICHMENT_WORKERS"] = "0"
+os.environ["LABEL_BACKFILL_WORKER"] = "false"
+os.environ["INFERENCE_CACHE_PERSISTENT"] = "false"
+os.environ["VECTOR_INDEX_DIR"] = tempfile.mkdtemp(prefix="feedback-tests-index-")
+
+@pytest.fixture(scope="session")
+def database():
+    from app.migrate import upgrade_database
+
+    upgrade_database()
+
+
+@pytest.fixture
+def db(database):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,19 @@
+from app.ai_processing import TIER_LEXICON, TIER_TRANSFORMER, FeedbackAnalyzer
+
+
+def test_cascade_decides_clear_texts_with_lexicon():
+    analyzer = FeedbackAnalyzer(load=False, backend="stub")
+    clear, unclear = analyzer.analyze_sentiment_batch([
+        "Produto ótimo, entrega rápida",
+        "A mala chegou",
+    ])
+
+    assert clear["tier"] == TIER_LEXICON
+    assert clear["label"] == "positive"
+    assert unclear["tier"] == TIER_TRANSFORMER
+
+
+def test_single_text_goes_through_cascade():
+    analyzer = FeedbackAnalyzer(load=False, backend="stub")
+    assert analyzer.analyze_sentiment("Péssimo, chegou quebrado")["tier"] == TIER_LEXICON
+    assert "lexicon" in analyzer.sentiment_model_id
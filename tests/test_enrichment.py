@@ -0,0 +1,48 @@
+import pytest
+
+from app import config, crud
+from app.ai_processing import FeedbackAnalyzer
+from app.enrichment import EnrichmentWorkerPool
+import app.models as models
+
+
+def failing_analyzer():
+    analyzer = FeedbackAnalyzer(load=False, backend="stub")
+    analyzer.load()
+    analyzer.lexicon = None  # todo texto vai ao transformer
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("modelo indisponível")
+
+    analyzer.sentiment_model = broken
+    return analyzer
+
+
+@pytest.fixture
+def queued(db):
+    purchase = models.Purchase(customer_id="c1", product_id="p1", product_name="Produto", amount=10.0)
+    db.add(purchase)
+    db.flush()
+    feedback = models.Feedback(purchase_id=purchase.id, comment="Produto ótimo, entrega rápida")
+    db.add(feedback)
+    db.flush()
+    job = crud.enqueue_enrichment(db, feedback)
+    db.commit()
+    return feedback.id, job.id
+
+
+def test_model_failure_returns_job_to_queue_until_attempts_run_out(db, queued):
+    feedback_id, job_id = queued
+    pool = EnrichmentWorkerPool(failing_analyzer(), num_workers=0, batch_size=100)
+
+    for attempt in range(1, config.ENRICHMENT_MAX_ATTEMPTS + 1):
+        pool.process_once()
+        db.expire_all()
+        job = db.get(models.EnrichmentJob, job_id)
+        feedback = db.get(models.Feedback, feedback_id)
+        assert job.attempts == attempt
+        assert "modelo indisponível" in job.last_error
+        assert feedback.sentiment_label is None
+        expected = models.ENRICHMENT_FAILED if attempt == config.ENRICHMENT_MAX_ATTEMPTS else models.ENRICHMENT_PENDING
+        assert job.status == expected
+        assert feedback.enrichment_status == expected
@@ -0,0 +1,47 @@
+import pytest
+
+from app import config
+from app.lexicon import LexiconSentimentScorer
+
+
+@pytest.fixture
+def scorer():
+    return LexiconSentimentScorer()
+
+
+@pytest.mark.parametrize("text", [
+    "A mala chegou",  # "mal" não é prefixo de mala
+    "A amostra veio",  # nem "amo" de amostra
+    "Malha fina e confortável",
+    "Uma bomba de água",
+    "A etiqueta fica atrás",
+])
+def test_product_words_are_not_polarized(scorer, text):
+    assert scorer.score(text) == {"label": "neutral", "score": 0.0}
+
+
+@pytest.mark.parametrize("text, label", [
+    ("Produto bom", "positive"),
+    ("O produto é lixo", "negative"),
+    ("Chegou mal embalado", "negative"),
+])
+def test_single_hit_escalates_to_transformer(scorer, text, label):
+    result = scorer.score(text)
+    assert result["label"] == label
+    assert result["score"] < config.SENTIMENT_CASCADE_THRESHOLD
+
+
+@pytest.mark.parametrize("text, label", [
+    ("Produto ótimo, entrega rápida", "positive"),
+    ("Amei, excelente", "positive"),
+    ("Péssimo, chegou quebrado", "negative"),
+    ("Não gostei, veio com defeito", "negative"),
+])
+def test_clear_cases_are_decided_by_lexicon(scorer, text, label):
+    result = scorer.score(text)
+    assert result["label"] == label
+    assert result["score"] >= config.SENTIMENT_CASCADE_THRESHOLD
+
+
+def test_mixed_opinion_is_left_to_transformer(scorer):
+    assert scorer.score("Entrega rápida, mas veio quebrado")["score"] == 0.0
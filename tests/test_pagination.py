@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+from app.database import SessionLocal
+import app.models as models
+
+
+def walk(client, path, **params):
+    """Segue X-Next-Cursor até a última página e devolve os ids na ordem recebida"""
+    ids, cursor = [], None
+    for _ in range(50):
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+    raise AssertionError("paginação não terminou")
+
+
+def test_cursor_pages_cover_rows_sharing_a_timestamp(client):
+    purchase_ids = [
+        client.post("/purchases/", json={
+            "customer_id": "c1", "product_id": "p1", "product_name": "Produto", "amount": 10.0
+        }).json()["id"]
+        for _ in range(3)
+    ]
+
+    shared = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    db = SessionLocal()
+    try:
+        # Timestamps do default da coluna e vários feedbacks no mesmo instante
+        feedbacks = [models.Feedback(purchase_id=purchase_ids[0], comment=f"padrão {index}") for index in range(3)]
+        feedbacks += [
+            models.Feedback(purchase_id=purchase_ids[1], comment=f"mesmo instante {index}",
+                            created_at=shared, updated_at=shared)
+            for index in range(4)
+        ]
+        db.add_all(feedbacks)
+        db.commit()
+        expected = {feedback.id for feedback in feedbacks}
+    finally:
+        db.close()
+
+    for params in ({}, {"since": "2000-01-01T00:00:00"}):
+        ids = [feedback_id for feedback_id in walk(client, "/feedbacks/", limit=2, **params) if feedback_id in expected]
+        assert sorted(ids) == sorted(expected)
+        assert len(ids) == len(set(ids))
+
+    purchases = walk(client, "/purchases/", limit=2)
+    assert set(purchase_ids) <= set(purchases)
+    assert len(purchases) == len(set(purchases))
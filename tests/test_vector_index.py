@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+import app.models as models
+from app.vector_index import VectorIndex, build_index, embedding_blobs
+
+
+def add_feedbacks(db, vectors):
+    blobs = embedding_blobs(np.asarray(vectors, dtype=np.float32), len(vectors))
+    feedbacks = [
+        models.Feedback(comment=f"comentário {index}", embedding=blob, embedded_at=datetime.now(timezone.utc))
+        for index, blob in enumerate(blobs)
+    ]
+    db.add_all(feedbacks)
+    db.commit()
+    return [feedback.id for feedback in feedbacks]
+
+
+def test_refresh_skips_vectors_already_in_base(db, tmp_path):
+    base_ids = add_feedbacks(db, np.eye(3, 4))
+    build_index(db, directory=str(tmp_path))
+    index = VectorIndex(directory=str(tmp_path), refresh_interval=0)
+    index.load()
+
+    # A janela de sobreposição relê os vetores da reconstrução a cada refresh
+    for _ in range(3):
+        index.refresh(db)
+        assert not index._delta
+        assert len(index) >= len(base_ids)
+
+    new_ids = add_feedbacks(db, [[0.0, 0.0, 0.0, 1.0]])
+    for _ in range(2):
+        index.refresh(db)
+        assert list(index._delta) == new_ids
+
+    assert index.search([0.0, 0.0, 0.0, 1.0], k=1)[0][0] == new_ids[0]